@@ -0,0 +1,64 @@
+"""Role attribution latency benchmark for the maelstrom and random modes.
+
+Sets up a lobby of fake players for each size and times how long each mode takes to draw the roles for it,
+as done when the game starts (and, for maelstrom, again every night). Sizes above a mode's player limit are
+allowed, so attribution can be measured for lobbies larger than the mode normally accepts.
+
+Run from the repository root with: python -m benchmarks.attribution [-m MODE ...] [-p PLAYERS ...] [-n DRAWS]
+"""
+
+import argparse
+import statistics
+import time
+from collections import Counter
+
+from src import channels
+from src.events import Event
+from src.gamestate import GameState, set_gamemode
+from src.functions import get_players
+from src.trans import reset
+
+from benchmarks.simulate import HeadlessBot
+
+def _attribution(mode, var: GameState, villagers) -> Counter[str]:
+    if mode.name == "maelstrom":
+        return mode._role_attribution(var, villagers, True)
+    evt = Event("role_attribution", {"addroles": Counter()})
+    mode.role_attribution(evt, var, villagers)
+    return evt.data["addroles"]
+
+def main():
+    parser = argparse.ArgumentParser(description="Time role attribution for large maelstrom and random lobbies.")
+    parser.add_argument("-m", "--mode", action="append", choices=("maelstrom", "random"),
+                        help="Mode to benchmark; may be repeated. Defaults to both.")
+    parser.add_argument("-p", "--players", type=int, action="append",
+                        help="Lobby size; may be repeated. Defaults to 24, 30, 36, 42 and 50.")
+    parser.add_argument("-n", "--draws", type=int, default=1000, help="Number of attributions to time per lobby.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the game RNG.")
+    args = parser.parse_args()
+
+    bot = HeadlessBot(args.seed)
+    print("{0:<10} {1:>7} {2:>10} {3:>10} {4:>10} {5:>10}".format("mode", "players", "p50 (us)", "p90 (us)", "p99 (us)", "max (us)"))
+    for mode_name in args.mode or ("maelstrom", "random"):
+        for num_players in args.players or (24, 30, 36, 42, 50):
+            players = [bot.player(str(i)) for i in range(1, num_players + 1)]
+            for player in players:
+                bot.dispatch(player, "join")
+            pregame = channels.Main.game_state
+            set_gamemode(pregame, mode_name)
+            var = GameState(pregame)
+            villagers = get_players(pregame)
+
+            samples = []
+            for _ in range(args.draws):
+                start = time.perf_counter()
+                _attribution(var.current_mode, var, villagers)
+                samples.append(time.perf_counter() - start)
+
+            cuts = statistics.quantiles(samples, n=100, method="inclusive")
+            print("{0:<10} {1:>7} {2:>10.1f} {3:>10.1f} {4:>10.1f} {5:>10.1f}".format(
+                mode_name, num_players, statistics.median(samples) * 1e6, cuts[89] * 1e6, cuts[98] * 1e6, max(samples) * 1e6))
+            reset(pregame)
+
+if __name__ == "__main__":
+    main()
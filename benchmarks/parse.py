@@ -0,0 +1,40 @@
+"""Microbenchmark for the IRC line parser.
+
+Run from the repository root with: python -m benchmarks.parse [-n NUMBER]
+"""
+
+import argparse
+import timeit
+
+from oyoyo.parse import parse_irc_line, parse_raw_irc_command
+
+LINES = {
+    "privmsg": b":nick!~ident@host.example.net PRIVMSG #lykos :!vote somebody\r\n",
+    "tagged privmsg": (b"@account=nick;msgid=a1b2c3d4;time=2024-01-01T00:00:00.000Z "
+                       b":nick!~ident@host.example.net PRIVMSG #lykos :!vote somebody\r\n"),
+    "whox": (b":irc.example.net 354 wolfbot 220 #lykos ~ident 192.0.2.1 irc.example.net nick H@ "
+             b"0 3600 account :a real name\r\n"),
+    "names": (b":irc.example.net 353 wolfbot = #lykos :@wolfbot +alice bob carol dave eve "
+              b"frank grace heidi ivan judy mallory niaj olivia peggy rupert sybil trent\r\n"),
+}
+
+def _read_account(tags, prefix, command, args):
+    # handlers typically only look at the account tag, if anything
+    return tags.get("account")
+
+def main():
+    parser = argparse.ArgumentParser(description="Time parsing of common IRC lines.")
+    parser.add_argument("-n", "--number", type=int, default=100000, help="Number of iterations per line.")
+    args = parser.parse_args()
+
+    print("{0:<16} {1:>14} {2:>14} {3:>14}".format("line", "parse (us)", "+account (us)", "bytes (us)"))
+    for name, line in LINES.items():
+        view = memoryview(line)[:-2]
+        parse = timeit.timeit(lambda: parse_irc_line(view), number=args.number)
+        account = timeit.timeit(lambda: _read_account(*parse_irc_line(view)), number=args.number)
+        raw = timeit.timeit(lambda: parse_raw_irc_command(line), number=args.number)
+        print("{0:<16} {1:>14.3f} {2:>14.3f} {3:>14.3f}".format(
+            name, parse / args.number * 1e6, account / args.number * 1e6, raw / args.number * 1e6))
+
+if __name__ == "__main__":
+    main()
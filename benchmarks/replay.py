@@ -0,0 +1,209 @@
+"""Replay a recorded game journal with fake players.
+
+Journals are written by the bot when debug.journal.enabled is set (or by benchmarks.simulate --journal).
+The game is set up again from the journal's mode, RNG seed and join order, and every recorded command is
+fed back through the command handler at the same point on a virtual clock, so the game plays out the same
+way it did when it was recorded. The time spent handling each phase is reported, which makes it possible
+to reproduce a slow game offline and profile it as many times as needed.
+
+Players are replaced by fake players with numeric nicks, in join order. Words in command arguments which
+match a recorded nick (exactly, or as the unique prefix of one) are rewritten to the matching fake nick.
+Idling is not replayed: warnings and idle kills are based on the wall clock rather than the game's timers.
+
+Run from the repository root with: python -m benchmarks.replay JOURNAL [--repeat N] [--profile [FILE]]
+"""
+
+import argparse
+import cProfile
+import json
+import logging
+import os
+import pstats
+import sys
+import time
+from collections import defaultdict
+from typing import Any, Optional
+
+from src import channels, db, handler, pregame, users
+from src import random as game_random
+from src.dispatcher import MessageDispatcher
+from src.gamestate import set_gamemode
+from src.journal import JOURNAL_VERSION, phase_id
+from src.trans import reset, stop_game
+
+from benchmarks.simulate import CHANNEL, HeadlessBot
+
+class Replay:
+    """Play back a journal on a HeadlessBot.
+
+    :param records: Records of the journal, in order, starting with the game record
+    """
+    def __init__(self, records: list[dict[str, Any]]):
+        if not records or records[0].get("type") != "game":
+            raise ValueError("journal does not start with a game record")
+        self.game = records[0]
+        if self.game["version"] != JOURNAL_VERSION:
+            raise ValueError("unsupported journal version {0}".format(self.game["version"]))
+        self.events = [record for record in records[1:] if record["type"] in ("command", "leave")]
+        self.end = next((record for record in records if record["type"] == "end"), None)
+        self.seed = bytes.fromhex(self.game["seed"])
+        self.nicks = [str(i) for i in range(1, len(self.game["players"]) + 1)]
+        self._nick_map = {nick.lower(): fake for nick, fake in zip(self.game["players"], self.nicks)}
+
+    def _map_word(self, word: str) -> str:
+        lower = word.lower()
+        if lower in self._nick_map:
+            return self._nick_map[lower]
+        matches = [fake for nick, fake in self._nick_map.items() if nick.startswith(lower)]
+        if len(matches) == 1:
+            return matches[0]
+        return word
+
+    def map_message(self, message: str) -> str:
+        """Rewrite the recorded nicks in a command's arguments to the nicks of the fake players."""
+        return " ".join(self._map_word(word) for word in message.split(" "))
+
+    def play(self, bot: HeadlessBot, timings: defaultdict[str, float], *, max_steps: int = 1000) -> list[str]:
+        """Replay the journal once.
+
+        :param bot: Bot to replay the game on
+        :param timings: Seconds spent handling each phase are added under the phase id
+        :param max_steps: Give up on the game after running timers this many times once the journal runs out
+        :returns: Descriptions of every point where the replay diverged from the journal
+        """
+        problems: list[str] = []
+        game_random.seed_function = lambda size: self.seed[:size]
+        players = [bot.player(nick) for nick in self.nicks]
+        for player in players:
+            bot.dispatch(player, "join")
+        if not set_gamemode(channels.Main.game_state, self.game["mode"]):
+            reset(channels.Main.game_state)
+            return ["unable to set mode {0}".format(self.game["mode"])]
+
+        start = time.perf_counter()
+        pregame.start(MessageDispatcher(players[0], channels.Main), forced=True)
+        timings["start"] += time.perf_counter() - start
+        var = channels.Main.game_state
+        if var is None or not var.in_game:
+            return ["the game could not be started"]
+        if var.rng_seed != self.seed:
+            problems.append("the game was not seeded with the recorded seed")
+        origin = bot.now
+
+        for record in self.events:
+            if channels.Main.game_state is not var:
+                problems.append("the game ended before the {0} command at {1}s".format(record.get("key", record["type"]), record["t"]))
+                break
+            phase = phase_id(var)
+            start = time.perf_counter()
+            bot.advance(origin + record["t"])
+            timings[phase] += time.perf_counter() - start
+            if channels.Main.game_state is not var:
+                continue
+            phase = phase_id(var)
+            if phase != record["phase"]:
+                problems.append("{0} happened in {1} instead of {2}".format(record.get("key", record["type"]), phase, record["phase"]))
+            player = players[record["player"]]
+            start = time.perf_counter()
+            if record["type"] == "leave":
+                if record["what"] == "quit":
+                    bot.server_line("quit", "Quit", source=player.rawnick)
+                elif record["what"] == "kick":
+                    bot.server_line("kick", CHANNEL, player.nick, "Kicked", source=users.Bot.rawnick)
+                else:
+                    bot.server_line("part", CHANNEL, source=player.rawnick)
+            elif record.get("forced"):
+                handler.parse_and_dispatch(MessageDispatcher(player, channels.Main), record["key"],
+                                           self.map_message(record["message"]), role=record.get("role"), force=player)
+                db._worker.run_pending()
+            else:
+                target = channels.Main if record["public"] else users.Bot
+                handler.parse_and_dispatch(MessageDispatcher(player, target), record["key"],
+                                           self.map_message(record["message"]), role=record.get("role"))
+                db._worker.run_pending()
+            timings[phase] += time.perf_counter() - start
+
+        steps = 0
+        while channels.Main.game_state is var and var.in_game:
+            steps += 1
+            phase = phase_id(var)
+            start = time.perf_counter()
+            advanced = steps <= max_steps and bot.advance()
+            timings[phase] += time.perf_counter() - start
+            if not advanced:
+                problems.append("the game did not end after the journal ran out")
+                stop_game(var, abort=True, log=False)
+                return problems
+
+        if self.end is not None and abs(bot.now - origin - self.end["t"]) > 0.001:
+            problems.append("the game ended at {0:.3f}s instead of {1}s".format(bot.now - origin, self.end["t"]))
+        return problems
+
+def load(path: str) -> list[dict[str, Any]]:
+    """Read the records of a journal."""
+    with open(path, "rt", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded game and report how long each phase took to handle.")
+    parser.add_argument("journal", help="Journal file to replay.")
+    parser.add_argument("-r", "--repeat", type=int, default=1, help="Number of times to replay the game.")
+    parser.add_argument("--profile", nargs="?", const="", metavar="FILE",
+                        help="Profile the replays, printing the slowest functions or saving the stats to FILE.")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Print every error raised during the replays.")
+    args = parser.parse_args()
+
+    records = load(args.journal)
+    replay = Replay(records)
+    hashseed = replay.game["hashseed"]
+    if hashseed is None:
+        print("warning: the game was recorded without PYTHONHASHSEED, so it might not play out the same way", file=sys.stderr)
+        hashseed = "0"
+    if os.environ.get("PYTHONHASHSEED") != hashseed:
+        # the game code iterates over sets of players, whose order depends on string hashing
+        os.environ["PYTHONHASHSEED"] = hashseed
+        os.execv(sys.executable, [sys.executable, "-m", "benchmarks.replay", *sys.argv[1:]])
+
+    bot = HeadlessBot()
+    timings: defaultdict[str, float] = defaultdict(float)
+    profiler: Optional[cProfile.Profile] = cProfile.Profile() if args.profile is not None else None
+    problems: list[str] = []
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        if profiler is not None:
+            profiler.enable()
+        problems = replay.play(bot, timings)
+        if profiler is not None:
+            profiler.disable()
+    elapsed = time.perf_counter() - start
+
+    print("{0} with {1} players, {2} commands, {3} replay(s) in {4:.3f}s".format(
+        replay.game["mode"], len(replay.nicks), len(replay.events), args.repeat, elapsed))
+    print()
+    print("{0:<12} {1:>12} {2:>10}".format("phase", "total (ms)", "mean (ms)"))
+    for phase, seconds in sorted(timings.items(), key=lambda item: item[1], reverse=True):
+        print("{0:<12} {1:>12.3f} {2:>10.3f}".format(phase, seconds * 1e3, seconds * 1e3 / args.repeat))
+
+    print()
+    if problems:
+        print("the replay diverged from the journal:")
+        for problem in problems:
+            print("  " + problem)
+    else:
+        print("the replay matched the journal")
+    print("{0} lines sent, {1} errors".format(bot.client.lines, len(bot.errors.records)))
+
+    if profiler is not None:
+        if args.profile:
+            profiler.dump_stats(args.profile)
+        else:
+            print()
+            pstats.Stats(profiler).sort_stats("cumulative").print_stats(25)
+
+    if args.verbose:
+        for record in bot.errors.records:
+            print()
+            print(logging.Formatter().format(record))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+"""Headless game simulation benchmark.
+
+Plays complete games with fake players and no IRC connection, and reports how fast they run.
+The bot's outgoing lines go to an in-memory sink, the database lives in memory, and phase timers
+run on a virtual clock which jumps straight to the next deadline whenever the players stop acting,
+so a game takes only as long as the code it runs.
+
+Run from the repository root with: python -m benchmarks.simulate [-n GAMES] [-m MODE ...] [-p PLAYERS] [--seed SEED]
+[--journal DIRECTORY]
+"""
+
+import argparse
+import logging
+import os
+import random as py_random
+import sqlite3
+import statistics
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from typing import Callable, Optional
+
+from src import channels, config, db, decorators, handler, pregame, scheduler, users
+from src import random as game_random
+from src.db.worker import BatchConnection, DatabaseWorker
+from src.dispatcher import MessageDispatcher
+from src.functions import get_all_roles, get_participants, get_players
+from src.gamemodes import GAME_MODES
+from src.gamestate import GameState, set_gamemode
+from src.trans import reset, stop_game
+
+try:
+    import resource
+except ImportError: # not available on Windows
+    resource = None
+
+CHANNEL = "#headless"
+SERVER = "irc.headless"
+
+# An actor decides what a player does when given a chance to act: it returns (command, arguments, in channel)
+# or None to stay idle. Scripted games pass their own actor; RandomActor is used otherwise.
+Actor = Callable[["HeadlessBot", GameState, users.User], Optional[tuple[str, str, bool]]]
+
+class SinkClient:
+    """Stand-in for IRCClient which counts the lines the bot sends instead of sending them."""
+    nickname = "wolfbot"
+    ident = "wolfbot"
+    hostmask = "headless"
+
+    def __init__(self):
+        self.command_handler = {}
+        self.lines = 0
+
+    def send(self, *args, **kwargs):
+        self.lines += 1
+
+class _ErrorCounter(logging.Handler):
+    def __init__(self):
+        super().__init__(logging.ERROR)
+        self.records: list[logging.LogRecord] = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+class RandomActor:
+    """Have every player use a random command available to their roles on a random target.
+
+    During the day, voting is one of the available commands.
+
+    :param rng: Random number generator driving the choices
+    :param activity: Chance that a player acts when given the opportunity
+    """
+    def __init__(self, rng: py_random.Random, activity: float = 0.9):
+        self.rng = rng
+        self.activity = activity
+
+    def __call__(self, bot: "HeadlessBot", var: GameState, player: users.User) -> Optional[tuple[str, str, bool]]:
+        if self.rng.random() >= self.activity:
+            return None
+        phase = var.current_phase
+        roles = get_all_roles(var, player)
+        choices = []
+        for key, fns in decorators.COMMANDS.items():
+            for fn in fns:
+                if fn.roles and roles.intersection(fn.roles) and (not fn.phases or phase in fn.phases):
+                    choices.append((key, not fn.pm))
+                    break
+        if phase == "day" and player in get_players(var):
+            choices.append(("vote", True))
+        if not choices:
+            return None
+        key, public = self.rng.choice(choices)
+        alive = [p.nick for p in get_players(var)]
+        targets = self.rng.sample(alive, min(len(alive), self.rng.choice((1, 2))))
+        return key, " ".join(targets), public
+
+class HeadlessBot:
+    """Run the bot without an IRC connection.
+
+    Creating an instance rewires the process-wide bot state (config, scheduler, database and main channel),
+    so only one instance should exist per process.
+
+    :param seed: Seed for the game RNG; every game played by this instance is reproducible from it
+    """
+    def __init__(self, seed: int = 0):
+        config.Main.set("transports", [{
+            "type": "irc",
+            "name": "headless",
+            "user": {"nick": SinkClient.nickname},
+            "connection": {"host": SERVER, "port": 6667},
+            "channels": {"main": CHANNEL},
+            "authentication": {"services": {"module": "none"}},
+        }])
+        # debug mode keeps error reports local instead of uploading them
+        config.Main.set("debug.enabled", True)
+
+        self.now = 0.0
+        self.scheduler = scheduler._scheduler = scheduler.Scheduler(clock=lambda: self.now, autostart=False)
+
+        conn = sqlite3.connect(":memory:", factory=BatchConnection)
+        with open(os.path.join(os.path.dirname(db.__file__), "db.sql"), "rt") as f:
+            conn.executescript(f.read())
+        db._ts.conn = conn
+        db._worker = DatabaseWorker(db._conn, autostart=False)
+
+        self.rng = py_random.Random(seed)
+        game_random.seed_function = self.rng.randbytes
+        game_random.random.seed(game_random.get_seed())
+
+        self.errors = _ErrorCounter()
+        logging.getLogger("exception").addHandler(self.errors)
+
+        self.client = SinkClient()
+        users.Bot = users.BotUser(self.client, SinkClient.nickname, SinkClient.ident, SinkClient.hostmask, None)
+        self.server_line("featurelist", SinkClient.nickname, "CHANTYPES=#", "PREFIX=(ov)@+", "CHANMODES=beI,k,l,imnpst",
+                         "are supported by this server")
+        self.server_line("join", CHANNEL, source=users.Bot.rawnick)
+        channels.Main = channels.get(CHANNEL)
+
+    def server_line(self, command: str, *args: str, source: str = SERVER):
+        """Handle a line as if the server sent it.
+
+        :param command: Command name, as used by the hooks
+        :param source: Prefix of the line
+        """
+        handler.unhandled(self.client, source, command, *args, tags={})
+
+    def player(self, nick: str) -> users.User:
+        """Get a fake player by nick, joining them to the channel first if needed.
+
+        :param nick: Numeric nick of the player
+        :returns: The player
+        """
+        user = users.get(nick, allow_none=True)
+        if user is None or channels.Main not in user.channels:
+            self.server_line("join", CHANNEL, source="{0}!sim@headless".format(nick))
+            user = users.get(nick)
+        return user
+
+    def dispatch(self, user: users.User, key: str, message: str = "", public: bool = True):
+        """Run a command as if the user sent it.
+
+        :param user: User sending the command
+        :param key: Command name
+        :param message: Command arguments
+        :param public: Whether the command is sent to the channel instead of in private
+        """
+        target = channels.Main if public else users.Bot
+        handler.parse_and_dispatch(MessageDispatcher(user, target), key, message)
+        db._worker.run_pending()
+
+    def advance(self, until: Optional[float] = None) -> bool:
+        """Move the virtual clock forward and run everything that's due.
+
+        :param until: Time to move the clock to, running timers in deadline order on the way;
+            by default the clock moves to the next pending timer
+        :returns: False if there were no timers to run
+        """
+        if until is not None:
+            ran = False
+            while (pending := self.scheduler.pending()) and pending[0].deadline <= until:
+                ran = self.advance() or ran
+            self.now = max(self.now, until)
+            return ran
+        pending = self.scheduler.pending()
+        if not pending:
+            return False
+        self.now = max(self.now, pending[0].deadline)
+        self.scheduler.run_pending()
+        db._worker.run_pending()
+        return True
+
+    def play(self, mode: str, num_players: int, actor: Actor, *,
+             timings: Optional[defaultdict[str, list[float]]] = None, max_steps: int = 1000) -> bool:
+        """Play one game to completion.
+
+        :param mode: Game mode to play
+        :param num_players: Number of players
+        :param actor: Decides what each player does whenever they can act
+        :param timings: If given, seconds spent handling each phase are appended under the phase name
+        :param max_steps: Give up on the game after this many rounds of actions
+        :returns: True if the game finished on its own
+        """
+        players = [self.player(str(i)) for i in range(1, num_players + 1)]
+        for player in players:
+            self.dispatch(player, "join")
+        if not set_gamemode(channels.Main.game_state, mode):
+            reset(channels.Main.game_state)
+            return False
+
+        start = time.perf_counter()
+        pregame.start(MessageDispatcher(players[0], channels.Main), forced=True)
+        elapsed = time.perf_counter() - start
+        if timings is not None:
+            timings["start"].append(elapsed)
+
+        var = channels.Main.game_state
+        if var is None or not var.in_game:
+            # the mode couldn't set up a game with this many players
+            return False
+        phase = var.current_phase
+        steps = 0
+        while channels.Main.game_state is var and var.in_game:
+            steps += 1
+            if steps > max_steps:
+                stop_game(var, abort=True, log=False)
+                return False
+            start = time.perf_counter()
+            for player in list(get_participants(var)):
+                if channels.Main.game_state is not var or var.current_phase != phase:
+                    break
+                action = actor(self, var, player)
+                if action is not None:
+                    key, message, public = action
+                    self.dispatch(player, key, message, public)
+            if channels.Main.game_state is var and var.current_phase == phase:
+                # nobody left to act; let the phase time out
+                if not self.advance():
+                    stop_game(var, abort=True, log=False)
+                    return False
+            elapsed += time.perf_counter() - start
+            if channels.Main.game_state is not var or var.current_phase != phase:
+                if timings is not None:
+                    timings[phase].append(elapsed)
+                phase = var.current_phase
+                elapsed = 0.0
+        return True
+
+def _percentiles(samples: list[float]) -> tuple[float, float, float]:
+    if len(samples) < 2:
+        value = samples[0] if samples else 0.0
+        return value, value, value
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return statistics.median(samples), cuts[89], cuts[98]
+
+def main():
+    parser = argparse.ArgumentParser(description="Play headless games and report their throughput.")
+    parser.add_argument("-n", "--games", type=int, default=3, help="Number of games to play per mode.")
+    parser.add_argument("-m", "--mode", action="append",
+                        help="Mode to play, with arguments if it takes any (e.g. roles=wolf:2,seer:1); may be repeated. "
+                             "Defaults to every mode which doesn't need arguments.")
+    parser.add_argument("-p", "--players", type=int, help="Number of players; defaults to the closest size to 12 each mode allows.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the game RNG and the simulated players.")
+    parser.add_argument("--activity", type=float, default=0.9, help="Chance that a player acts whenever they can.")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="Measure peak memory with tracemalloc. This slows down the games considerably.")
+    parser.add_argument("--journal", metavar="DIRECTORY",
+                        help="Record a journal of every game in this directory, for use with benchmarks.replay.")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Print every error raised during the games.")
+    args = parser.parse_args()
+
+    if "PYTHONHASHSEED" not in os.environ:
+        # the game code iterates over sets of players, whose order depends on string hashing;
+        # pin it so that the same --seed always plays out the same games
+        os.environ["PYTHONHASHSEED"] = "0"
+        os.execv(sys.executable, [sys.executable, "-m", "benchmarks.simulate", *sys.argv[1:]])
+
+    bot = HeadlessBot(args.seed)
+    if args.journal:
+        config.Main.set("debug.journal.enabled", True)
+        config.Main.set("debug.journal.directory", os.path.abspath(args.journal))
+    actor = RandomActor(bot.rng, args.activity)
+    # the roles mode can't be played without being given a list of roles
+    modes = args.mode or sorted(GAME_MODES.keys() - {"roles"})
+    if args.trace_memory:
+        tracemalloc.start()
+
+    timings: defaultdict[str, list[float]] = defaultdict(list)
+    print("{0:<12} {1:>7} {2:>8} {3:>10} {4:>7}".format("mode", "players", "games", "games/s", "errors"))
+    total_games = 0
+    total_time = 0.0
+    for mode in modes:
+        _, minp, maxp = GAME_MODES[mode.split("=", 1)[0].strip()]
+        num_players = args.players or 12
+        num_players = max(minp, config.Main.get("gameplay.player_limits.minimum"),
+                          min(num_players, maxp, config.Main.get("gameplay.player_limits.maximum")))
+        errors = len(bot.errors.records)
+        finished = 0
+        start = time.perf_counter()
+        for _ in range(args.games):
+            finished += bot.play(mode, num_players, actor, timings=timings)
+        elapsed = time.perf_counter() - start
+        total_games += finished
+        total_time += elapsed
+        print("{0:<12} {1:>7} {2:>8} {3:>10.2f} {4:>7}".format(
+            mode, num_players, "{0}/{1}".format(finished, args.games), finished / elapsed if elapsed else 0.0,
+            len(bot.errors.records) - errors))
+
+    print()
+    print("{0:<12} {1:>8} {2:>10} {3:>10} {4:>10}".format("phase", "samples", "p50 (ms)", "p90 (ms)", "p99 (ms)"))
+    for phase, samples in sorted(timings.items()):
+        p50, p90, p99 = _percentiles(samples)
+        print("{0:<12} {1:>8} {2:>10.3f} {3:>10.3f} {4:>10.3f}".format(phase, len(samples), p50 * 1e3, p90 * 1e3, p99 * 1e3))
+
+    print()
+    print("{0} games in {1:.2f}s ({2:.2f} games/s), {3} lines sent, {4} errors".format(
+        total_games, total_time, total_games / total_time if total_time else 0.0, bot.client.lines, len(bot.errors.records)))
+    if args.trace_memory:
+        print("peak traced memory: {0:.1f} MiB".format(tracemalloc.get_traced_memory()[1] / 2**20))
+    elif resource is not None:
+        # ru_maxrss is in KiB on Linux but in bytes on macOS
+        scale = 2**20 if os.uname().sysname == "Darwin" else 2**10
+        print("peak resident memory: {0:.1f} MiB".format(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale))
+
+    if args.verbose:
+        for record in bot.errors.records:
+            print()
+            print(logging.Formatter().format(record))
+
+if __name__ == "__main__":
+    main()
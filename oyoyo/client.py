@@ -15,6 +15,8 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 
+import collections
+import selectors
 import socket
 import ssl
 import sys
@@ -25,7 +27,132 @@ import os
 import hashlib
 import hmac
 
-from oyoyo.parse import parse_raw_irc_command
+from oyoyo.parse import parse_irc_line
+
+# Priority classes for queued messages, most urgent first. Protocol traffic (PONG, JOIN, MODE, ...)
+# is sent with PRIORITY_URGENT unless the caller says otherwise.
+PRIORITY_URGENT = 0
+PRIORITY_CHANNEL = 1
+PRIORITY_PRIVATE = 2
+PRIORITY_ADMIN = 3
+PRIORITY_WHO = 4
+PRIORITY_NAMES = ("urgent", "channel", "private", "admin", "who")
+
+class _QueuedLine:
+    __slots__ = ("line", "command", "targets", "text", "max_targets", "join", "enqueued")
+
+    def __init__(self, line, max_targets, join):
+        self.line = line
+        self.command = self.text = None
+        self.targets = []
+        self.max_targets = max_targets
+        self.join = join
+        self.enqueued = time.monotonic()
+        parts = line.split(b" ", 2)
+        if len(parts) == 3 and parts[0] in (b"PRIVMSG", b"NOTICE") and parts[2].startswith(b":"):
+            self.command = parts[0]
+            self.targets = parts[1].split(b",")
+            self.text = parts[2][1:]
+            # CTCP messages (such as ACTION) are delimited by \x01 and must be sent on their own
+            if self.text.startswith(b"\x01") or self.text.endswith(b"\x01"):
+                self.join = False
+
+    def build(self):
+        return self.command + b" " + b",".join(self.targets) + b" :" + self.text
+
+class SendQueue:
+    """Outbound lines waiting on the token bucket, ordered by priority class.
+
+    Lines within a priority class are sent in the order they were queued. A PRIVMSG or NOTICE
+    may be merged into the line queued just before it in the same class: identical text to a
+    different target is sent as a single multi-target line (up to max_targets), and text to the
+    same target is joined with a space if both lines allow it and neither is a CTCP message.
+    Merged lines never exceed the max_length given when the later line was queued.
+    """
+    def __init__(self):
+        self._queues = [collections.deque() for _ in PRIORITY_NAMES]
+        self._sent = [0] * len(PRIORITY_NAMES)
+        self._total_wait = [0.0] * len(PRIORITY_NAMES)
+        self._max_wait = [0.0] * len(PRIORITY_NAMES)
+        self.coalesced = 0
+
+    def __len__(self):
+        return sum(len(q) for q in self._queues)
+
+    def __bool__(self):
+        return any(self._queues)
+
+    def push(self, line, priority=PRIORITY_URGENT, *, max_length=510, max_targets=1, join=False):
+        """Queue a line (without the trailing CRLF).
+
+        :param line: Raw line to send
+        :param priority: One of the PRIORITY_* constants
+        :param max_length: Maximum length of a merged line
+        :param max_targets: Maximum number of targets this line may be sent to at once
+        :param join: Whether this line may be joined with other lines to the same target
+        """
+        queue = self._queues[priority]
+        entry = _QueuedLine(line, max_targets, join)
+        if queue and entry.command is not None and self._merge(queue[-1], entry, max_length):
+            self.coalesced += 1
+            return
+        queue.append(entry)
+
+    def _merge(self, last, entry, max_length):
+        if last.command != entry.command:
+            return False
+        if last.targets == entry.targets:
+            if not (last.join and entry.join):
+                return False
+            # the text is joined with a single space
+            if len(last.line) + 1 + len(entry.text) > max_length:
+                return False
+            last.text += b" " + entry.text
+        elif last.text == entry.text and len(entry.targets) == 1 and entry.targets[0] not in last.targets:
+            if len(last.targets) >= min(last.max_targets, entry.max_targets):
+                return False
+            if len(last.line) + 1 + len(entry.targets[0]) > max_length:
+                return False
+            last.targets.append(entry.targets[0])
+            # further text merges would send the joined text to every target
+            last.join = False
+        else:
+            return False
+        last.line = last.build()
+        return True
+
+    def pop(self):
+        """Remove and return the most urgent line, or None if the queue is empty."""
+        for priority, queue in enumerate(self._queues):
+            if queue:
+                entry = queue.popleft()
+                wait = time.monotonic() - entry.enqueued
+                self._sent[priority] += 1
+                self._total_wait[priority] += wait
+                self._max_wait[priority] = max(self._max_wait[priority], wait)
+                return entry.line
+        return None
+
+    def clear(self):
+        for queue in self._queues:
+            queue.clear()
+
+    def stats(self):
+        """Return queue depth and wait time metrics for each priority class.
+
+        :returns: A dict of priority name to a dict with the keys depth (lines currently queued),
+            sent (lines sent so far), average_wait and max_wait (in seconds)
+        """
+        stats = {}
+        for priority, name in enumerate(PRIORITY_NAMES):
+            sent = self._sent[priority]
+            stats[name] = {
+                "depth": len(self._queues[priority]),
+                "sent": sent,
+                "average_wait": self._total_wait[priority] / sent if sent else 0.0,
+                "max_wait": self._max_wait[priority],
+            }
+        return stats
 
 
 # Adapted from http://code.activestate.com/recipes/511490-implementation-of-the-token-bucket-algorithm/
@@ -46,6 +173,11 @@ class TokenBucket(object):
         self.fill_rate = float(fill_rate)
         self.timestamp = time.time()
 
+    def delay(self, tokens):
+        """Return the number of seconds until the given number of tokens
+        will be available, or 0 if they are available now."""
+        return max(0.0, (tokens - self.tokens) * self.fill_rate)
+
     def consume(self, tokens):
         """Consume tokens from the bucket. Returns True if there were
         sufficient tokens otherwise False."""
@@ -88,6 +220,12 @@ class IRCClient:
         Warning: By default this class will not block on socket operations, this
         means if you use a plain while loop your app will consume 100% cpu.
         To enable blocking pass blocking=True.
+
+        Pass use_selector=True to run the connection from a non-blocking event loop
+        instead. In that mode, send() never blocks: messages are placed on a write
+        queue which the event loop drains as the token bucket allows, most urgent
+        priority class first (see SendQueue). Pass coalesce=False to disable joining
+        queued lines to the same target.
         """
 
         self.socket = None
@@ -111,13 +249,21 @@ class IRCClient:
         self.cipher_list = None
         self.server_pass = None
         self.lock = threading.RLock()
-        self.stream_handler = lambda output, level=None: print(output)
+        self.stream_handler = lambda output, *args, level=None: print(output.format(*args) if args else output)
+        # debug output for every line sent and received is skipped entirely if this returns False
+        self.debug_enabled = lambda: True
+        self.use_selector = False
+        self.coalesce = True
 
         self.tokenbucket = TokenBucket(23, 1.73)
 
         self.__dict__.update(kwargs)
         self.command_handler = cmd_handler
         self._end = 0
+        # used when use_selector is True; lines waiting on the token bucket and a socket pair to wake the event loop
+        self.send_queue = SendQueue()
+        self._wake_r = None
+        self._wake_w = None
 
     def __enter__(self):
         return self
@@ -138,6 +284,9 @@ class IRCClient:
         In python 3, all args must be of type str or bytes, *BUT* if they are
           str they will be converted to bytes with the encoding specified by the
           'encoding' keyword argument (default 'utf8').
+
+        When use_selector is True, the 'priority', 'max_targets' and 'join' keyword
+        arguments are passed to SendQueue.push(). They are ignored otherwise.
         """
         with self.lock:
             # Convert all args to bytes if not already
@@ -156,13 +305,32 @@ class IRCClient:
                                                                    for arg in args]), i))
 
             msg = bytes(" ", "utf_8").join(bargs)
-            logmsg = kwargs.get("log") or str(msg)[1:]
-            self.stream_handler('---> send {0}'.format(logmsg), level="debug")
+            if self.debug_enabled():
+                self.stream_handler("---> send {0}", kwargs.get("log") or str(msg)[1:], level="debug")
+
+            if self.use_selector:
+                # the server prefixes relayed lines with ":nick!ident@host " and terminates them with CRLF
+                max_length = 508 - len(bytes("{0}!{1}@{2}".format(self.nickname, self.ident, self.hostmask), encoding))
+                self.send_queue.push(msg, kwargs.get("priority", PRIORITY_URGENT),
+                                     max_length=max_length,
+                                     max_targets=kwargs.get("max_targets", 1),
+                                     join=self.coalesce and kwargs.get("join", False))
+                self._wake()
+                return
 
             while not self.tokenbucket.consume(1):
                 time.sleep(0.3)
             self.socket.send(msg + bytes("\r\n", "utf_8"))
 
+    def _wake(self):
+        """Wake up the event loop so that it notices newly queued messages."""
+        if self._wake_w is None:
+            return # event loop hasn't started yet; it will check the queue once it does
+        try:
+            self._wake_w.send(b"\0")
+        except (BlockingIOError, InterruptedError):
+            pass # the loop already has a pending wakeup
+
     def connect(self):
         """ initiates the connection to the server set in self.host:self.port
         and returns a generator object.
@@ -255,7 +423,7 @@ class IRCClient:
 
                 self.stream_handler("Connected with cipher {0}".format(self.socket.cipher()[0]), level="info")
 
-            if not self.blocking:
+            if not self.blocking or self.use_selector:
                 self.socket.setblocking(0)
 
             self.send("CAP LS 302")
@@ -281,10 +449,14 @@ class IRCClient:
                     sys.stderr.write(traceback.format_exc())
                     raise e
 
-            buffer = bytes()
+            if self.use_selector:
+                yield from self._selector_loop()
+                return
+
+            buffer = bytearray()
             while not self._end:
                 try:
-                    buffer += self.socket.recv(1024)
+                    data = self.socket.recv(1024)
                 except socket.error as e:
                     if False and not self.blocking and e.errno == 11:
                         pass
@@ -292,41 +464,121 @@ class IRCClient:
                         sys.stderr.write(traceback.format_exc())
                         raise e
                 else:
-                    data = buffer.split(bytes("\n", "utf_8"))
-                    buffer = data.pop()
-
-                    for el in data:
-                        tags, prefix, command, args = parse_raw_irc_command(el)
-
-                        try:
-                            enc = "utf8"
-                            fargs = [arg.decode(enc) for arg in args if isinstance(arg,bytes)]
-                        except UnicodeDecodeError:
-                            enc = "latin1"
-                            fargs = [arg.decode(enc) for arg in args if isinstance(arg,bytes)]
-
-                        try:
-                            if prefix is not None:
-                                prefix = prefix.decode(enc)
-                            self.stream_handler("<--- receive {0} {1} ({2})".format(prefix, command, ", ".join(fargs)), level="debug")
-                            if tags:
-                                # TODO: this sucks for two reasons: 1) value is unescaped and may contain semicolons/newlines,
-                                # 2) we're doing str.format unconditionally here (and above) when it should be passed the logging layer as args
-                                # so that we don't waste CPU cycles doing string formatting when the message is never going to be displayed
-                                self.stream_handler("     @{0}".format(";".join("{0}={1}".format(k, v) if v else k for k, v in tags.items())), level="debug")
-                            if command in self.command_handler:
-                                self.command_handler[command](self, prefix, *fargs, tags=tags)
-                            elif "" in self.command_handler:
-                                self.command_handler[""](self, prefix, command, *fargs, tags=tags)
-                        except Exception as e:
-                            sys.stderr.write(traceback.format_exc())
-                            raise e  # ?
+                    buffer += data
+                    self._process_buffer(buffer)
                 yield True
         finally:
             if self.socket:
                 self.stream_handler('closing socket')
                 self.socket.close()
                 yield False
+
+    def _process_buffer(self, buffer):
+        """Handle every complete line in buffer, removing them from it.
+
+        buffer must be a bytearray; any trailing partial line is left in place.
+        """
+        start = 0
+        # lines are parsed straight out of the buffer without copying them first
+        with memoryview(buffer) as view:
+            while True:
+                end = buffer.find(b"\n", start)
+                if end == -1:
+                    break
+                if end - start > 1: # skip empty lines
+                    self._handle_line(view[start:end])
+                start = end + 1
+        del buffer[:start]
+
+    def _handle_line(self, line):
+        tags, prefix, command, args = parse_irc_line(line)
+        if not command:
+            return
+
+        try:
+            if self.debug_enabled():
+                self.stream_handler("<--- receive {0} {1} ({2})", prefix, command, ", ".join(args), level="debug")
+                if tags:
+                    # str(tags) gives the tags as they were received, without unescaping any values
+                    self.stream_handler("     @{0}", tags, level="debug")
+            if command in self.command_handler:
+                self.command_handler[command](self, prefix, *args, tags=tags)
+            elif "" in self.command_handler:
+                self.command_handler[""](self, prefix, command, *args, tags=tags)
+        except Exception as e:
+            sys.stderr.write(traceback.format_exc())
+            raise e  # ?
+
+    def _selector_loop(self):
+        """Non-blocking event loop used when use_selector is True.
+
+        Reads are processed as soon as they arrive, and queued writes are sent as the
+        token bucket allows. Yields True after each iteration, like connect().
+        """
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+        selector = selectors.DefaultSelector()
+        selector.register(self.socket, selectors.EVENT_READ)
+        selector.register(self._wake_r, selectors.EVENT_READ)
+        events = selectors.EVENT_READ
+        inbuf = bytearray()
+        # bytes which have been taken off the queue (and paid for in tokens) but not yet written
+        outbuf = bytearray()
+
+        try:
+            while not self._end:
+                timeout = None
+                # send() may be merging new lines into queued ones from another thread
+                with self.lock:
+                    while self.send_queue:
+                        delay = self.tokenbucket.delay(1)
+                        if delay > 0:
+                            timeout = delay
+                            break
+                        self.tokenbucket.consume(1)
+                        outbuf += self.send_queue.pop() + b"\r\n"
+
+                if outbuf:
+                    try:
+                        sent = self.socket.send(outbuf)
+                    except (BlockingIOError, InterruptedError, ssl.SSLWantReadError, ssl.SSLWantWriteError):
+                        sent = 0
+                    del outbuf[:sent]
+
+                want = selectors.EVENT_READ | selectors.EVENT_WRITE if outbuf else selectors.EVENT_READ
+                if want != events:
+                    selector.modify(self.socket, want)
+                    events = want
+
+                for key, mask in selector.select(timeout):
+                    if key.fileobj is self._wake_r:
+                        try:
+                            while self._wake_r.recv(4096):
+                                pass
+                        except (BlockingIOError, InterruptedError):
+                            pass
+                    elif mask & selectors.EVENT_READ:
+                        # drain everything that is available; TLS sockets may have data buffered
+                        # internally which would not otherwise cause the selector to fire
+                        while True:
+                            try:
+                                data = self.socket.recv(65536)
+                            except (BlockingIOError, InterruptedError, ssl.SSLWantReadError, ssl.SSLWantWriteError):
+                                break
+                            if not data:
+                                self.stream_handler("Connection closed by remote host", level="warning")
+                                self._end = 1
+                                break
+                            inbuf += data
+                        self._process_buffer(inbuf)
+                yield True
+        finally:
+            selector.close()
+            self._wake_r.close()
+            self._wake_w.close()
+            self._wake_r = self._wake_w = None
+
     def msg(self, user, msg):
         for line in msg.split('\n'):
             maxchars = 494 - len(self.nickname+self.ident+self.hostmask+user)
@@ -15,14 +15,137 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 
+import re
+from collections.abc import Mapping
+
 from oyoyo.ircevents import numeric_events
 
+_numeric_events = {k.decode("ascii"): v for k, v in numeric_events.items()}
+
+_tag_escapes = {":": ";", "s": " ", "\\": "\\", "r": "\r", "n": "\n"}
+# any other escaped character stands for itself, and a trailing backslash is dropped
+_tag_escape_re = re.compile(r"\\(.?)", re.S)
+
+def _unescape_tag(value):
+    if "\\" not in value:
+        return value
+    return _tag_escape_re.sub(lambda m: _tag_escapes.get(m.group(1), m.group(1)), value)
+
+class Tags(Mapping):
+    """ IRCv3 message tags.
+
+    The tags are split up when the line is parsed, but each value is only unescaped
+    the first time it is read. Tags without a value (or with an empty value) map to None.
+    """
+    __slots__ = ("_raw", "_values")
+
+    def __init__(self, raw=""):
+        self._raw = {}
+        self._values = {}
+        if raw:
+            for tag in raw.split(";"):
+                key, _, value = tag.partition("=")
+                self._raw[key] = value
+
+    def __getitem__(self, key):
+        try:
+            return self._values[key]
+        except KeyError:
+            pass
+        value = self._raw[key]
+        value = _unescape_tag(value) if value else None
+        self._values[key] = value
+        return value
+
+    def __iter__(self):
+        return iter(self._raw)
+
+    def __len__(self):
+        return len(self._raw)
+
+    def __str__(self):
+        return ";".join("{0}={1}".format(k, v) if v else k for k, v in self._raw.items())
+
+    def __repr__(self):
+        return "Tags({0!r})".format(dict(self))
+
+# Tags are never modified after parsing, so lines without any can share a single instance
+_no_tags = Tags()
+
+# same characters as bytes.strip(); str.strip() would also remove non-ASCII whitespace
+_whitespace = " \t\n\r\x0b\x0c"
+
+def _split_line(line):
+    """ Split a decoded line into (raw tags, prefix, command, args) using str.find offsets. """
+    line = line.strip(_whitespace)
+    length = len(line)
+    pos = 0
+    raw_tags = None
+    prefix = None
+
+    if line.startswith("@"):
+        end = line.find(" ")
+        if end == -1:
+            end = length
+        raw_tags = line[1:end]
+        pos = end + 1
+
+    if line.startswith(":", pos):
+        end = line.find(" ", pos)
+        if end == -1:
+            end = length
+        prefix = line[pos + 1:end]
+        pos = end + 1
+
+    end = line.find(" ", pos)
+    if end == -1:
+        end = length
+    command = line[pos:end]
+    pos = end + 1
+
+    args = []
+    while pos < length:
+        if line.startswith(":", pos):
+            args.append(line[pos + 1:])
+            break
+        end = line.find(" ", pos)
+        if end == -1:
+            args.append(line[pos:])
+            break
+        args.append(line[pos:end])
+        pos = end + 1
+
+    return raw_tags, prefix, command, args
+
+def _command_name(command):
+    if command.isdigit():
+        command = _numeric_events.get(command, command)
+    return command.lower()
+
+def parse_irc_line(line):
+    """ Parse a raw line received from the server.
+
+    The line (bytes or any other buffer, such as a memoryview) is decoded once, as UTF-8
+    with a fallback to latin-1, and then split in a single pass.
+
+    :param line: Raw line, with or without the trailing CRLF
+    :returns: A tuple of (tags, prefix, command, args). tags is a Tags mapping, prefix
+        is None if the line did not have one, and every other value is a str.
+    """
+    try:
+        text = str(line, "utf_8")
+    except UnicodeDecodeError:
+        text = str(line, "latin1")
+
+    raw_tags, prefix, command, args = _split_line(text)
+    tags = Tags(raw_tags) if raw_tags else _no_tags
+    return tags, prefix, _command_name(command), args
 
-# avoiding regex
 def parse_raw_irc_command(element):
     """
     This function parses a raw irc command and returns a tuple
-    of (prefix, command, args).
+    of (tags, prefix, command, args). prefix and args are left as bytes;
+    use parse_irc_line() to get everything decoded.
     The following is a psuedo BNF of the input text:
 
     <message>  ::= [ '@' <tags> <SPACE> ] [ ':' <prefix> <SPACE> ] <command> <params> <crlf>
@@ -46,72 +169,12 @@ def parse_raw_irc_command(element):
 
     <crlf>     ::= CR LF
     """
-    parts = element.strip().split(bytes(" ", "utf_8"))
-    off = 0
-    tags = {}
-    if parts[0].startswith(bytes('@', "utf_8")):
-        off = 1
-        tags_str = parts[0][1:].split(bytes(';', "utf_8"))
-        for tag in tags_str:
-            tag_parts = tag.split(bytes('=', "utf_8"), maxsplit=1)
-            if len(tag_parts) == 2 and len(tag_parts[1]) > 0:
-                v = []
-                esc = False
-                for c in tag_parts[1].decode("utf-8"):
-                    match (esc, c):
-                        case (True, ':'):
-                            v.append(';')
-                            esc = False
-                        case (True, 's'):
-                            v.append(' ')
-                            esc = False
-                        case (True, '\\'):
-                            v.append('\\')
-                            esc = False
-                        case (True, 'r'):
-                            v.append('\r')
-                            esc = False
-                        case (True, 'n'):
-                            v.append('\n')
-                            esc = False
-                        case (True, _):
-                            v.append(c)
-                            esc = False
-                        case (False, '\\'):
-                            esc = True
-                        case (False, _):
-                            v.append(c)
-                tags[tag_parts[0].decode("utf-8")] = "".join(v)
-            else:
-                tags[tag_parts[0].decode("utf-8")] = None
-
-    if parts[off].startswith(bytes(':', 'utf_8')):
-        prefix = parts[off][1:]
-        command = parts[off+1]
-        args = parts[off+2:]
-    else:
-        prefix = None
-        command = parts[off]
-        args = parts[off+1:]
-
-    if command.isdigit():
-        try:
-            command = numeric_events[command]
-        except KeyError:
-            pass
-    command = command.lower()
-    if isinstance(command, bytes):
-        command = command.decode("utf_8")
-
-    if args[0].startswith(bytes(':', 'utf_8')):
-        args = [bytes(" ", "utf_8").join(args)[1:]]
-    else:
-        for idx, arg in enumerate(args):
-            if arg.startswith(bytes(':', 'utf_8')):
-                args = args[:idx] + [bytes(" ", 'utf_8').join(args[idx:])[1:]]
-                break
-
-    return tags, prefix, command, args
+    # latin-1 maps every byte to exactly one character, so the parts can be converted back losslessly
+    raw_tags, prefix, command, args = _split_line(str(element, "latin1"))
+    tags = Tags(raw_tags.encode("latin1").decode("utf-8")) if raw_tags else _no_tags
+    if prefix is not None:
+        prefix = prefix.encode("latin1")
+    return tags, prefix, _command_name(command), [arg.encode("latin1") for arg in args]
 
 
 def parse_nick(name):
@@ -59,6 +59,23 @@ FROZEN = False
 ROLES: dict[str, Collection[str]] = {}
 TEAMS: set[Category] = set()
 
+# Once categories are frozen, every role is assigned a bit and each category stores its roles as a mask of those bits
+_ROLE_BITS: dict[str, int] = {}
+_BIT_ROLES: list[str] = []
+
+# Categories derived with set operators, keyed by operator and operands (by identity for categories, by value for sets).
+# Each entry also holds on to its operands so that the ids used as keys can't be reused while the entry exists.
+_COMBINATIONS: dict[tuple[str, object, object], tuple[object, object, Category]] = {}
+_MAX_COMBINATIONS = 4096
+
+_MASK_OPS = {
+    "+": int.__or__,
+    "|": int.__or__,
+    "&": int.__and__,
+    "^": int.__xor__,
+    "-": lambda a, b: a & ~b,
+}
+
 def get(cat: str) -> Category:
     if not FROZEN:
         raise RuntimeError("Fatal: Role categories are not ready")
@@ -151,6 +168,10 @@ def _register_roles(evt: Event):
             ROLE_CATS[cat].roles.add(role)
         All.roles.add(role)
 
+    _BIT_ROLES[:] = sorted(ROLES)
+    _ROLE_BITS.clear()
+    _ROLE_BITS.update((role, 1 << i) for i, role in enumerate(_BIT_ROLES))
+    _COMBINATIONS.clear()
     for cat in ROLE_CATS.values():
         cat.freeze()
     FROZEN = True
@@ -160,8 +181,24 @@ def _register_roles(evt: Event):
 
 EventListener(_register_roles, priority=1).install("init")
 
+def _mask_of(roles) -> int:
+    if isinstance(roles, Category):
+        return roles._mask
+    mask = 0
+    for role in roles:
+        try:
+            mask |= _ROLE_BITS[role]
+        except (KeyError, TypeError):
+            raise ValueError("{0!r} is not a role".format(role)) from None
+    return mask
+
 class Category:
-    """Base class for role categories."""
+    """Base class for role categories.
+
+    Once categories are frozen, the roles of a category are stored as a bitmask over every role,
+    so that membership tests and set operators are integer operations. Categories built with the
+    set operators are cached, so repeating an expression such as Wolf & Killer is a dict lookup.
+    """
 
     def __init__(self, name, *, alias=None):
         if not FROZEN:
@@ -170,20 +207,23 @@ class Category:
                 ROLE_CATS[alias] = self
         self.name = name
         self._roles = set()
+        self._mask = 0
+        self._members: tuple[str, ...] = ()
 
     def __len__(self):
         if not FROZEN:
             raise RuntimeError("Fatal: Role categories are not ready")
-        return len(self._roles)
+        return len(self._members)
 
     def __iter__(self):
         if not FROZEN:
             raise RuntimeError("Fatal: Role categories are not ready")
-        yield from self._roles
+        return iter(self._members)
 
     def __contains__(self, item):
         if not FROZEN:
             raise RuntimeError("Fatal: Role categories are not ready")
+        # a frozenset lookup is cheaper than looking up the role's bit and masking it
         return item in self._roles
 
     @property
@@ -197,13 +237,19 @@ class Category:
         self._roles = value
 
     def freeze(self):
-        self._roles = frozenset(self._roles)
+        self._set_mask(_mask_of(self._roles))
+
+    def _set_mask(self, mask: int):
+        self._mask = mask
+        # roles are listed in bit order, so iteration order doesn't depend on string hashing
+        self._members = tuple(role for i, role in enumerate(_BIT_ROLES) if mask >> i & 1)
+        self._roles = frozenset(self._members)
 
     def __eq__(self, other):
         if not FROZEN:
             raise RuntimeError("Fatal: Role categories are not ready")
         if isinstance(other, Category):
-            return self._roles == other._roles
+            return self._mask == other._mask
         if isinstance(other, (set, frozenset)):
             return self._roles == other
         if isinstance(other, str):
@@ -223,37 +269,54 @@ class Category:
         return "Role category: {0}".format(self.name)
 
     def __invert__(self):
-        new = self.from_combination(All, self, "", set.difference_update)
+        if not FROZEN:
+            raise RuntimeError("Fatal: Role categories are not ready")
+        key = ("~", id(self), None)
+        cached = _COMBINATIONS.get(key)
+        if cached is not None:
+            return cached[2]
         if self.name in ROLE_CATS:
             name = "~{0}".format(self.name)
         else:
             name = "~({0})".format(self.name)
-        new.name = name
+        new = type(self)(name)
+        new._set_mask(All._mask & ~self._mask)
+        _cache_combination(key, self, None, new)
         return new
 
     @classmethod
-    def from_combination(cls, first, second, op, func):
+    def from_combination(cls, first, second, op):
         if not FROZEN:
             raise RuntimeError("Fatal: Role categories are not ready")
-        if isinstance(second, (Category, set, frozenset, _dict_keys)):
-            for cont in (first, second):
-                for role in cont:
-                    if role not in ROLES:
-                        raise ValueError("{0!r} is not a role".format(role))
-            name = "{0} {1} {2}".format(first, op, second)
-            self = cls(name)
-            self._roles.update(first)
-            func(self._roles, second)
-            self._roles = frozenset(self._roles)
-            return self
-        return NotImplemented
-
-    __add__ = __radd__  = lambda self, other: self.from_combination(self, other, "+", set.update)
-    __or__  = __ror__   = lambda self, other: self.from_combination(self, other, "|", set.update)
-    __and__ = __rand__  = lambda self, other: self.from_combination(self, other, "&", set.intersection_update)
-    __xor__ = __rxor__  = lambda self, other: self.from_combination(self, other, "^", set.symmetric_difference_update)
-    __sub__             = lambda self, other: self.from_combination(self, other, "-", set.difference_update)
-    __rsub__            = lambda self, other: self.from_combination(other, self, "-", set.difference_update)
+        if not isinstance(second, (Category, set, frozenset, _dict_keys)):
+            return NotImplemented
+        key = (op, _operand_key(first), _operand_key(second))
+        cached = _COMBINATIONS.get(key)
+        if cached is not None:
+            return cached[2]
+        mask = _MASK_OPS[op](_mask_of(first), _mask_of(second))
+        self = cls("{0} {1} {2}".format(first, op, second))
+        self._set_mask(mask)
+        _cache_combination(key, first, second, self)
+        return self
+
+    __add__ = __radd__  = lambda self, other: self.from_combination(self, other, "+")
+    __or__  = __ror__   = lambda self, other: self.from_combination(self, other, "|")
+    __and__ = __rand__  = lambda self, other: self.from_combination(self, other, "&")
+    __xor__ = __rxor__  = lambda self, other: self.from_combination(self, other, "^")
+    __sub__             = lambda self, other: self.from_combination(self, other, "-")
+    __rsub__            = lambda self, other: self.from_combination(other, self, "-")
+
+def _operand_key(operand) -> object:
+    if isinstance(operand, Category):
+        return id(operand)
+    return frozenset(operand)
+
+def _cache_combination(key: tuple[str, object, object], first, second, result: Category):
+    if len(_COMBINATIONS) >= _MAX_COMBINATIONS:
+        # expressions over ad-hoc sets of roles could otherwise grow this without bound
+        _COMBINATIONS.clear()
+    _COMBINATIONS[key] = (first, second, result)
 
 # For proper auto-completion support in IDEs, please do not try to "save space" by turning this into a loop
 # and dynamically creating globals.
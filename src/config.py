@@ -1,9 +1,11 @@
 from __future__ import annotations
 
 import copy
+import functools
 from pathlib import Path
 import os
 import sys
+from types import MappingProxyType
 from typing import Optional, Any
 from ruamel.yaml import YAML
 
@@ -22,6 +24,38 @@ Empty = EmptyType()
 class InvalidConfigValue(ValueError):
     pass
 
+# Types which can be handed out from Config.get without copying
+IMMUTABLE_TYPES = (str, int, float, bool, type(None), tuple, frozenset, MappingProxyType, EmptyType)
+
+@functools.lru_cache(maxsize=1024)
+def compile_key(key: str) -> tuple[tuple[str, Optional[int]], ...]:
+    """Split a configuration key into its (key, index) parts.
+
+    Key paths don't depend on the loaded configuration, so compiled paths are shared between Config instances.
+
+    :param key: Configuration key, e.g. foo.bar[0].baz
+    :returns: A tuple of (key part, list index or None) pairs, e.g. (("foo", None), ("bar", 0), ("baz", None))
+    """
+    parts = []
+    for part in key.split("."):
+        if "[" in part:
+            key_part, idx_part_str = part.split("[", maxsplit=1)
+            parts.append((key_part, int(idx_part_str[:-1])))  # strip trailing "]"
+        else:
+            parts.append((part, None))
+    return tuple(parts)
+
+def freeze(value):
+    """Return a read-only view of a configuration value.
+
+    Lists are turned into tuples and dicts into mapping proxies, recursively.
+    """
+    if isinstance(value, dict):
+        return MappingProxyType({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(v) for v in value)
+    return value
+
 def init():
     bp = Path(__file__).parent
     Main.load_metadata(bp / "defaultsettings.yml")
@@ -53,6 +87,14 @@ class Config:
         self._metadata_file: Optional[str | Path] = None
         self._settings: Any = Empty
         self._files: list[str | Path] = []
+        # key -> resolved value (or KeyError if the key doesn't exist), cleared whenever settings change
+        self._values: dict[str, Any] = {}
+        # key -> frozen view of the resolved value
+        self._frozen: dict[str, Any] = {}
+
+    def _invalidate(self) -> None:
+        self._values = {}
+        self._frozen = {}
 
     def load_metadata(self, file: str | Path) -> None:
         """Load metadata into the current Config instance.
@@ -67,6 +109,7 @@ class Config:
             self._metadata = y.load(f)
         # load default settings
         self._settings = merge(self._metadata, Empty, Empty, "<root>")
+        self._invalidate()
 
     def load_config(self, file: str | Path) -> None:
         """Load configuration file into the current Config instance.
@@ -85,6 +128,7 @@ class Config:
         with open(file) as f:
             config = y.load(f)
             self._settings = merge(self._metadata, self._settings, config, "<root>")
+        self._invalidate()
 
     def reload(self, refresh_metadata=False):
         """Reload configuration files to pick up any changes.
@@ -109,19 +153,13 @@ class Config:
 
         self._metadata = new_config._metadata
         self._settings = new_config._settings
+        self._invalidate()
 
     def _resolve_key(self, key: str) -> tuple[Any, dict[str, Any]]:
         assert self._metadata is not None
-        parts = key.split(".")
         cur = self._settings
         meta = self._metadata
-        for part in parts:
-            if "[" in part:
-                key_part, idx_part_str = part.split("[", maxsplit=1)
-                idx_part: Optional[int] = int(idx_part_str[:-1])  # strip trailing "]"
-            else:
-                key_part = part
-                idx_part = None
+        for key_part, idx_part in compile_key(key):
             if key_part not in cur:
                 raise KeyError("configuration key not found: {}".format(key))
             cur = cur[key_part]
@@ -165,7 +203,23 @@ class Config:
 
         return cur, meta
 
-    def get(self, key: str, default=Empty):
+    def _lookup(self, key: str):
+        # grab a reference up front so that a value resolved concurrently with _invalidate()
+        # ends up in the discarded dict rather than the fresh one
+        values = self._values
+        try:
+            return values[key]
+        except KeyError:
+            pass
+
+        try:
+            cur, _ = self._resolve_key(key)
+        except KeyError as e:
+            cur = e
+        values[key] = cur
+        return cur
+
+    def get(self, key: str, default=Empty, *, frozen: bool = False):
         """Get the value of a configuration item.
         
         In general, values retrieved should not be cached,
@@ -173,8 +227,10 @@ class Config:
         Caching values can lead to inconsistencies in the event the configuration
         files are reloaded during runtime.
 
-        A copy of the value is returned, so it is safe for the caller to mutate without
-        impacting any other call sites.
+        Immutable values (strings, numbers, etc.) are returned as-is. For lists and dicts,
+        a copy of the value is returned, so it is safe for the caller to mutate without
+        impacting any other call sites. Callers which only need to read a list or dict
+        should pass frozen=True to receive a read-only view instead, which avoids the copy.
         
         :param key: Configuration key to load, using dots to separate object
             keys and index syntax to retrieve particular elements of lists.
@@ -182,18 +238,30 @@ class Config:
         :param default: If the configuration key is not found, this is the returned value.
             If set to config.Empty (the default), a KeyError is raised if the key is not found.
             Generally this should only ever be set for backwards compatibility purposes.
+        :param frozen: If True, lists and dicts are returned as tuples and read-only mappings
+            rather than being copied.
         :returns: The value of the configuration key, or the default value if one
             was specified.
         :raises KeyError: If default is not specified and the key is not found.
         :raises AssertionError: If called before configuration is initialized.
         """
         assert self._settings is not Empty
-        try:
-            cur, _ = self._resolve_key(key)
-        except KeyError:
+        cur = self._lookup(key)
+        if isinstance(cur, KeyError):
             if default is not Empty:
                 return default
-            raise
+            raise KeyError(*cur.args)
+
+        if isinstance(cur, IMMUTABLE_TYPES):
+            return cur
+
+        if frozen:
+            views = self._frozen
+            try:
+                return views[key]
+            except KeyError:
+                view = views[key] = freeze(cur)
+                return view
 
         # return a copy so that the caller cannot mutate our actual settings
         # this lets them mutate the returned value to serve their own purposes without needing to worry
@@ -222,14 +290,9 @@ class Config:
         parts = key.split(".")
         new = merge(meta, cur, value, *parts, strategy_override=merge_strategy)
         cur = self._settings
-        for i, part in enumerate(parts):
-            set_value = i == len(parts) - 1
-            if "[" in part:
-                key_part, idx_part_str = part.split("[", maxsplit=1)
-                idx_part: Optional[int] = int(idx_part_str[:-1])  # strip trailing "]"
-            else:
-                key_part = part
-                idx_part = None
+        compiled = compile_key(key)
+        for i, (key_part, idx_part) in enumerate(compiled):
+            set_value = i == len(compiled) - 1
             if idx_part is not None:
                 cur = cur[key_part]
                 if set_value:
@@ -239,6 +302,9 @@ class Config:
                 if set_value:
                     cur[key_part] = new
                 cur = cur[key_part]
+        # drop cached values only once the new one is in place; a concurrent get could otherwise
+        # cache the old value in the fresh dict between the two steps
+        self._invalidate()
 
     @property
     def metadata(self):
@@ -107,39 +107,37 @@ class UserList(Container, List[User]):
             new = type(self)(new)
         return new
 
+    # Each user's lists tracks how many times it occurs in this list, so none of these need to scan the list
+
     def __setitem__(self, index, value):
         if not isinstance(value, User):
             raise TypeError("UserList may only contain User instances")
 
-        item = self[index]
+        item = super().__getitem__(index)
         super().__setitem__(index, value)
-        if item not in self:
-            item.lists.remove(self)
-
-        if self not in value.lists:
-            value.lists.append(self)
+        item.lists.remove(self)
+        value.lists.add(self)
 
     def __delitem__(self, index):
-        item = self[index]
-
+        items = super().__getitem__(index)
         super().__delitem__(index)
 
-        if item not in self: # there may have been multiple instances
-            item.lists.remove(self)
+        if isinstance(index, slice):
+            for item in items:
+                item.lists.remove(self)
+        else:
+            items.lists.remove(self)
 
     def append(self, item):
         if not isinstance(item, User):
             raise TypeError("UserList may only contain User instances")
 
-        if self not in item.lists:
-            item.lists.append(self)
-
+        item.lists.add(self)
         super().append(item)
 
     def clear(self):
         for item in self:
-            if self in item.lists:
-                item.lists.remove(self)
+            item.lists.remove(self)
 
         super().clear()
 
@@ -155,22 +153,19 @@ class UserList(Container, List[User]):
 
         # If it didn't work, we don't get here
 
-        if self not in item.lists:
-            item.lists.append(self)
+        item.lists.add(self)
 
     def pop(self, index=-1):
         item = super().pop(index)
-
-        if item not in self:
-            item.lists.remove(self)
-
+        item.lists.remove(self)
         return item
 
     def remove(self, item):
-        super().remove(item)
-
-        if item not in self:
-            item.lists.remove(self)
+        # list.remove() removes the first *equal* item, which need not be item itself
+        index = self.index(item)
+        removed = super().__getitem__(index)
+        super().__delitem__(index)
+        removed.lists.remove(self)
 
 class UserSet(Container, Set[User]):
     def __init__(self, iterable=()):
@@ -224,7 +219,7 @@ class UserSet(Container, Set[User]):
             if not isinstance(item, User):
                 raise TypeError("UserSet may only contain User instances")
 
-            item.sets.append(self)
+            item.sets.add(self)
             super().add(item)
 
     def clear(self):
@@ -322,20 +317,20 @@ class UserDict(Container, Dict[KT, VT], Generic[KT, VT]):
             new[key] = copy.deepcopy(value, memo)
         return new
 
+    # Each user's dict_values tracks how many keys of this dict map to it, so none of these need to scan values()
+
     def __setitem__(self, item, value):
+        had_key = item in self
         old = self.get(item)
         super().__setitem__(item, value)
         if isinstance(old, User):
-            if old not in self.values():
-                old.dict_values.remove(self)
+            old.dict_values.remove(self)
 
-        if isinstance(item, User):
-            if self not in item.dict_keys:
-                item.dict_keys.append(self)
+        if isinstance(item, User) and not had_key:
+            item.dict_keys.add(self)
 
         if isinstance(value, User):
-            if self not in value.dict_values:
-                value.dict_values.append(self)
+            value.dict_values.add(self)
 
     def __delitem__(self, item):
         if isinstance(item, slice): # special-case: delete if it exists, otherwise don't
@@ -350,8 +345,7 @@ class UserDict(Container, Dict[KT, VT], Generic[KT, VT]):
             item.dict_keys.remove(self)
 
         if isinstance(value, User):
-            if value not in self.values():
-                value.dict_values.remove(self)
+            value.dict_values.remove(self)
 
         if isinstance(value, (UserSet, UserList, UserDict)):
             value.clear()
@@ -361,8 +355,7 @@ class UserDict(Container, Dict[KT, VT], Generic[KT, VT]):
             if isinstance(key, User):
                 key.dict_keys.remove(self)
             if isinstance(value, User):
-                if self in value.dict_values:
-                    value.dict_values.remove(self)
+                value.dict_values.remove(self)
 
             if isinstance(value, (UserList, UserSet, UserDict)):
                 value.clear()
@@ -374,13 +367,14 @@ class UserDict(Container, Dict[KT, VT], Generic[KT, VT]):
         return cls(dict.fromkeys(iterable, value))
 
     def pop(self, key, *default):
-        value = super().pop(key, *default)
+        if key not in self:
+            return super().pop(key, *default)
+
+        value = super().pop(key)
         if isinstance(key, User):
-            if self in key.dict_keys:
-                key.dict_keys.remove(self)
+            key.dict_keys.remove(self)
         if isinstance(value, User):
-            if value not in self.values():
-                value.dict_values.remove(self)
+            value.dict_values.remove(self)
         return value
 
     def popitem(self):
@@ -388,8 +382,7 @@ class UserDict(Container, Dict[KT, VT], Generic[KT, VT]):
         if isinstance(key, User):
             key.dict_keys.remove(self)
         if isinstance(value, User):
-            if value not in self.values():
-                value.dict_values.remove(self)
+            value.dict_values.remove(self)
         return key, value
 
     def setdefault(self, key, default=None):
@@ -1,11 +1,12 @@
 from __future__ import annotations
 
+import functools
 import logging
 import sys
 from collections import defaultdict, OrderedDict
 from typing import Any, Optional
 
-from oyoyo.client import IRCClient
+from oyoyo.client import IRCClient, PRIORITY_CHANNEL, PRIORITY_PRIVATE, PRIORITY_WHO
 from src import config
 from src.messages.message import Message
 
@@ -39,13 +40,13 @@ def _who(cli, target, data=b""):
         data = b""
 
     if Features.WHOX:
-        cli.send("WHO", target, b"%tcuihsnfdlar," + data)
+        cli.send("WHO", target, b"%tcuihsnfdlar," + data, priority=PRIORITY_WHO)
     else:
-        cli.send("WHO", target)
+        cli.send("WHO", target, priority=PRIORITY_WHO)
 
     return int.from_bytes(data, "little")
 
-def _send(data, first, sep, client, send_type, name, chan=None):
+def _send(data, first, sep, client, send_type, name, chan=None, *, priority=PRIORITY_PRIVATE, max_targets=1, join=False):
     full_address = "{cli.nickname}!{cli.ident}@{cli.hostmask}".format(cli=client)
 
     # Maximum length of sent data is 512 bytes. However, we have to
@@ -92,10 +93,29 @@ def _send(data, first, sep, client, send_type, name, chan=None):
         messages.append(cur_sep)
         messages.append(line)
 
+    lines = []
     for line in "".join(messages).split("\n"):
         while line:
             extra, line = line[:length], line[length:]
-            client.send("{0} {1} {4}:{2}{3}".format(send_type, name, first, extra, chan))
+            lines.append("{0} {1} {4}:{2}{3}".format(send_type, name, first, extra, chan))
+
+    # if the client queues messages, it may join single lines to the same target together when the caller allows it;
+    # anything we split over multiple lines was split deliberately and must stay that way
+    join = join and len(lines) == 1
+    for line in lines:
+        client.send(line, priority=priority, max_targets=max_targets, join=join)
+
+# Translation tables applied on top of str.lower() for each supported casemapping.
+# Unknown casemappings are treated as rfc1459.
+_casemap_tables: dict[str, dict[int, int]] = {
+    "ascii": {},
+    "rfc1459": str.maketrans("[]\\^", "{}|~"),
+    "strict-rfc1459": str.maketrans("[]\\", "{}|"),
+}
+
+@functools.lru_cache(maxsize=8192)
+def _fold(nick: str, casemapping: str) -> str:
+    return nick.lower().translate(_casemap_tables.get(casemapping, _casemap_tables["rfc1459"]))
 
 def lower(nick: Optional[str | IRCContext], *, casemapping: Optional[str] = None):
     if nick is None or nick is NotLoggedIn:
@@ -105,19 +125,7 @@ def lower(nick: Optional[str | IRCContext], *, casemapping: Optional[str] = None
     if casemapping is None:
         casemapping = Features.CASEMAPPING
 
-    mapping: dict[str, Optional[str | int]] = {
-        "[": "{",
-        "]": "}",
-        "\\": "|",
-        "^": "~",
-    }
-
-    if casemapping == "strict-rfc1459":
-        mapping.pop("^")
-    elif casemapping == "ascii":
-        mapping.clear()
-
-    return nick.lower().translate(str.maketrans(mapping))
+    return _fold(nick, casemapping)
 
 def equals(nick1: Optional[str | IRCContext], nick2: Optional[str | IRCContext]):
     return nick1 is not None and nick2 is not None and lower(nick1) == lower(nick2)
@@ -194,7 +202,7 @@ class IRCContext:
         self._messages[message].append(self)
 
     @classmethod
-    def send_messages(cls, *, notice=False, privmsg=False):
+    def send_messages(cls, *, notice=False, privmsg=False, join=False):
         messages = list(cls._messages.items())
         cls._messages.clear()
         for message, targets in messages:
@@ -209,9 +217,11 @@ class IRCContext:
                 send_types[(send_type, send_chan)].append(target)
             for (send_type, send_chan), send_targets in send_types.items():
                 max_targets = Features["TARGMAX"][send_type]
+                priority = PRIORITY_CHANNEL if any(t.is_channel for t in send_targets) else PRIORITY_PRIVATE
                 while send_targets:
                     using, send_targets = send_targets[:max_targets], send_targets[max_targets:]
-                    _send(message, "", " ", using[0].client, send_type, ",".join([t.nick for t in using]), send_chan)
+                    _send(message, "", " ", using[0].client, send_type, ",".join([t.nick for t in using]), send_chan,
+                          priority=priority, max_targets=max_targets, join=join)
 
     @classmethod
     def get_context_type(cls, *, max_types=1):
@@ -269,7 +279,7 @@ class IRCContext:
                 return "CNOTICE", cprivmsg_eligible.name
         return send_type, None
 
-    def send(self, *data, first=None, sep=None, notice=False, privmsg=False, prefix=None):
+    def send(self, *data, first=None, sep=None, notice=False, privmsg=False, prefix=None, priority=None, join=False):
         new = []
         for line in data:
             # support deferred messages
@@ -302,7 +312,10 @@ class IRCContext:
             first = ""
         if sep is None:
             sep = " "
-        _send(new, first, sep, self.client, send_type, name, send_chan)
+        if priority is None:
+            priority = PRIORITY_CHANNEL if self.is_channel else PRIORITY_PRIVATE
+        _send(new, first, sep, self.client, send_type, name, send_chan,
+              priority=priority, max_targets=Features["TARGMAX"][send_type], join=join)
 
     @property
     def prefix(self):
@@ -316,18 +329,21 @@ class IRCFeatures:
     # Note: we store whatever the ircd tells us, but normalize return values to what the bot expects
     _features: dict[str, Any] = {}
 
+    # Normalized CASEMAPPING value; this is read on every call to lower() so it's kept precomputed
+    _casemapping = "rfc1459"
+
     # RPL_ISUPPORT tokens
 
     @property
     def CASEMAPPING(self) -> str:
-        value = self._features.get("CASEMAPPING", "rfc1459")
-        if value not in ("rfc1459", "rfc1459-strict", "ascii"):
-            value = "rfc1459"
-        return value
+        return self._casemapping
 
     @CASEMAPPING.setter
     def CASEMAPPING(self, value: str):
         self._features["CASEMAPPING"] = value
+        if value not in _casemap_tables:
+            value = "rfc1459"
+        self._casemapping = value
 
     @property
     def CHANLIMIT(self) -> dict[str, int]:
@@ -625,6 +641,8 @@ class IRCFeatures:
         # we may get CAP DEL more than once for the same feature
         if key in self._features:
             del self._features[key]
+        if key == "CASEMAPPING":
+            self._casemapping = "rfc1459"
 
 class IRCTargMaxFeature:
     def __init__(self, features: IRCFeatures, value: Optional[str] = None):
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import atexit
 import sqlite3
 import os
 import json
@@ -8,24 +9,26 @@ import sys
 import time
 import threading
 from collections import defaultdict
+from contextlib import contextmanager
 from datetime import datetime
 
 from src import users
 from src.messages import messages
 from src.cats import role_order
+from src.db.worker import BatchConnection, DatabaseWorker
 
-__all__ = ["init_vars", "decrement_stasis", "set_stasis", "get_template", "get_templates", "update_template",
+__all__ = ["init_vars", "modify_vars", "decrement_stasis", "set_stasis", "get_template", "get_templates", "update_template",
            "delete_template", "toggle_deadchat", "toggle_notice", "set_pingif", "set_warning", "set_primary_player",
            "set_pre_restart_state", "set_access", "get_pre_restart_state", "get_warning", "get_warning_points",
            "get_game_stats", "get_role_stats", "get_role_totals", "get_game_totals", "get_player_totals",
            "get_warning_sanctions", "get_player_stats", "add_warning", "add_warning_sanction", "acknowledge_warning",
            "add_game", "list_all_warnings", "list_warnings", "del_warning", "has_unacknowledged_warnings",
-           "expire_tempbans", "expire_stasis", "PREFER_NOTICE", "STASISED", "PING_IF_PREFS", "PING_IF_NUMS",
-           "DEADCHAT_PREFS", "FLAGS", "DENY", "ALL_FLAGS"]
+           "expire_tempbans", "expire_stasis", "rebuild_stats", "submit", "queue_write", "flush", "PREFER_NOTICE",
+           "STASISED", "PING_IF_PREFS", "PING_IF_NUMS", "DEADCHAT_PREFS", "FLAGS", "DENY", "ALL_FLAGS"]
 
 # increment this whenever making a schema change so that the schema upgrade functions run on start
 # they do not run by default for performance reasons
-SCHEMA_VERSION = 12
+SCHEMA_VERSION = 13
 
 # Constant of all the flags that the bot uses
 # This is not meant to be modified
@@ -57,10 +60,110 @@ DEADCHAT_PREFS: set[str] = set()
 FLAGS: defaultdict[str, str] = defaultdict(str)
 DENY: defaultdict[str, set[str]] = defaultdict(set)
 
+# init_vars replaces the vars above as a whole; modify_vars bumps the version so a reload racing it starts over
+_vars_lock = threading.RLock()
+_vars_version = 0
+
 _ts = threading.local()
 
+def submit(func, *args, callback=None, **kwargs):
+    """Run a db call on the db worker thread instead of the calling thread.
+
+    Use this for reads, and for writes which manage their own transaction; other writes should use queue_write.
+
+    :param func: Function from this module to call
+    :param callback: If given, called on the db worker thread with the return value of func
+    :returns: A future which resolves to the return value of func
+    """
+    return _worker.submit(func, *args, callback=callback, **kwargs)
+
+def queue_write(func, *args, callback=None, **kwargs):
+    """Run a db call which modifies the database on the db worker thread.
+
+    Writes queued close together are committed in a single transaction, so func must only commit through
+    the connection's commit method.
+
+    :param func: Function from this module to call
+    :param callback: If given, called on the db worker thread with the return value of func once it is committed
+    :returns: A future which resolves to the return value of func
+    """
+    return _worker.queue_write(func, *args, callback=callback, **kwargs)
+
+def flush(timeout=None):
+    """Wait for every queued db call to finish.
+
+    :param timeout: Maximum number of seconds to wait, or None to wait indefinitely
+    :returns: True if every call finished, False if the timeout expired first
+    """
+    return _worker.flush(timeout)
+
 def init_vars():
+    """Reload the tracking vars from the database.
+
+    New containers are filled from the database and then swapped in all at once, so other threads reading the
+    vars never see them empty or half-filled. If the vars are changed through modify_vars while the database
+    is being read, it is read again so that the change isn't overwritten by older data.
+    """
+    global PREFER_NOTICE, STASISED, PING_IF_PREFS, PING_IF_NUMS, DEADCHAT_PREFS, FLAGS, DENY
     from src.context import lower
+    while True:
+        with _vars_lock:
+            version = _vars_version
+        person_rows, deny_rows = _fetch_vars()
+
+        prefer_notice: set[str] = set()
+        stasised: defaultdict[str, int] = defaultdict(int)
+        ping_if_prefs: defaultdict[str, int] = defaultdict(int)
+        ping_if_nums: defaultdict[int, set[str]] = defaultdict(set)
+        deadchat_prefs: set[str] = set()
+        flags_map: defaultdict[str, str] = defaultdict(str)
+        deny: defaultdict[str, set[str]] = defaultdict(set)
+
+        for acc, notice, dc, pi, stasis, stasisexp, flags in person_rows:
+            if acc is not None:
+                lacc = lower(acc)
+                if notice == 1:
+                    prefer_notice.add(lacc)
+                if stasis > 0:
+                    stasised[lacc] = stasis
+                if pi is not None and pi > 0:
+                    ping_if_prefs[lacc] = pi
+                    ping_if_nums[pi].add(lacc)
+                if dc == 1:
+                    deadchat_prefs.add(lacc)
+                if flags:
+                    flags_map[lacc] = flags
+
+        for acc, command in deny_rows:
+            if acc is not None:
+                lacc = lower(acc)
+                deny[lacc].add(command)
+
+        with _vars_lock:
+            if version != _vars_version:
+                continue
+            PREFER_NOTICE = prefer_notice
+            STASISED = stasised
+            PING_IF_PREFS = ping_if_prefs
+            PING_IF_NUMS = ping_if_nums
+            DEADCHAT_PREFS = deadchat_prefs
+            FLAGS = flags_map
+            DENY = deny
+            return
+
+@contextmanager
+def modify_vars():
+    """Hold the tracking vars steady while changing them in place.
+
+    Wrap both the change to the vars and the matching database write in this, so that an init_vars running
+    on another thread at the same time doesn't replace the vars with data read before the write.
+    """
+    global _vars_version
+    with _vars_lock:
+        _vars_version += 1
+        yield
+
+def _fetch_vars():
     conn = _conn()
     c = conn.cursor()
     c.execute("""SELECT
@@ -79,29 +182,7 @@ def init_vars():
                  LEFT JOIN access_template at
                    ON at.id = a.template
                  WHERE pl.active = 1""")
-
-    PREFER_NOTICE.clear()
-    STASISED.clear()
-    PING_IF_PREFS.clear()
-    PING_IF_NUMS.clear()
-    DEADCHAT_PREFS.clear()
-    FLAGS.clear()
-    DENY.clear()
-
-    for acc, notice, dc, pi, stasis, stasisexp, flags in c:
-        if acc is not None:
-            lacc = lower(acc)
-            if notice == 1:
-                PREFER_NOTICE.add(lacc)
-            if stasis > 0:
-                STASISED[lacc] = stasis
-            if pi is not None and pi > 0:
-                PING_IF_PREFS[lacc] = pi
-                PING_IF_NUMS[pi].add(lacc)
-            if dc == 1:
-                DEADCHAT_PREFS.add(lacc)
-            if flags:
-                FLAGS[lacc] = flags
+    person_rows = c.fetchall()
 
     c.execute("""SELECT
                    pl.account_display,
@@ -120,10 +201,8 @@ def init_vars():
                      w.expires IS NULL
                      OR w.expires > datetime('now')
                    )""")
-    for acc, command in c:
-        if acc is not None:
-            lacc = lower(acc)
-            DENY[lacc].add(command)
+    deny_rows = c.fetchall()
+    return person_rows, deny_rows
 
 def decrement_stasis(acc=None):
     peid, plid = _get_ids(acc)
@@ -295,8 +374,63 @@ def add_game(mode, size, started, finished, winner, players, options):
             c.execute("""INSERT INTO game_player_role (game_player, role, special)
                          VALUES (?, ?, 1)""", (gpid, sq))
 
+    _update_stats(c, mode, size, winner, players)
     conn.commit()
 
+def _update_stats(c, mode, size, winner, players):
+    # keep the stats_* rollup tables in sync with a newly added game; see rebuild_stats.sql for what they hold
+    c.execute("""INSERT INTO stats_game (gamemode, gamesize, winner, games)
+                 VALUES (?, ?, ?, 1)
+                 ON CONFLICT (gamemode, gamesize, winner) DO UPDATE SET games = games + 1""",
+              (mode, size, str(winner)))
+    for p in players:
+        counted = int(bool(p["count_game"]))
+        team = int(bool(p["team_win"]))
+        indiv = int(bool(p["individual_win"]))
+        overall = int(team or indiv)
+        c.execute("""INSERT INTO stats_player (player, games, counted, won)
+                     VALUES (?, 1, ?, ?)
+                     ON CONFLICT (player) DO UPDATE SET
+                       games = games + 1,
+                       counted = counted + excluded.counted,
+                       won = won + excluded.won""",
+                  (p["playerid"], counted, counted and overall))
+        for role in list(p["all_roles"]) + list(p["special"]):
+            c.execute("""INSERT INTO stats_role (role, gamemode, games, team, indiv, overall)
+                         VALUES (?, ?, 1, ?, ?, ?)
+                         ON CONFLICT (role, gamemode) DO UPDATE SET
+                           games = games + 1,
+                           team = team + excluded.team,
+                           indiv = indiv + excluded.indiv,
+                           overall = overall + excluded.overall""",
+                      (role, mode, team, indiv, overall))
+            c.execute("""INSERT INTO stats_player_role (player, role, games, counted, team, indiv, overall)
+                         VALUES (?, ?, 1, ?, ?, ?, ?)
+                         ON CONFLICT (player, role) DO UPDATE SET
+                           games = games + 1,
+                           counted = counted + excluded.counted,
+                           team = team + excluded.team,
+                           indiv = indiv + excluded.indiv,
+                           overall = overall + excluded.overall""",
+                      (p["playerid"], role, counted, counted and team, counted and indiv, counted and overall))
+
+def rebuild_stats():
+    """ Recomputes the stats rollup tables from the full game history.
+
+    add_game keeps these tables up to date on its own, so this is only needed
+    if the game tables were modified by hand.
+
+    Returns the number of games which were aggregated.
+    """
+    dn = os.path.dirname(__file__)
+    conn = _conn()
+    with open(os.path.join(dn, "rebuild_stats.sql"), "rt") as f:
+        c = conn.cursor()
+        c.executescript(f.read())
+    conn.commit()
+    c.execute("SELECT COALESCE(SUM(games), 0) FROM stats_game")
+    return c.fetchone()[0]
+
 def get_player_stats(acc, role):
     peid, plid = _get_ids(acc)
     if not _total_games(peid):
@@ -304,22 +438,18 @@ def get_player_stats(acc, role):
     conn = _conn()
     c = conn.cursor()
     c.execute("""SELECT
-                   gpr.role AS role,
-                   SUM(gp.count_game AND gp.team_win) AS team,
-                   SUM(gp.count_game AND gp.indiv_win) AS indiv,
-                   SUM(gp.count_game AND (gp.team_win OR gp.indiv_win)) AS overall,
-                   SUM(gp.count_game) AS count_total,
-                   COUNT(1) AS total
-                 FROM person pe
-                 JOIN player pl
-                   ON pl.person = pe.id
-                 JOIN game_player gp
-                   ON gp.player = pl.id
-                 JOIN game_player_role gpr
-                   ON gpr.game_player = gp.id
-                   AND gpr.role = ?
-                 WHERE pe.id = ?
-                 GROUP BY role""", (role, peid))
+                   spr.role AS role,
+                   SUM(spr.team) AS team,
+                   SUM(spr.indiv) AS indiv,
+                   SUM(spr.overall) AS overall,
+                   SUM(spr.counted) AS count_total,
+                   SUM(spr.games) AS total
+                 FROM player pl
+                 JOIN stats_player_role spr
+                   ON spr.player = pl.id
+                   AND spr.role = ?
+                 WHERE pl.person = ?
+                 GROUP BY spr.role""", (role, peid))
     row = c.fetchone()
     name = _get_display_name(peid)
     if row:
@@ -342,36 +472,29 @@ def get_player_totals(acc):
     conn = _conn()
     c = conn.cursor()
     c.execute("""SELECT
-                   gpr.role AS role,
-                   COUNT(1) AS total,
-                   SUM(gp.count_game) AS count_total
-                 FROM person pe
-                 JOIN player pl
-                   ON pl.person = pe.id
-                 JOIN game_player gp
-                   ON gp.player = pl.id
-                 JOIN game_player_role gpr
-                   ON gpr.game_player = gp.id
-                 WHERE pe.id = ?
-                 GROUP BY role""", (peid,))
+                   spr.role AS role,
+                   SUM(spr.games) AS total,
+                   SUM(spr.counted) AS count_total
+                 FROM player pl
+                 JOIN stats_player_role spr
+                   ON spr.player = pl.id
+                 WHERE pl.person = ?
+                 GROUP BY spr.role""", (peid,))
     tmp = {}
     for row in c:
         tmp[row[0]] = (row[1], row[2])
-    c.execute("""SELECT SUM(gp.count_game AND (gp.team_win OR gp.indiv_win))
-                 FROM game_player gp
-                 JOIN player pl
-                   ON pl.id = gp.player
-                 JOIN person pe
-                   ON pe.id = pl.person
-                 WHERE pe.id = ?""", (peid,))
-    won_games = c.fetchone()[0]
+    c.execute("""SELECT COALESCE(SUM(sp.won), 0), COALESCE(SUM(sp.counted), 0)
+                 FROM player pl
+                 JOIN stats_player sp
+                   ON sp.player = pl.id
+                 WHERE pl.person = ?""", (peid,))
+    won_games, count_games = c.fetchone()
     order = list(role_order())
     name = _get_display_name(peid)
     # ordered role stats
     totals = [messages["db_role_games"].format(r, *tmp[r]) for r in order if r in tmp]
     # lover or any other special stats
     totals += [messages["db_role_games"].format(r, *t) for r, t in tmp.items() if r not in order]
-    count_games = _countable_games(peid)
     if count_games == 0:
         wonp = 1
     else:
@@ -383,9 +506,9 @@ def get_game_stats(mode, size):
     c = conn.cursor()
 
     if mode == "*":
-        c.execute("SELECT COUNT(1) FROM game WHERE gamesize = ?", (size,))
+        c.execute("SELECT COALESCE(SUM(games), 0) FROM stats_game WHERE gamesize = ?", (size,))
     else:
-        c.execute("SELECT COUNT(1) FROM game WHERE gamemode = ? AND gamesize = ?", (mode, size))
+        c.execute("SELECT COALESCE(SUM(games), 0) FROM stats_game WHERE gamemode = ? AND gamesize = ?", (mode, size))
 
     total_games = c.fetchone()[0]
     if not total_games:
@@ -394,32 +517,32 @@ def get_game_stats(mode, size):
     if mode == "*":
         c.execute("""SELECT
                        winner AS team,
-                       COUNT(1) AS games,
+                       SUM(games) AS games,
                        CASE winner
                          WHEN 'Villager' THEN 0
                          WHEN 'Wolfteam' THEN 1
                          WHEN 'Vampire Team' THEN 2
                          ELSE 3 END AS ord
-                     FROM game
+                     FROM stats_game
                      WHERE
                        gamesize = ?
-                       AND winner IS NOT NULL
+                       AND winner <> ''
                      GROUP BY team
                      ORDER BY ord, team""", (size,))
     else:
         c.execute("""SELECT
                        winner AS team,
-                       COUNT(1) AS games,
+                       SUM(games) AS games,
                        CASE winner
                          WHEN 'Villager' THEN 0
                          WHEN 'Wolfteam' THEN 1
                          WHEN 'Vampire Team' THEN 2
                          ELSE 3 END AS ord
-                     FROM game
+                     FROM stats_game
                      WHERE
                        gamemode = ?
                        AND gamesize = ?
-                       AND winner IS NOT NULL
+                       AND winner <> ''
                      GROUP BY team
                      ORDER BY ord, team""", (mode, size))
 
@@ -439,9 +562,9 @@ def get_game_totals(mode):
     c = conn.cursor()
 
     if mode == "*":
-        c.execute("SELECT COUNT(1) FROM game")
+        c.execute("SELECT COALESCE(SUM(games), 0) FROM stats_game")
     else:
-        c.execute("SELECT COUNT(1) FROM game WHERE gamemode = ?", (mode,))
+        c.execute("SELECT COALESCE(SUM(games), 0) FROM stats_game WHERE gamemode = ?", (mode,))
 
     total_games = c.fetchone()[0]
     if not total_games:
@@ -452,15 +575,15 @@ def get_game_totals(mode):
     if mode == "*":
         c.execute("""SELECT
                        gamesize,
-                       COUNT(1) AS games
-                     FROM game
+                       SUM(games) AS games
+                     FROM stats_game
                      GROUP BY gamesize
                      ORDER BY gamesize""")
     else:
         c.execute("""SELECT
                        gamesize,
-                       COUNT(1) AS games
-                     FROM game
+                       SUM(games) AS games
+                     FROM stats_game
                      WHERE gamemode = ?
                      GROUP BY gamesize
                      ORDER BY gamesize""", (mode,))
@@ -478,34 +601,25 @@ def get_role_stats(role, mode=None):
 
     if mode is None:
         c.execute("""SELECT
-                   gpr.role AS role,
-                   SUM(gp.team_win) AS team,
-                   SUM(gp.indiv_win) AS indiv,
-                   SUM(gp.team_win OR gp.indiv_win) AS overall,
-                   COUNT(1) AS total
-                 FROM game g
-                 JOIN game_player gp
-                   ON gp.game = g.id
-                 JOIN game_player_role gpr
-                   ON gpr.game_player = gp.id
+                   role,
+                   SUM(team) AS team,
+                   SUM(indiv) AS indiv,
+                   SUM(overall) AS overall,
+                   SUM(games) AS total
+                 FROM stats_role
                  WHERE role = ?
                  GROUP BY role""", (role,))
     else:
         c.execute("""SELECT
-                   gpr.role AS role,
-                   SUM(gp.team_win) AS team,
-                   SUM(gp.indiv_win) AS indiv,
-                   SUM(gp.team_win OR gp.indiv_win) AS overall,
-                   COUNT(1) AS total,
-                   g.gamemode AS gamemode
-                 FROM game g
-                 JOIN game_player gp
-                   ON gp.game = g.id
-                 JOIN game_player_role gpr
-                   ON gpr.game_player = gp.id
+                   role,
+                   team,
+                   indiv,
+                   overall,
+                   games AS total,
+                   gamemode
+                 FROM stats_role
                  WHERE role = ?
-                   AND gamemode = ?
-                 GROUP BY role, gamemode""", (role, mode))
+                   AND gamemode = ?""", (role, mode))
 
     row = c.fetchone()
     if row:
@@ -524,9 +638,9 @@ def get_role_totals(mode=None):
     conn = _conn()
     c = conn.cursor()
     if mode is None:
-        c.execute("SELECT COUNT(1) FROM game")
+        c.execute("SELECT COALESCE(SUM(games), 0) FROM stats_game")
     else:
-        c.execute("SELECT COUNT(1) FROM game WHERE gamemode = ?", (mode,))
+        c.execute("SELECT COALESCE(SUM(games), 0) FROM stats_game WHERE gamemode = ?", (mode,))
     total_games = c.fetchone()[0]
     if not total_games:
         if mode is None:
@@ -535,23 +649,18 @@ def get_role_totals(mode=None):
 
     if mode is None:
         c.execute("""SELECT
-                   gpr.role AS role,
-                  COUNT(1) AS count
-                  FROM game_player_role gpr
-                  GROUP BY role
-                  ORDER BY count DESC""")
+                   role,
+                   SUM(games) AS count
+                 FROM stats_role
+                 GROUP BY role
+                 ORDER BY count DESC""")
     else:
         c.execute("""SELECT
-                   gpr.role AS role,
-                  COUNT(1) AS count
-                  FROM game_player_role gpr
-                  JOIN game_player gp
-                    ON gp.id = gpr.game_player
-                  JOIN game g
-                    ON g.id = gp.game
-                  WHERE g.gamemode = ?
-                  GROUP BY role
-                  ORDER BY count DESC""", (mode,))
+                   role,
+                   games AS count
+                 FROM stats_role
+                 WHERE gamemode = ?
+                 ORDER BY count DESC""", (mode,))
 
     totals = []
     for role, count in c:
@@ -1058,6 +1167,13 @@ def _upgrade(oldversion):
             # v11 normalization accidentally had Villager instead of Village
             # it's been fixed above, but need to fix existing bots as well
             c.execute("UPDATE game SET winner = 'Village' WHERE winner = 'Villager'")
+        if oldversion < 13:
+            print("Upgrade from version 12 to 13...", file=sys.stderr)
+            # add stats rollup tables and populate them from existing games
+            with open(os.path.join(dn, "upgrade13.sql"), "rt") as f:
+                c.executescript(f.read())
+            with open(os.path.join(dn, "rebuild_stats.sql"), "rt") as f:
+                c.executescript(f.read())
 
         print("Rebuilding indexes...", file=sys.stderr)
         c.execute("REINDEX")
@@ -1151,20 +1267,13 @@ def _get_ids(acc, add=False, casemap="ascii"):
 
     if row:
         peid, plid, display_acc = row
-        if acc != display_acc:
-            # normalize case in the db to what it should be
-            c.execute("""UPDATE player
-                         SET
-                           account_display=?,
-                           account_lower_ascii=?,
-                           account_lower_rfc1459=?,
-                           account_lower_rfc1459_strict=?
-                         WHERE id=?""",
-                      (acc, ascii_acc, rfc1459_acc, strict_acc, row[1]))
-
-            conn.commit()
-            # fix up our vars
-            init_vars()
+        if plid is not None and acc != display_acc:
+            # normalize case in the db to what it should be; this reloads all of our tracking vars,
+            # so unless we're already on the db worker, leave it to the worker instead of waiting for it
+            if _worker.on_worker:
+                _normalize_account(plid, acc)
+            else:
+                queue_write(_normalize_account, plid, acc)
     elif add:
         c.execute("""INSERT INTO player
                      (
@@ -1181,6 +1290,23 @@ def _get_ids(acc, add=False, casemap="ascii"):
         conn.commit()
     return peid, plid
 
+def _normalize_account(plid, acc):
+    from src.context import lower
+    conn = _conn()
+    c = conn.cursor()
+    c.execute("""UPDATE player
+                 SET
+                   account_display=?,
+                   account_lower_ascii=?,
+                   account_lower_rfc1459=?,
+                   account_lower_rfc1459_strict=?
+                 WHERE id=?""",
+              (acc, lower(acc, casemapping="ascii"), lower(acc, casemapping="rfc1459"),
+               lower(acc, casemapping="strict-rfc1459"), plid))
+    conn.commit()
+    # fix up our vars
+    init_vars()
+
 def _get_display_name(peid):
     if peid is None:
         return None
@@ -1198,32 +1324,12 @@ def _total_games(peid):
         return 0
     conn = _conn()
     c = conn.cursor()
-    c.execute("""SELECT COUNT(DISTINCT gp.game)
-                 FROM person pe
-                 JOIN player pl
-                   ON pl.person = pe.id
-                 JOIN game_player gp
-                   ON gp.player = pl.id
-                 WHERE
-                   pe.id = ?""", (peid,))
-    # aggregates without GROUP BY always have exactly one row,
-    # so no need to check for None here
-    return c.fetchone()[0]
-
-def _countable_games(peid):
-    if peid is None:
-        return 0
-    conn = _conn()
-    c = conn.cursor()
-    c.execute("""SELECT COUNT(DISTINCT gp.game)
-                 FROM person pe
-                 JOIN player pl
-                   ON pl.person = pe.id
-                 JOIN game_player gp
-                   ON gp.player = pl.id
+    c.execute("""SELECT COALESCE(SUM(sp.games), 0)
+                 FROM player pl
+                 JOIN stats_player sp
+                   ON sp.player = pl.id
                  WHERE
-                   pe.id = ?
-                   AND gp.count_game = 1""", (peid,))
+                   pl.person = ?""", (peid,))
     # aggregates without GROUP BY always have exactly one row,
     # so no need to check for None here
     return c.fetchone()[0]
@@ -1247,7 +1353,7 @@ def _conn():
     try:
         return _ts.conn
     except AttributeError:
-        _ts.conn = sqlite3.connect("data.sqlite3")
+        _ts.conn = sqlite3.connect("data.sqlite3", factory=BatchConnection)
         c = _ts.conn.cursor()
         c.execute("PRAGMA foreign_keys = ON")
         _ts.conn.commit()
@@ -1276,5 +1382,9 @@ def _init():
     elif ver < SCHEMA_VERSION:
         _upgrade(ver)
 
+_worker = DatabaseWorker(_conn)
+# don't lose games or warnings that were queued right before shutting down
+atexit.register(flush, 10)
+
 # run db initialization once module is loaded
 _init()
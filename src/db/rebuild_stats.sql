@@ -0,0 +1,56 @@
+-- Recompute every stats rollup table from the game tables
+BEGIN;
+
+DELETE FROM stats_game;
+DELETE FROM stats_role;
+DELETE FROM stats_player;
+DELETE FROM stats_player_role;
+
+INSERT INTO stats_game (gamemode, gamesize, winner, games)
+SELECT
+  gamemode,
+  gamesize,
+  IFNULL(winner, ''),
+  COUNT(1)
+FROM game
+GROUP BY gamemode, gamesize, IFNULL(winner, '');
+
+INSERT INTO stats_role (role, gamemode, games, team, indiv, overall)
+SELECT
+  gpr.role,
+  g.gamemode,
+  COUNT(1),
+  SUM(gp.team_win),
+  SUM(gp.indiv_win),
+  SUM(gp.team_win OR gp.indiv_win)
+FROM game g
+JOIN game_player gp
+  ON gp.game = g.id
+JOIN game_player_role gpr
+  ON gpr.game_player = gp.id
+GROUP BY gpr.role, g.gamemode;
+
+INSERT INTO stats_player (player, games, counted, won)
+SELECT
+  gp.player,
+  COUNT(1),
+  SUM(gp.count_game),
+  SUM(gp.count_game AND (gp.team_win OR gp.indiv_win))
+FROM game_player gp
+GROUP BY gp.player;
+
+INSERT INTO stats_player_role (player, role, games, counted, team, indiv, overall)
+SELECT
+  gp.player,
+  gpr.role,
+  COUNT(1),
+  SUM(gp.count_game),
+  SUM(gp.count_game AND gp.team_win),
+  SUM(gp.count_game AND gp.indiv_win),
+  SUM(gp.count_game AND (gp.team_win OR gp.indiv_win))
+FROM game_player gp
+JOIN game_player_role gpr
+  ON gpr.game_player = gp.id
+GROUP BY gp.player, gpr.role;
+
+COMMIT;
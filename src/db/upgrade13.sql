@@ -0,0 +1,45 @@
+-- Rollups of the game tables, so that stats commands don't need to aggregate every game ever played.
+-- These are updated by add_game in the same transaction as the game itself, and can be recomputed
+-- from scratch with rebuild_stats.sql.
+
+-- Number of games per gamemode, size, and winner ('' if no winner)
+CREATE TABLE stats_game (
+    gamemode TEXT NOT NULL COLLATE NOCASE,
+    gamesize INTEGER NOT NULL,
+    winner TEXT NOT NULL COLLATE NOCASE,
+    games INTEGER NOT NULL,
+    PRIMARY KEY (gamemode, gamesize, winner)
+);
+
+CREATE INDEX stats_game_gamesize_idx ON stats_game (gamesize);
+
+-- Per-role results per gamemode, counting every game regardless of count_game
+CREATE TABLE stats_role (
+    role TEXT NOT NULL COLLATE NOCASE,
+    gamemode TEXT NOT NULL COLLATE NOCASE,
+    games INTEGER NOT NULL,
+    team INTEGER NOT NULL,
+    indiv INTEGER NOT NULL,
+    overall INTEGER NOT NULL,
+    PRIMARY KEY (role, gamemode)
+);
+
+-- Per-player game totals; win counts only include games where count_game is set
+CREATE TABLE stats_player (
+    player INTEGER PRIMARY KEY REFERENCES player(id) DEFERRABLE INITIALLY DEFERRED,
+    games INTEGER NOT NULL,
+    counted INTEGER NOT NULL,
+    won INTEGER NOT NULL
+);
+
+-- Per-player results per role; win counts only include games where count_game is set
+CREATE TABLE stats_player_role (
+    player INTEGER NOT NULL REFERENCES player(id) DEFERRABLE INITIALLY DEFERRED,
+    role TEXT NOT NULL COLLATE NOCASE,
+    games INTEGER NOT NULL,
+    counted INTEGER NOT NULL,
+    team INTEGER NOT NULL,
+    indiv INTEGER NOT NULL,
+    overall INTEGER NOT NULL,
+    PRIMARY KEY (player, role)
+);
@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Optional
+
+__all__ = ["BatchConnection", "DatabaseRequest", "DatabaseWorker"]
+
+class BatchConnection(sqlite3.Connection):
+    """A sqlite connection whose commits can be deferred so that several writes share one transaction.
+
+    The db functions commit after every change; while batch() is active those commits do nothing,
+    and the whole batch is committed (or rolled back) at once when it ends.
+    """
+    deferred = False
+
+    def commit(self):
+        if not self.deferred:
+            super().commit()
+
+    def batch(self) -> _Batch:
+        """Defer commits until the returned context manager exits.
+
+        The batch is committed if the block finishes normally and rolled back if it raises.
+        """
+        return _Batch(self)
+
+class _Batch:
+    __slots__ = ("conn",)
+
+    def __init__(self, conn: BatchConnection):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.deferred = True
+        return self.conn
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.conn.deferred = False
+        if exc_type is None:
+            try:
+                self.conn.commit()
+            except BaseException:
+                # a failed commit (such as a deferred foreign key violation) leaves the transaction open
+                self.conn.rollback()
+                raise
+        else:
+            self.conn.rollback()
+        return False
+
+class DatabaseRequest:
+    """A call queued on a DatabaseWorker.
+
+    Instances are created by DatabaseWorker.submit and DatabaseWorker.queue_write and should not be created directly.
+    """
+    __slots__ = ("func", "args", "kwargs", "write", "callback", "future")
+
+    def __init__(self, func: Callable, args: tuple, kwargs: dict[str, Any], write: bool, callback: Optional[Callable[[Any], Any]]):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.write = write
+        self.callback = callback
+        self.future: Future = Future()
+
+    def __repr__(self):
+        return "DatabaseRequest({0!r}, write={1})".format(getattr(self.func, "__qualname__", self.func), self.write)
+
+class DatabaseWorker:
+    """Run database calls on a dedicated thread, so slow queries never block IRC line handling.
+
+    Requests run in the order they were queued. Consecutive writes are run as one batch which is committed
+    in a single transaction; if any write in a batch fails, the batch is rolled back and its writes are
+    retried one at a time so that only the failing write is lost.
+
+    The worker thread obtains its connection from connect the first time it needs one. When connect
+    returns a per-thread connection, the worker never shares a connection with the rest of the bot.
+
+    :param connect: Function returning the connection to use on the calling thread
+    :param name: Name of the worker thread
+    :param max_batch: Maximum number of writes committed in a single transaction
+    :param autostart: If False, no worker thread is started and requests only run from run_pending
+    """
+    def __init__(self, connect: Callable[[], sqlite3.Connection], *, name: str = "database", max_batch: int = 100, autostart: bool = True):
+        self.connect = connect
+        self.name = name
+        self.max_batch = max_batch
+        self.autostart = autostart
+        self._queue: deque[DatabaseRequest] = deque()
+        self._cond = threading.Condition(threading.Lock())
+        self._busy = False
+        self._thread: Optional[threading.Thread] = None
+
+    def __len__(self):
+        with self._cond:
+            return len(self._queue)
+
+    @property
+    def on_worker(self) -> bool:
+        """Whether the calling thread is the worker thread."""
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def submit(self, func: Callable, *args, callback: Optional[Callable[[Any], Any]] = None, **kwargs) -> Future:
+        """Run a db call on the worker thread on its own, without batching it with other writes.
+
+        :param func: Function to call
+        :param callback: If given, called on the worker thread with the return value of func once it finishes
+        :returns: A future which resolves to the return value of func
+        """
+        return self._put(DatabaseRequest(func, args, kwargs, False, callback))
+
+    def queue_write(self, func: Callable, *args, callback: Optional[Callable[[Any], Any]] = None, **kwargs) -> Future:
+        """Run a db call which modifies the database on the worker thread, batched with any other pending writes.
+
+        :param func: Function to call
+        :param callback: If given, called on the worker thread with the return value of func once it is committed
+        :returns: A future which resolves to the return value of func once it is committed
+        """
+        return self._put(DatabaseRequest(func, args, kwargs, True, callback))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued request has finished.
+
+        If there is no worker thread, the pending requests are run on the calling thread instead.
+
+        :param timeout: Maximum number of seconds to wait, or None to wait indefinitely
+        :returns: True if the queue was drained, False if the timeout expired first
+        """
+        if self._thread is None:
+            self.run_pending()
+            return True
+        if self.on_worker:
+            # waiting on ourselves would deadlock; a callback asking for a flush gets one after it returns
+            return not self._queue
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._queue and not self._busy, timeout)
+
+    def run_pending(self) -> int:
+        """Run every queued request on the calling thread.
+
+        :returns: Number of requests which were run
+        """
+        count = 0
+        while batch := self._next_batch(wait=False):
+            self._run_batch(batch)
+            count += len(batch)
+        return count
+
+    def _put(self, request: DatabaseRequest) -> Future:
+        with self._cond:
+            self._queue.append(request)
+            self._cond.notify_all()
+        self._start()
+        return request.future
+
+    def _next_batch(self, wait: bool) -> list[DatabaseRequest]:
+        with self._cond:
+            self._busy = False
+            self._cond.notify_all()
+            while wait and not self._queue:
+                self._cond.wait()
+            if not self._queue:
+                return []
+            batch = [self._queue.popleft()]
+            if batch[0].write:
+                # only writes at the front of the queue are batched, so a later read still sees every earlier write
+                while self._queue and self._queue[0].write and len(batch) < self.max_batch:
+                    batch.append(self._queue.popleft())
+            self._busy = True
+            return batch
+
+    def _run_batch(self, batch: list[DatabaseRequest]):
+        conn = self.connect()
+        if len(batch) == 1 or not isinstance(conn, BatchConnection):
+            for request in batch:
+                self._run_one(conn, request)
+            return
+
+        results = []
+        try:
+            with conn.batch():
+                for request in batch:
+                    result, exc = self._call(request)
+                    if exc is not None:
+                        raise exc
+                    results.append(result)
+        except Exception:
+            # retry individually, so that one bad write doesn't take the rest of the batch down with it
+            for request in batch:
+                self._run_one(conn, request)
+        else:
+            for request, result in zip(batch, results):
+                self._finish(request, result, None)
+
+    def _run_one(self, conn: sqlite3.Connection, request: DatabaseRequest):
+        result, exc = self._call(request)
+        if exc is not None and conn.in_transaction:
+            # don't let the next request commit whatever the failed one left behind
+            conn.rollback()
+        self._finish(request, result, exc)
+
+    def _call(self, request: DatabaseRequest) -> tuple[Any, Optional[BaseException]]:
+        try:
+            return request.func(*request.args, **request.kwargs), None
+        except Exception as e:
+            return None, e
+
+    def _finish(self, request: DatabaseRequest, result: Any, exc: Optional[BaseException]):
+        # errors are reported here so that one bad request can't take down the worker thread
+        from src.debug.decorators import print_traceback
+        with print_traceback():
+            if exc is not None:
+                request.future.set_exception(exc)
+                raise exc
+            request.future.set_result(result)
+            if request.callback is not None:
+                request.callback(result)
+
+    def _start(self):
+        if self._thread is not None or not self.autostart:
+            return
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(None, self._worker, self.name, daemon=True)
+                self._thread.start()
+
+    def _worker(self):
+        while True:
+            self._run_batch(self._next_batch(wait=True))
@@ -1,13 +1,111 @@
 # event system
 from __future__ import annotations
 
+import json
+import time
 from collections import defaultdict
 from types import SimpleNamespace
-from typing import Callable, Optional, Any
+from typing import Callable, Optional, Any, TextIO
+from src import config
 from src.debug import handle_error
+from src.debug.decorators import print_traceback
 
-__all__ = ["find_listener", "event_listener", "Event", "EventListener"]
+__all__ = ["find_listener", "get_listeners", "event_listener", "Event", "EventListener", "EventStats", "get_event_stats", "reset_event_stats",
+           "ListenerStats", "enable_listener_profiling", "disable_listener_profiling", "listener_profiling_enabled",
+           "get_listener_stats", "reset_listener_stats", "dump_listener_stats"]
 EVENT_CALLBACKS: dict[str, list[EventListener]] = defaultdict(list)
+# Listeners for each event sorted by priority (ties keep install order); rebuilt whenever EVENT_CALLBACKS changes
+_LISTENER_CHAINS: dict[str, tuple[EventListener, ...]] = {}
+_EVENT_STATS: dict[str, EventStats] = {}
+# Keyed by (event name, listener id); None when listener profiling is disabled
+_LISTENER_STATS: Optional[dict[tuple[str, str], ListenerStats]] = None
+
+def _rebuild_chain(event: str):
+    listeners = EVENT_CALLBACKS[event]
+    if listeners:
+        _LISTENER_CHAINS[event] = tuple(sorted(listeners, key=lambda x: x.priority))
+    else:
+        _LISTENER_CHAINS.pop(event, None)
+
+class EventStats:
+    """Dispatch statistics for a single event.
+
+    time is the cumulative wall time spent running the event's listeners, in seconds.
+    It includes the time taken by any events dispatched from within those listeners.
+    """
+    __slots__ = ("count", "time")
+
+    def __init__(self):
+        self.count = 0
+        self.time = 0.0
+
+    def __repr__(self):
+        return "EventStats(count={0}, time={1:.6f})".format(self.count, self.time)
+
+def get_event_stats() -> dict[str, EventStats]:
+    """Get dispatch statistics for every event dispatched since the last reset.
+
+    :returns: A mapping of event name to its statistics
+    """
+    return dict(_EVENT_STATS)
+
+def reset_event_stats():
+    _EVENT_STATS.clear()
+
+class ListenerStats:
+    """Profiling data for a single listener of a single event. Times are in seconds."""
+    __slots__ = ("count", "total", "max", "errors")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.errors = 0
+
+    def __repr__(self):
+        return "ListenerStats(count={0}, total={1:.6f}, max={2:.6f}, errors={3})".format(self.count, self.total, self.max, self.errors)
+
+def enable_listener_profiling():
+    """Start recording call count, wall time, and exceptions for every listener call."""
+    global _LISTENER_STATS
+    if _LISTENER_STATS is None:
+        _LISTENER_STATS = {}
+
+def disable_listener_profiling():
+    """Stop recording listener calls and discard everything recorded so far."""
+    global _LISTENER_STATS
+    _LISTENER_STATS = None
+
+def listener_profiling_enabled() -> bool:
+    return _LISTENER_STATS is not None
+
+def get_listener_stats() -> dict[tuple[str, str], ListenerStats]:
+    """Get profiling data recorded since profiling was enabled or last reset.
+
+    :returns: A mapping of (event name, listener id) to its statistics,
+        which is empty if profiling is disabled
+    """
+    return dict(_LISTENER_STATS or {})
+
+def reset_listener_stats():
+    if _LISTENER_STATS is not None:
+        _LISTENER_STATS.clear()
+
+def dump_listener_stats(file: TextIO, **extra):
+    """Write listener profiling data as JSON, slowest listeners (by total time) first.
+
+    :param file: File to write to
+    :param extra: Additional top-level keys to include in the output
+    """
+    stats = sorted(get_listener_stats().items(), key=lambda x: x[1].total, reverse=True)
+    data = dict(extra)
+    data["listeners"] = [{"event": event,
+                          "listener": listener_id,
+                          "count": s.count,
+                          "total": s.total,
+                          "max": s.max,
+                          "errors": s.errors} for (event, listener_id), s in stats]
+    json.dump(data, file, indent=2)
 
 class EventListener:
     # because type checker is dumb...
@@ -26,10 +124,12 @@ class EventListener:
         if self in EVENT_CALLBACKS[event]:
             raise ValueError("Callback with id {} already registered for the {} event".format(self.id, event))
         EVENT_CALLBACKS[event].append(self)
+        _rebuild_chain(event)
 
     def remove(self, event: str):
         if self in EVENT_CALLBACKS[event]:
             EVENT_CALLBACKS[event].remove(self)
+            _rebuild_chain(event)
 
     def __eq__(self, other):
         if not isinstance(other, EventListener):
@@ -40,7 +140,40 @@ class EventListener:
         return hash(self._id)
 
     def __call__(self, *args, **kwargs):
-        self.callback(*args, **kwargs)
+        if _LISTENER_STATS is None:
+            self.callback(*args, **kwargs)
+        else:
+            self._profiled_call(args, kwargs)
+
+    def _profiled_call(self, args, kwargs):
+        event = args[0].name if args and isinstance(args[0], Event) else ""
+        key = (event, self._id)
+        stats = _LISTENER_STATS.get(key) # type: ignore[union-attr]
+        if stats is None:
+            stats = _LISTENER_STATS[key] = ListenerStats() # type: ignore[index]
+        stats.count += 1
+        start = time.perf_counter()
+        try:
+            if isinstance(self.callback, handle_error):
+                # handle_error swallows exceptions when it is the outermost handler, which would hide them from us;
+                # handling them out here instead lets us see them without changing what happens to them
+                with print_traceback():
+                    try:
+                        self.callback(*args, **kwargs)
+                    except Exception:
+                        stats.errors += 1
+                        raise
+            else:
+                try:
+                    self.callback(*args, **kwargs)
+                except Exception:
+                    stats.errors += 1
+                    raise
+        finally:
+            elapsed = time.perf_counter() - start
+            stats.total += elapsed
+            if elapsed > stats.max:
+                stats.max = elapsed
 
     @property
     def id(self):
@@ -50,6 +183,14 @@ class EventListener:
     def id(self, value):
         raise ValueError("Cannot modify id attribute")
 
+def get_listeners(event: str) -> tuple[EventListener, ...]:
+    """Get the listeners of an event in the order they run.
+
+    A new tuple is returned whenever a listener is installed or removed, so comparing the
+    returned tuples by identity tells whether the listeners changed in between.
+    """
+    return _LISTENER_CHAINS.get(event, ())
+
 def find_listener(event: str, listener_id: str) -> EventListener:
     for evt in EVENT_CALLBACKS[event]:
         if evt.id == listener_id:
@@ -99,11 +240,23 @@ class Event:
     def dispatch(self, *args, **kwargs):
         self.stop_processing = False
         self.prevent_default = False
-        listeners = list(EVENT_CALLBACKS[self.name])
-        listeners.sort(key=lambda x: x.priority)
-        for listener in listeners:
-            listener(self, *args, **kwargs)
-            if self.stop_processing:
-                break
+        try:
+            stats = _EVENT_STATS[self.name]
+        except KeyError:
+            stats = _EVENT_STATS[self.name] = EventStats()
+        stats.count += 1
+        # the chain is immutable, so listeners installed or removed while dispatching don't affect this dispatch
+        listeners = _LISTENER_CHAINS.get(self.name, ())
+        start = time.perf_counter()
+        try:
+            for listener in listeners:
+                listener(self, *args, **kwargs)
+                if self.stop_processing:
+                    break
+        finally:
+            stats.time += time.perf_counter() - start
 
         return not self.prevent_default
+
+if config.Main.get("debug.enabled") and config.Main.get("debug.profiling.events"):
+    enable_listener_profiling()
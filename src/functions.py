@@ -1,13 +1,13 @@
 from __future__ import annotations
 
-from typing import Optional, Iterable, Callable
+from typing import Any, Optional, Iterable, Callable
 from collections import Counter
 import functools
 import typing
 
 from src.messages import messages, LocalRole, LocalMode, LocalTotem
 from src.gamestate import PregameState, GameState
-from src.events import Event
+from src.events import Event, EventListener, get_listeners
 from src.cats import Wolfteam, Neutral, Hidden, All, get_team
 from src.match import Match, match_all
 
@@ -19,9 +19,15 @@ __all__ = [
     "get_players", "get_all_players", "get_participants",
     "get_target", "change_role",
     "get_main_role", "get_all_roles", "get_reveal_role",
-    "match_role", "match_mode", "match_totem"
+    "match_role", "match_mode", "match_totem",
+    "get_role_metadata"
     ]
 
+# Kinds of role metadata which only depend on which roles are loaded, and can therefore be cached
+_STATIC_METADATA = frozenset({"role_categories", "special_keys", "lycanthropy_role"})
+# Keyed by kind; each entry also holds the listeners it was built from so it can be discarded when they change
+_METADATA_CACHE: dict[str, tuple[tuple[EventListener, ...], dict[str, Any]]] = {}
+
 def get_players(var: Optional[GameState | PregameState], roles=None, *, mainroles=None) -> list[User]:
     from src.status import is_dying
     if var is None:
@@ -31,20 +37,17 @@ def get_players(var: Optional[GameState | PregameState], roles=None, *, mainrole
             return []
         return list(var.players)
 
-    if mainroles is None:
-        mainroles = var.main_roles
+    if mainroles is None or mainroles is var.main_roles:
+        pl = var.get_main_role_players(roles)
+        if not pl:
+            return []
+        return [p for p in var.players if p in pl and not is_dying(var, p)]
+
     if roles is None:
         roles = set(mainroles.values())
-    pl = set()
-    for user, role in mainroles.items():
-        if role in roles:
-            pl.add(user)
-
-    if mainroles is not var.main_roles:
-        # we weren't given an actual player list (possibly),
-        # so the elements of pl are not necessarily in var.players
-        return list(pl)
-    return [p for p in var.players if p in pl and not is_dying(var, p)]
+    # we weren't given an actual player list (possibly),
+    # so the elements of pl are not necessarily in var.players
+    return list({user for user, role in mainroles.items() if role in roles})
 
 def get_all_players(var: Optional[GameState | PregameState], roles=None, *, rolemap=None) -> set[User]:
     from src.status import is_dying
@@ -55,19 +58,22 @@ def get_all_players(var: Optional[GameState | PregameState], roles=None, *, role
             return set()
         return set(var.players)
 
-    if rolemap is None:
-        rolemap = var.roles
+    if rolemap is None or rolemap is var.roles:
+        if roles is None:
+            pl = var.get_role_players()
+        else:
+            pl = set()
+            for role in roles:
+                pl.update(var.roles[role])
+        return {p for p in pl if not is_dying(var, p)}
+
     if roles is None:
         roles = set(rolemap.keys())
     pl = set()
     for role in roles:
         for user in rolemap[role]:
             pl.add(user)
-
-    if rolemap is not var.roles:
-        return pl
-
-    return {p for p in pl if not is_dying(var, p)}
+    return pl
 
 def get_participants(var: Optional[GameState | PregameState]) -> list[User]:
     """List all players who are still able to participate in the game."""
@@ -202,8 +208,8 @@ def get_main_role(var: GameState, user, *, mainroles=None):
     return role
 
 def get_all_roles(var: GameState, user: User, *, rolemap=None) -> set[str]:
-    if rolemap is None:
-        rolemap = var.roles
+    if rolemap is None or rolemap is var.roles:
+        return var.get_player_roles(user)
     return {role for role, users in rolemap.items() if user in users}
 
 def get_reveal_role(var: GameState, user, *, mainroles=None) -> str:
@@ -213,6 +219,27 @@ def get_reveal_role(var: GameState, user, *, mainroles=None) -> str:
 
     return role if var.role_reveal != "team" else get_team(var, role).name
 
+def get_role_metadata(var: Optional[GameState], kind: str) -> dict[str, Any]:
+    """Get metadata about every role, as collected by the get_role_metadata event.
+
+    Kinds of metadata which don't depend on the state of a game are cached until a get_role_metadata listener is
+    installed or removed, so the returned dict may be shared between calls and must not be modified.
+
+    :param var: Game state, or None if not in a game
+    :param kind: Kind of metadata to get
+    :returns: A mapping of role to its metadata
+    """
+    listeners = get_listeners("get_role_metadata")
+    if kind in _STATIC_METADATA:
+        cached = _METADATA_CACHE.get(kind)
+        if cached is not None and cached[0] is listeners:
+            return cached[1]
+    evt = Event("get_role_metadata", {})
+    evt.dispatch(var, kind)
+    if kind in _STATIC_METADATA:
+        _METADATA_CACHE[kind] = (listeners, evt.data)
+    return evt.data
+
 def match_role(role: str, remove_spaces: bool = False, allow_extra: bool = False, allow_special: bool = True, scope: Optional[Iterable[str]] = None) -> Match[LocalRole]:
     """ Match a partial role or alias name into the internal role key.
 
@@ -234,9 +261,7 @@ def match_role(role: str, remove_spaces: bool = False, allow_extra: bool = False
 
     special_keys: set[str] = set()
     if scope is None and allow_special:
-        evt = Event("get_role_metadata", {})
-        evt.dispatch(None, "special_keys")
-        special_keys = functools.reduce(lambda x, y: x | y, evt.data.values(), special_keys)
+        special_keys = functools.reduce(lambda x, y: x | y, get_role_metadata(None, "special_keys").values(), special_keys)
 
     matches = match_all(role, role_map.keys())
 
@@ -53,10 +53,10 @@ def game_stats(wrapper: MessageDispatcher, message: str):
 
     # List all games sizes and totals if no size is given
     if not gamesize:
-        wrapper.send(db.get_game_totals(gamemode))
+        db.submit(db.get_game_totals, gamemode, callback=wrapper.send)
     else:
         # Attempt to find game stats for the given game size
-        wrapper.send(db.get_game_stats(gamemode, gamesize))
+        db.submit(db.get_game_stats, gamemode, gamesize, callback=wrapper.send)
 
 @command("playerstats", pm=True)
 def player_stats(wrapper: MessageDispatcher, message: str):
@@ -102,9 +102,11 @@ def player_stats(wrapper: MessageDispatcher, message: str):
 
     # List the player's total games for all roles if no role is given
     if len(params) < 2:
-        msg, totals = db.get_player_totals(account)
-        wrapper.pm(msg)
-        wrapper.pm(*totals, sep=", ")
+        def send_totals(result):
+            msg, totals = result
+            wrapper.pm(msg)
+            wrapper.pm(*totals, sep=", ")
+        db.submit(db.get_player_totals, account, callback=send_totals)
     else:
         role = " ".join(params[1:])
         matches = match_role(role, allow_extra=True)
@@ -117,7 +119,7 @@ def player_stats(wrapper: MessageDispatcher, message: str):
             return
 
         role = matches.get().key
-        wrapper.send(db.get_player_stats(account, role))
+        db.submit(db.get_player_stats, account, role, callback=wrapper.send)
 
 @command("mystats", pm=True)
 def my_stats(wrapper: MessageDispatcher, message: str):
@@ -143,10 +145,13 @@ def role_stats(wrapper: MessageDispatcher, message: str):
         LAST_RSTATS = datetime.now()
 
     params = message.split()
-    
-    if not params:
-        first, totals = db.get_role_totals()
+
+    def send_totals(result):
+        first, totals = result
         wrapper.pm(*totals, sep=", ", first=first)
+
+    if not params:
+        db.submit(db.get_role_totals, callback=send_totals)
         return
 
     roles = match_role(message, allow_extra=True)
@@ -161,7 +166,7 @@ def role_stats(wrapper: MessageDispatcher, message: str):
             return
 
     if roles:
-        wrapper.pm(db.get_role_stats(roles.get().key))
+        db.submit(db.get_role_stats, roles.get().key, callback=wrapper.pm)
         return
 
     gamemode = params[-1]
@@ -179,8 +184,13 @@ def role_stats(wrapper: MessageDispatcher, message: str):
         return
 
     if len(params) == 1:
-        first, totals = db.get_role_totals(gamemode)
-        wrapper.pm(*totals, sep=", ", first=first)
+        db.submit(db.get_role_totals, gamemode, callback=send_totals)
         return
 
-    wrapper.pm(db.get_role_stats(roles.get().key, gamemode))
+    db.submit(db.get_role_stats, roles.get().key, gamemode, callback=wrapper.pm)
+
+@command("frebuildstats", flag="D", pm=True)
+def rebuild_stats(wrapper: MessageDispatcher, message: str):
+    """Recompute the aggregated game, player, and role statistics from the full game history."""
+    # the rebuild commits its own transaction, so it must not be batched with other writes
+    db.submit(db.rebuild_stats, callback=lambda total: wrapper.reply(messages["db_stats_rebuilt"].format(total)))
@@ -3,7 +3,6 @@ from __future__ import annotations
 from collections import Counter
 from datetime import datetime, timedelta
 from typing import Optional
-import time
 import sys
 import re
 
@@ -19,6 +18,8 @@ from src.gamestate import GameState
 from src.users import User
 
 LAST_STATS: Optional[datetime] = None
+# ((game id, phase, stats type, state version), rendered !stats role counts)
+STATS_CACHE: Optional[tuple[tuple, str]] = None
 LAST_TIME: Optional[datetime] = None
 LAST_ADMINS: Optional[datetime] = None
 LAST_GOAT: UserDict[User, datetime] = UserDict()
@@ -65,6 +66,19 @@ def stats(wrapper: MessageDispatcher, message: str):
     if var.current_phase == "join" or var.stats_type == "disabled":
         return
 
+    wrapper.reply(_get_stats_reply(var))
+
+def _get_stats_reply(var: GameState) -> str:
+    """Render the role counts portion of the !stats reply.
+
+    The reply only changes when the phase, stats type, or the game's roles or role stats change,
+    so it is cached until one of those does.
+    """
+    global STATS_CACHE
+    key = (var.game_id, var.current_phase, var.stats_type, var.state_version)
+    if STATS_CACHE is not None and STATS_CACHE[0] == key:
+        return STATS_CACHE[1]
+
     entries = []
     first_count = 0
 
@@ -81,14 +95,7 @@ def stats(wrapper: MessageDispatcher, message: str):
     # The events are fired off as part of transition_day and del_player, and are not calculated here
     if var.stats_type == "default":
         # Collapse the role stats into a dict[str, tuple[int, int]]
-        role_stats: dict[str, tuple[int, int]] = {}
-        for stat_set in var.get_role_stats():
-            for r, a in stat_set:
-                if r not in role_stats:
-                    role_stats[r] = (a, a)
-                else:
-                    mn, mx = role_stats[r]
-                    role_stats[r] = (min(mn, a), max(mx, a))
+        role_stats = var.role_stats.ranges()
         # remove any 0/0 entries if they weren't starting roles, otherwise we may have bad grammar in !stats
         role_stats = {r: v for r, v in role_stats.items() if r in start_roles or v != (0, 0)}
         order = [r for r in role_order() if r in role_stats]
@@ -166,7 +173,9 @@ def stats(wrapper: MessageDispatcher, message: str):
             else:
                 entries.append(messages["stats_reply_entry_single"].format(team, team_count))
 
-    wrapper.reply(messages["stats_reply"].format(var.current_phase, first_count, entries))
+    reply = messages["stats_reply"].format(var.current_phase, first_count, entries)
+    STATS_CACHE = (key, reply)
+    return reply
 
 @event_listener("reconfigure_stats")
 def on_reconfigure_stats(evt: Event, var: GameState, roleset: Counter, reason: str):
@@ -207,7 +216,7 @@ def timeleft(wrapper: MessageDispatcher, message: str):
             what = "the end of the phase"
             name = var.current_phase if var.current_phase in trans.TIMERS else f"{var.current_phase}_limit"
 
-        remaining = int((trans.TIMERS[name][1] + trans.TIMERS[name][2]) - time.time())
+        remaining = int(trans.TIMERS[name].remaining())
         msg = "There is \u0002{0[0]:0>2}:{0[1]:0>2}\u0002 remaining until {1}.".format(divmod(remaining, 60), what)
     else:
         msg = messages["timers_disabled"].format(var.current_phase.capitalize())
@@ -297,7 +306,8 @@ def on_begin_day(evt: Event, var: GameState):
 
 @event_listener("reset")
 def on_reset(evt: Event, var: GameState):
-    global LAST_STATS, LAST_TIME
+    global LAST_STATS, LAST_TIME, STATS_CACHE
     LAST_STATS = None
     LAST_TIME = None
+    STATS_CACHE = None
     LAST_GOAT.clear()
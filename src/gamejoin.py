@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import threading
 import time
 import re
 from datetime import datetime, timedelta
@@ -18,6 +17,7 @@ from src import db, users, channels, locks, pregame, config, context, reaper, re
 from src.dispatcher import MessageDispatcher
 from src.channels import Channel
 from src.users import User
+from src.scheduler import schedule
 
 PINGED_ALREADY: set[str] = set()
 PINGING_PLAYERS: bool = False
@@ -115,10 +115,7 @@ def _join_player(wrapper: MessageDispatcher, who: Optional[User] = None, forced=
 
         # Set join timer
         if config.Main.get("timers.enabled") and config.Main.get("timers.join.enabled"):
-            t = threading.Timer(config.Main.get("timers.join.limit"), kill_join, [var, wrapper])
-            trans.TIMERS["join"] = (t, time.time(), config.Main.get("timers.join.limit"))
-            t.daemon = True
-            t.start()
+            trans.TIMERS["join"] = schedule(config.Main.get("timers.join.limit"), kill_join, var, wrapper)
 
     elif wrapper.source in pl:
         key = "you_already_playing" if who is wrapper.source else "other_already_playing"
@@ -161,13 +158,8 @@ def _join_player(wrapper: MessageDispatcher, who: Optional[User] = None, forced=
                     pregame.CAN_START_TIME = now + timedelta(seconds=config.Main.get("timers.wait.join"))
 
     with locks.join_timer:
-        if "join_pinger" in trans.TIMERS:
-            trans.TIMERS["join_pinger"][0].cancel()
-
-        t = threading.Timer(10, join_timer_handler, (var,))
-        trans.TIMERS["join_pinger"] = (t, time.time(), 10)
-        t.daemon = True
-        t.start()
+        if "join_pinger" not in trans.TIMERS or not trans.TIMERS["join_pinger"].reschedule(10):
+            trans.TIMERS["join_pinger"] = schedule(10, join_timer_handler, var)
 
     if not wrapper.source.is_fake or not config.Main.get("debug.enabled"):
         channels.Main.mode(*cmodes)
@@ -183,8 +175,8 @@ def kill_join(var: GameState, wrapper: MessageDispatcher):
     wrapper.send(*pl, first="PING! ")
     wrapper.send(messages["game_idle_cancel"])
     # use this opportunity to expire pending stasis
-    db.expire_stasis()
-    db.init_vars()
+    db.queue_write(db.expire_stasis)
+    db.submit(db.init_vars)
     expire_tempbans()
     if trans.ENDGAME_COMMAND is not None:
         trans.ENDGAME_COMMAND()
@@ -182,6 +182,8 @@ class GameMode:
     name: str
 
     def __init__(self, arg=""):
+        # kept so the mode can be set up again exactly as it was, e.g. when replaying a game
+        self.arg = arg
         # Default values for the role sets and secondary roles restrictions
         self.ROLE_SETS = {}
         self.SECONDARY_ROLES = {}
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+from collections import Counter, defaultdict
+from typing import Iterable, Mapping
+
+from src import users
+from src.cats import Killer, Vampire_Objective, Village_Objective, Wolf, Wolf_Objective
+from src.gamestate import GameState
+from src.random import random
+
+__all__ = ["RandomRoleSampler"]
+
+class RandomRoleSampler:
+    """Draw random main role compositions for modes which give every player a random role.
+
+    One player always gets a wolf role which can kill. Every other player gets a role drawn uniformly from roles,
+    until the wolf and vampire objective roles drawn so far make up nearly half of the players; the remaining
+    players are then drawn from the roles which are neither, so the evil teams can't win on the first night.
+
+    :param roles: Roles to draw from
+    """
+    # a composition which ends the game immediately is drawn again, up to this many times
+    max_attempts = 100
+
+    def __init__(self, roles: Iterable[str]):
+        self.roles = sorted(roles)
+        self.safe_roles = [role for role in self.roles if role not in Wolf_Objective and role not in Vampire_Objective]
+        self.wolf_roles = sorted(Wolf & Killer)
+        # how much each role counts towards the cap on wolves and vampires
+        self._weights = {role: (role in Wolf_Objective) + (role in Vampire_Objective) for role in self.roles}
+
+    def draw(self, var: GameState, num_players: int) -> Counter[str]:
+        """Draw a composition for the given number of players which doesn't immediately end the game.
+
+        :param var: Game the roles are for
+        :param num_players: Number of players to give roles to
+        :returns: The number of players who get each role
+        """
+        counts = self._draw(num_players)
+        for _ in range(self.max_attempts - 1):
+            if not self.ends_game(var, counts):
+                break
+            counts = self._draw(num_players)
+        # if every attempt failed, the game ends as soon as it starts; that is still better than never starting it
+        return counts
+
+    def _draw(self, num_players: int) -> Counter[str]:
+        counts = Counter({random.choice(self.wolf_roles): 1})
+        num_evil = 1
+        cap = num_players / 2 - 1
+        drawn = random.choices(self.roles, k=num_players - 1)
+        for i, role in enumerate(drawn):
+            if num_evil >= cap:
+                counts.update(random.choices(self.safe_roles, k=len(drawn) - i))
+                break
+            counts[role] += 1
+            num_evil += self._weights[role]
+        return counts
+
+    def ends_game(self, var: GameState, counts: Mapping[str, int]) -> bool:
+        """Check whether a composition would end the game as soon as it is given out.
+
+        :param var: Game the roles are for
+        :param counts: Number of players who get each main role
+        :returns: True if a team would win immediately
+        """
+        num_players = sum(counts.values())
+        num_wolves = num_vampires = num_real_wolves = 0
+        for role, count in counts.items():
+            if role in Wolf_Objective:
+                num_wolves += count
+            if role in Vampire_Objective:
+                num_vampires += count
+            if role in Village_Objective:
+                num_real_wolves += count
+        if num_real_wolves and num_wolves < num_players / 2 and num_vampires < num_players / 2:
+            # neither the village, the wolves nor the vampires have met their objective; every built-in
+            # win condition which can be met while roles are handed out depends on one of them
+            return False
+        return self._chk_win(var, counts)
+
+    def _chk_win(self, var: GameState, counts: Mapping[str, int]) -> bool:
+        # rare enough that it's fine to hand the composition to the full win check with fake players
+        from src.trans import chk_win_conditions
+        rolemap: defaultdict[str, set[users.User]] = defaultdict(set)
+        mainroles: dict[users.User, str] = {}
+        i = 0
+        for role, count in counts.items():
+            for j in range(count):
+                user = users.FakeUser.from_nick(str(i + j))
+                rolemap[role].add(user)
+                mainroles[user] = role
+            i += count
+        return chk_win_conditions(var, rolemap, mainroles, end_game=False)
@@ -1,12 +1,9 @@
-from collections import defaultdict, Counter
-
 from src.gamemodes import game_mode, GameMode
+from src.gamemodes._random_roles import RandomRoleSampler
 from src.functions import get_players
 from src.gamestate import GameState
 from src.events import Event, EventListener
-from src.trans import chk_win_conditions
-from src import users
-from src.cats import All, Team_Switcher, Win_Stealer, Wolf, Wolf_Objective, Vampire_Objective, Killer
+from src.cats import All, Team_Switcher, Win_Stealer
 from src.random import random
 
 @game_mode("maelstrom", minp=8, maxp=24)
@@ -21,6 +18,7 @@ class MaelstromMode(GameMode):
         # monster and demoniac are nearly impossible to counter and don't add any interesting gameplay
         # succubus keeps around entranced people, who are then unable to win even if there are later no succubi (not very fun)
         self.roles = All - Team_Switcher - Win_Stealer + {"fool", "lycan", "turncoat"} - self.SECONDARY_ROLES.keys()
+        self._sampler = RandomRoleSampler(self.roles)
         self.EVENTS = {
             "role_attribution": EventListener(self.role_attribution),
             "transition_night_begin": EventListener(self.transition_night_begin)
@@ -76,23 +74,7 @@ class MaelstromMode(GameMode):
                 var.main_roles[p] = role
 
     def _role_attribution(self, var, villagers, do_templates):
-        lpl = len(villagers)
-        addroles = Counter()
-        addroles[random.choice(list(Wolf & Killer))] += 1 # make sure there's at least one wolf role
-        num_wolves = 1
-        num_vampires = 0
-        roles = list(self.roles)
-        for i in range(1, lpl):
-            if num_wolves + num_vampires >= (lpl / 2) - 1:
-                # Make sure game does not end immediately
-                role = random.choice(list(set(roles) - Wolf_Objective - Vampire_Objective))
-            else:
-                role = random.choice(roles)
-            addroles[role] += 1
-            if role in Wolf_Objective:
-                num_wolves += 1
-            if role in Vampire_Objective:
-                num_vampires += 1
+        addroles = self._sampler.draw(var, len(villagers))
 
         if do_templates:
             addroles["gunner/sharpshooter"] = random.randrange(6)
@@ -102,19 +84,4 @@ class MaelstromMode(GameMode):
             if random.randrange(100) == 0 and addroles.get("villager", 0) > 0:
                 addroles["blessed villager"] = 1
 
-        rolemap = defaultdict(set)
-        mainroles = {}
-        i = 0
-        for role, count in addroles.items():
-            if count > 0:
-                for j in range(count):
-                    u = users.FakeUser.from_nick(str(i + j))
-                    rolemap[role].add(u)
-                    if role not in self.SECONDARY_ROLES:
-                        mainroles[u] = role
-                i += count
-
-        if chk_win_conditions(var, rolemap, mainroles, end_game=False):
-            return self._role_attribution(var, villagers, do_templates)
-
         return addroles
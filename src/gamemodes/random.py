@@ -1,11 +1,8 @@
-from collections import defaultdict
-
 from src.gamemodes import game_mode, GameMode
+from src.gamemodes._random_roles import RandomRoleSampler
 from src.gamestate import GameState
 from src.events import EventListener, Event
-from src.trans import chk_win_conditions
-from src import users
-from src.cats import All, Wolf, Wolf_Objective, Vampire_Objective, Killer, Hidden_Eligible
+from src.cats import All, Hidden_Eligible
 from src.random import random
 
 @game_mode("random", minp=8, maxp=24)
@@ -38,6 +35,7 @@ class RandomMode(GameMode):
         }
 
         self.ROLE_SETS["gunner/sharpshooter"] = {"gunner": 8, "sharpshooter": 4}
+        self._sampler = RandomRoleSampler(All - self.SECONDARY_ROLES.keys() - Hidden_Eligible - {"amnesiac"})
         self.set_default_totem_chances()
 
         self.EVENTS = {
@@ -46,40 +44,9 @@ class RandomMode(GameMode):
         }
 
     def role_attribution(self, evt: Event, var: GameState, villagers):
-        lpl = len(villagers)
         addroles = evt.data["addroles"]
-        addroles[random.choice(list(Wolf & Killer))] += 1 # make sure there's at least one wolf role
-        num_wolves = 1
-        num_vampires = 0
-        roles = list(All - self.SECONDARY_ROLES.keys() - Hidden_Eligible - {"amnesiac"})
-        for i in range(1, lpl):
-            if num_wolves + num_vampires >= (lpl / 2) - 1:
-                # Make sure game does not end immediately
-                role = random.choice(list(set(roles) - Wolf_Objective - Vampire_Objective))
-            else:
-                role = random.choice(roles)
-            addroles[role] += 1
-            if role in Wolf_Objective:
-                num_wolves += 1
-            if role in Vampire_Objective:
-                num_vampires += 1
-
+        addroles.update(self._sampler.draw(var, len(villagers)))
         addroles["gunner/sharpshooter"] = random.randrange(int(len(villagers) ** 1.2 / 4))
         addroles["assassin"] = random.randrange(max(int(len(villagers) ** 1.2 / 8), 1))
 
-        rolemap = defaultdict(set)
-        mainroles = {}
-        i = 0
-        for role, count in addroles.items():
-            if count > 0:
-                for j in range(count):
-                    u = users.FakeUser.from_nick(str(i + j))
-                    rolemap[role].add(u.nick)
-                    if role not in self.SECONDARY_ROLES:
-                        mainroles[u] = role
-                i += count
-
-        if chk_win_conditions(var, rolemap, mainroles, end_game=False):
-            return self.role_attribution(evt, var, villagers)
-
         evt.prevent_default = True
@@ -1,4 +1,4 @@
-from collections import Counter, defaultdict
+from collections import defaultdict
 
 from src.cats import Wolf
 from src.dispatcher import MessageDispatcher
@@ -281,10 +281,9 @@ class SleepyMode(GameMode):
                         # VGs turned into jesters remain spicy
                         var.roles["vengeful ghost"].add(t)
 
-                newstats = set()
-                for rs in var.get_role_stats():
-                    d = Counter(dict(rs))
-                    newstats.add(rs)
+                newstats = []
+                for d in var.role_stats:
+                    newstats.append(d.copy())
                     if old in d and d[old] >= 1:
                         for i in range(1, d[old] + 1):
                             d[old] -= i
@@ -302,7 +301,7 @@ class SleepyMode(GameMode):
                                         d[old] += 1
                                         d[new] -= 1
 
-                            newstats.add(frozenset(d.items()))
+                            newstats.append(d.copy())
                 var.set_role_stats(newstats)
 
     def on_remove_protection(self, evt: Event, var: GameState, target: User, attacker: User, attacker_role: str, protector: User, protector_role: str, reason: str):
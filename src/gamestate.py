@@ -1,9 +1,8 @@
 from __future__ import annotations
 
 import copy
-import math
-import threading
-from typing import Any, Optional, Callable, ClassVar, TYPE_CHECKING
+from collections import Counter
+from typing import Any, Iterable, Optional, Callable, ClassVar, TYPE_CHECKING
 import time
 
 from src.containers import UserSet, UserDict, UserList
@@ -11,6 +10,8 @@ from src.messages import messages
 from src.cats import All
 from src import config
 from src.users import User
+from src.scheduler import schedule
+from src.rolestats import RoleStats
 from src import channels, random
 
 if TYPE_CHECKING:
@@ -37,6 +38,111 @@ def set_gamemode(var: PregameState, arg: str) -> bool:
     channels.Main.send(messages["game_mode_not_found"].format(modeargs[0]))
     return False
 
+class _RoleSet(UserSet):
+    """A UserSet for a single role in GameState.roles, which keeps GameState's player -> roles index up to date.
+
+    Copies of this set are not indexed and behave exactly like a UserSet.
+    """
+    def __init__(self, iterable=(), *, role: Optional[str] = None, index: Optional[dict[User, set[str]]] = None,
+                 changed: Optional[Callable[[], None]] = None):
+        self._role = role
+        self._index = index
+        self._changed = changed
+        super().__init__(iterable)
+
+    def _unindex(self, item):
+        if self._changed is not None:
+            self._changed()
+        roles = self._index[item] # type: ignore[index]
+        roles.discard(self._role) # type: ignore[arg-type]
+        if not roles:
+            del self._index[item] # type: ignore[union-attr]
+
+    def add(self, item):
+        new = item not in self
+        super().add(item)
+        if new and self._index is not None:
+            self._index.setdefault(item, set()).add(self._role) # type: ignore[arg-type]
+            if self._changed is not None:
+                self._changed()
+
+    def clear(self):
+        if self._index is not None:
+            for item in self:
+                self._unindex(item)
+        super().clear()
+
+    def discard(self, item):
+        if item in self:
+            self.remove(item)
+
+    def pop(self):
+        item = super().pop()
+        if self._index is not None:
+            self._unindex(item)
+        return item
+
+    def remove(self, item):
+        super().remove(item)
+        if self._index is not None:
+            self._unindex(item)
+
+class _MainRoleDict(UserDict[User, str]):
+    """A UserDict for GameState.main_roles, which keeps GameState's main role -> players index up to date.
+
+    Copies of this dict are not indexed and behave exactly like a UserDict.
+    """
+    def __init__(self, _it=(), *, index: Optional[dict[str, set[User]]] = None,
+                 changed: Optional[Callable[[], None]] = None, **kwargs):
+        self._index = index
+        self._changed = changed
+        super().__init__(_it, **kwargs)
+
+    def _unindex(self, key, role):
+        if self._changed is not None:
+            self._changed()
+        players = self._index[role] # type: ignore[index]
+        players.discard(key)
+        if not players:
+            del self._index[role] # type: ignore[union-attr]
+
+    def __setitem__(self, key, value):
+        if self._index is not None and key in self:
+            self._unindex(key, self[key])
+        super().__setitem__(key, value)
+        if self._index is not None:
+            self._index.setdefault(value, set()).add(key)
+            if self._changed is not None:
+                self._changed()
+
+    def __delitem__(self, item):
+        key = item
+        if isinstance(item, slice) and item.start is item.step is None:
+            key = item.stop
+        role = self.get(key)
+        present = key in self
+        super().__delitem__(item)
+        if present and self._index is not None:
+            self._unindex(key, role)
+
+    def clear(self):
+        if self._index is not None:
+            self._index.clear()
+            if self._changed is not None:
+                self._changed()
+        super().clear()
+
+    def pop(self, key, *default):
+        if key in self and self._index is not None:
+            self._unindex(key, self[key])
+        return super().pop(key, *default)
+
+    def popitem(self):
+        key, value = super().popitem()
+        if self._index is not None:
+            self._unindex(key, value)
+        return key, value
+
 class PregameState:
     def __init__(self):
         self.players = UserList()
@@ -68,12 +174,17 @@ class GameState:
         self.game_settings: dict[str, Any] = {}
         self.game_id: float = pregame_state.game_id
         self.players = pregame_state.players
+        # indexes maintained by the containers in roles and main_roles; these include dying players
+        self._player_roles: dict[User, set[str]] = {}
+        self._main_role_players: dict[str, set[User]] = {}
         self.roles: UserDict[str, UserSet] = UserDict()
         self._original_roles: UserDict[str, UserSet] = UserDict()
-        self.main_roles: UserDict[User, str] = UserDict()
+        # incremented whenever roles, main roles or role stats change, so derived data can be cached
+        self.state_version: int = 0
+        self.main_roles: UserDict[User, str] = _MainRoleDict(index=self._main_role_players, changed=self._state_changed)
         self._original_main_roles: UserDict[User, str] = UserDict()
         self.final_roles: UserDict[User, str] = UserDict()
-        self._rolestats: set[frozenset[tuple[str, int]]] = set()
+        self._rolestats: RoleStats = RoleStats()
         self.current_phase: str = pregame_state.current_phase
         self.next_phase: Optional[str] = None
         self.night_count: int = 0
@@ -109,7 +220,7 @@ class GameState:
         if self._torndown:
             raise RuntimeError("cannot setup a used-up GameState")
         for role in All:
-            self.roles[role] = UserSet()
+            self.roles[role] = _RoleSet(role=role, index=self._player_roles, changed=self._state_changed)
         self.setup_started = True
 
     def finish_setup(self):
@@ -127,7 +238,7 @@ class GameState:
         self.roles.clear()
         self._original_roles.clear()
         self._original_main_roles.clear()
-        self._rolestats.clear()
+        self._rolestats = RoleStats()
         self.current_mode.teardown()
         self._torndown = True
 
@@ -156,11 +267,9 @@ class GameState:
         setattr(self, attr, getattr(self, attr, 0) + 1)
 
         if f"{self.current_phase}_limit" in TIMERS:
-            TIMERS[f"{self.current_phase}_limit"][0].cancel()
-            del TIMERS[f"{self.current_phase}_limit"]
+            TIMERS.pop(f"{self.current_phase}_limit").cancel()
         if f"{self.current_phase}_warn" in TIMERS:
-            TIMERS[f"{self.current_phase}_warn"][0].cancel()
-            del TIMERS[f"{self.current_phase}_warn"]
+            TIMERS.pop(f"{self.current_phase}_warn").cancel()
 
     def end_phase_transition(self, time_limit: int = 0, time_warn: int = 0, timer_cb=None, cb_args=()):
         from src.trans import TIMERS
@@ -172,16 +281,10 @@ class GameState:
         self.next_phase = None
         if config.Main.get("timers.enabled"):
             if time_limit:
-                timer = threading.Timer(time_limit, timer_cb, ("limit",) + tuple(cb_args))
-                timer.daemon = True
-                timer.start()
-                TIMERS[f"{self.current_phase}_limit"] = (timer, time.time(), time_limit)
+                TIMERS[f"{self.current_phase}_limit"] = schedule(time_limit, timer_cb, "limit", *cb_args)
 
             if time_warn:
-                timer = threading.Timer(time_warn, timer_cb, ("warn",) + tuple(cb_args))
-                timer.daemon = True
-                timer.start()
-                TIMERS[f"{self.current_phase}_warn"] = (timer, time.time(), time_warn)
+                TIMERS[f"{self.current_phase}_warn"] = schedule(time_warn, timer_cb, "warn", *cb_args)
 
     def extend_phase_limit(self, minimum: int = 0):
         """Ensure that the phase limit timer has a minimum amount of seconds remaining."""
@@ -189,14 +292,10 @@ class GameState:
         if minimum <= 0:
             return
         if config.Main.get("timers.enabled"):
-            (timer, started, limit) = TIMERS[f"{self.current_phase}_limit"]
-            elapsed = math.ceil(time.time() - started)
-            if elapsed + minimum > limit:
-                timer.cancel()
-                extended = threading.Timer(minimum, timer.function, timer.args, timer.kwargs)
-                extended.daemon = True
-                extended.start()
-                TIMERS[f"{self.current_phase}_limit"] = (extended, started, elapsed + minimum)
+            timer = TIMERS[f"{self.current_phase}_limit"]
+            # remaining() is 0 once the timer has fired, and reschedule then leaves it alone
+            if timer.remaining() < minimum:
+                timer.reschedule(minimum)
 
     @property
     def in_phase_transition(self):
@@ -303,9 +402,67 @@ class GameState:
         except AttributeError:
             return config.Main.get("timers.night.warn")
 
+    def get_main_role_players(self, roles: Optional[Iterable[str]] = None) -> set[User]:
+        """Get every player whose main role is one of the given roles, including dying players.
+
+        :param roles: Roles to look up, or None for every player with a main role
+        :returns: A new set of players
+        """
+        if roles is None:
+            return set(self.main_roles)
+        players: set[User] = set()
+        # there are usually far fewer distinct main roles in play than roles being asked for (e.g. categories)
+        for role, bucket in self._main_role_players.items():
+            if role in roles:
+                players.update(bucket)
+        return players
+
+    def get_role_players(self) -> set[User]:
+        """Get every player who has at least one role, including dying players.
+
+        :returns: A new set of players
+        """
+        return set(self._player_roles)
+
+    def get_player_roles(self, player: User) -> set[str]:
+        """Get all of a player's roles.
+
+        :param player: Player to look up
+        :returns: A new set of role names, which is empty if the player has no roles
+        """
+        return set(self._player_roles.get(player, ()))
+
+    def _state_changed(self):
+        self.state_version += 1
+
+    @property
+    def role_stats(self) -> RoleStats:
+        """The role compositions this game could currently have, as shown by !stats."""
+        return self._rolestats
+
     def get_role_stats(self) -> frozenset[frozenset[tuple[str, int]]]:
-        return frozenset(self._rolestats)
+        return self._rolestats.as_frozensets()
+
+    def set_role_stats(self, value: RoleStats | Iterable) -> None:
+        if not isinstance(value, RoleStats):
+            value = RoleStats(value)
+        self._rolestats = value
+        self._state_changed()
+
+    def reconfigure_stats(self, reason: str) -> None:
+        """Give roles and modes an opportunity to adjust !stats.
+
+        The reconfigure_stats event is dispatched once for every distinct possible role composition.
+
+        :param reason: Why the stats are being adjusted (start, howl, or del_player)
+        """
+        from src.events import Event
+        evt = Event("reconfigure_stats", {"new": []})
+
+        def reconfigure(roleset: Counter[str]) -> list[Counter[str]]:
+            evt.data["new"] = [roleset]
+            evt.dispatch(self, roleset, reason)
+            return evt.data["new"]
 
-    def set_role_stats(self, value) -> None:
-        self._rolestats.clear()
-        self._rolestats.update(value)
+        self._rolestats = self._rolestats.transform(reconfigure)
+        self._state_changed()
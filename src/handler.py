@@ -2,7 +2,6 @@ from __future__ import annotations
 
 import base64
 import functools
-import threading
 import subprocess
 import platform
 import time
@@ -11,13 +10,14 @@ import sys
 from typing import Optional
 
 from oyoyo.client import IRCClient
-from src import channels, config, context, decorators, users
+from src import channels, config, context, decorators, journal, users
 from src.messages import messages
 from src.functions import get_participants, get_all_roles, match_role
 from src.dispatcher import MessageDispatcher
 from src.decorators import handle_error, command, hook
 from src.context import Features, NotLoggedIn
 from src.users import User
+from src.scheduler import schedule
 from src.events import Event, EventListener
 from src.transport.irc import get_services
 from src.channels import Channel
@@ -131,6 +131,10 @@ def parse_and_dispatch(wrapper: MessageDispatcher,
             wrapper.pm(messages["no_such_role"].format(role_prefix))
             return
 
+    if dispatch.game_state is not None and dispatch.game_state.in_game:
+        journal.record_command(dispatch.game_state, dispatch.source, key, message,
+                               public=dispatch.public, role=role_prefix, forced=force is not None)
+
     cmds: list[command] = []
     phase = dispatch.game_state.current_phase if dispatch.game_state else "none"
     if phase not in ("none", "join") and dispatch.source in get_participants(dispatch.game_state):
@@ -268,10 +272,10 @@ def connect_callback(cli: IRCClient):
         event = Event("irc_connected", {})
         event.dispatch(cli)
 
-        main_channel = config.Main.get("transports[0].channels.main")
+        main_channel = config.Main.get("transports[0].channels.main", frozen=True)
         channels.Main = channels.add(main_channel["name"], cli, key=main_channel["key"], prefix=main_channel["prefix"])
         channels.Dummy = channels.add("*", cli)
-        for channel in config.Main.get("transports[0].channels.alternate"):
+        for channel in config.Main.get("transports[0].channels.alternate", frozen=True):
             channels.add(channel["name"], cli, key=channel["key"], prefix=channel["prefix"])
 
         users.Bot.change_nick(nick)
@@ -280,9 +284,7 @@ def connect_callback(cli: IRCClient):
             def ping_server_timer(cli: IRCClient):
                 ping_server(cli)
 
-                t = threading.Timer(config.Main.get("transports[0].server_ping"), ping_server_timer, args=(cli,))
-                t.daemon = True
-                t.start()
+                schedule(config.Main.get("transports[0].server_ping"), ping_server_timer, cli)
 
             ping_server_timer(cli)
 
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Optional, TextIO, TYPE_CHECKING
+
+from src import config
+from src.cats import Category
+from src.containers import UserList
+from src.events import Event, event_listener
+from src.scheduler import get_scheduler
+from src.users import User
+
+if TYPE_CHECKING:
+    from src.gamestate import GameState
+
+__all__ = ["JOURNAL_VERSION", "GameJournal", "get_journal", "phase_id", "record_command", "record_leave", "finish"]
+
+JOURNAL_VERSION = 1
+
+class GameJournal:
+    """Record everything needed to replay a game, as one JSON object per line.
+
+    The first line describes the game: its mode and options, RNG seed and players in join order. Each following line
+    is a command or departure from one of those players, identified by their index in the join order and
+    stamped with the phase it happened in and the number of seconds since the game started, as measured on
+    the scheduler's clock. The last line records the winner, unless the game was stopped without one.
+
+    :param file: File to write the journal to; it is closed along with the journal
+    :param var: Game to record
+    """
+    def __init__(self, file: TextIO, var: GameState):
+        self.file = file
+        self.game_id = var.game_id
+        self.players = UserList(var.players)
+        self._start = get_scheduler().clock()
+        mode = var.current_mode
+        self._write({
+            "type": "game",
+            "version": JOURNAL_VERSION,
+            "mode": "{0}={1}".format(mode.name, mode.arg) if mode.arg else mode.name,
+            "seed": var.rng_seed.hex(),
+            # set iteration order depends on string hashing, so it is needed to replay the game exactly
+            "hashseed": os.environ.get("PYTHONHASHSEED"),
+            "players": [player.nick for player in self.players],
+            "options": {
+                "role reveal": var.role_reveal,
+                "stats": var.stats_type,
+                "abstain": "on" if var.abstain_enabled and not var.limit_abstain else "restricted" if var.abstain_enabled else "off",
+            },
+            "started": var.game_id,
+        })
+
+    def _write(self, record: dict[str, Any]):
+        self.file.write(json.dumps(record, separators=(",", ":")))
+        self.file.write("\n")
+        self.file.flush()
+
+    def _event(self, var: GameState, kind: str, user: User, **data: Any):
+        self._write({
+            "type": kind,
+            "t": round(get_scheduler().clock() - self._start, 3),
+            "phase": phase_id(var),
+            "player": self.players.index(user),
+            **data,
+        })
+
+    def command(self, var: GameState, user: User, key: str, message: str, *,
+                public: bool, role: Optional[str] = None, forced: bool = False):
+        """Record a command sent by a player.
+
+        :param var: The game
+        :param user: Player who sent the command
+        :param key: Command name, without the command prefix or role prefix
+        :param message: Command arguments
+        :param public: Whether the command was sent to the channel instead of in private
+        :param role: Role prefix the command was sent with, if any
+        :param forced: Whether an admin forced the player to run the command
+        """
+        data: dict[str, Any] = {"key": key, "message": message, "public": public}
+        if role is not None:
+            data["role"] = role
+        if forced:
+            data["forced"] = True
+        self._event(var, "command", user, **data)
+
+    def leave(self, var: GameState, user: User, what: str):
+        """Record a player leaving the channel or the server.
+
+        :param var: The game
+        :param user: Player who left
+        :param what: How they left (part, kick or quit)
+        """
+        self._event(var, "leave", user, what=what)
+
+    def close(self, winner: Optional[Category] = None):
+        """Stop recording, noting the winner of the game if it has one.
+
+        :param winner: Team which won the game
+        """
+        if winner is not None:
+            self._write({"type": "end", "t": round(get_scheduler().clock() - self._start, 3), "winner": str(winner)})
+        self.file.close()
+        self.players.clear()
+
+_journal: Optional[GameJournal] = None
+
+def get_journal() -> Optional[GameJournal]:
+    """Get the journal of the game in progress, or None if it isn't being recorded."""
+    return _journal
+
+def phase_id(var: GameState) -> str:
+    """Get a name for the current phase which is unique within the game, such as night1 or day2."""
+    if var.current_phase == "night":
+        return "night{0}".format(var.night_count)
+    if var.current_phase == "day":
+        return "day{0}".format(var.day_count)
+    return var.current_phase
+
+def record_command(var: Optional[GameState], user: User, key: str, message: str, *,
+                   public: bool, role: Optional[str] = None, forced: bool = False):
+    """Record a command in the journal, if the game is being recorded and the user is playing in it."""
+    if _journal is not None and var is not None and var.game_id == _journal.game_id and user in _journal.players:
+        _journal.command(var, user, key, message, public=public, role=role, forced=forced)
+
+def record_leave(var: Optional[GameState], user: User, what: str):
+    """Record a player leaving in the journal, if the game is being recorded and the user is playing in it."""
+    if _journal is not None and var is not None and var.game_id == _journal.game_id and user in _journal.players:
+        _journal.leave(var, user, what)
+
+def finish(var: GameState, winner: Category):
+    """Close the journal of a game which ended with a winner."""
+    global _journal
+    if _journal is not None and var.game_id == _journal.game_id:
+        _journal.close(winner)
+        _journal = None
+
+@event_listener("start_game", priority=1)
+def on_start_game(evt: Event, var: GameState, mode_name: str, mode):
+    global _journal
+    if _journal is not None:
+        _journal.close()
+        _journal = None
+    if not config.Main.get("debug.journal.enabled"):
+        return
+    directory = Path(__file__).parent.parent / config.Main.get("debug.journal.directory")
+    file = directory / "game-{0}-{1:03d}.jsonl".format(time.strftime("%Y%m%d-%H%M%S", time.gmtime(var.game_id)),
+                                                       int(var.game_id % 1 * 1000))
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+        _journal = GameJournal(open(file, "wt", encoding="utf-8"), var)
+    except OSError:
+        logging.getLogger("general").exception("Unable to write game journal to {0}", file)
+
+@event_listener("reset")
+def on_reset(evt: Event, var: GameState):
+    global _journal
+    if _journal is not None:
+        _journal.close()
+        _journal = None
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import collections.abc
+import functools
 import time
 import json
 import logging
@@ -15,7 +16,7 @@ from pathlib import Path
 from src import config
 
 __all__ = ["UnionFilterMixin", "StreamHandler", "FileHandler", "RotatingFileHandler", "TimedRotatingFileHandler",
-           "IRCTransportHandler", "StringFormatter", "StructuredFormatter", "LogRecord", "init"]
+           "IRCTransportHandler", "StringFormatter", "StructuredFormatter", "LogRecord", "init", "is_enabled_for"]
 
 class UnionFilterMixin(logging.Filterer):
     # Change filter logic so that we log as long as one of the provided filters succeeds.
@@ -62,6 +63,7 @@ class IRCTransportHandler(UnionFilterMixin, logging.Handler):
         self.destination = destination
 
     def emit(self, record: logging.LogRecord) -> None:
+        from oyoyo.client import PRIORITY_ADMIN
         from src import channels
         from src.context import Features
         line = self.format(record)
@@ -72,7 +74,7 @@ class IRCTransportHandler(UnionFilterMixin, logging.Handler):
             channel = self.destination[1:]
         chan = channels.get(channel)
         if chan is not None:
-            chan.send(line, prefix=prefix)
+            chan.send(line, prefix=prefix, priority=PRIORITY_ADMIN)
 
     def format(self, record: logging.LogRecord) -> str:
         # When sending to IRC, only send the first line
@@ -150,7 +152,35 @@ class _ThrowingFormatter(string.Formatter):
         if expected_args - found_args or expected_kwargs - found_kwargs:
             raise TypeError("not all arguments converted during string formatting")
 
+@functools.lru_cache(maxsize=None)
+def is_enabled_for(name: str, level: int) -> bool:
+    """
+    Check whether a record logged at the given level would be emitted by any handler.
+
+    Handlers are attached to the root logger and filter records by logger name,
+    so Logger.isEnabledFor() alone is always true. Results are cached until init() is called again.
+
+    :param name: Logger name, such as "transport.irc"
+    :param level: Logging level
+    :returns: True if at least one handler would emit the record
+    """
+    log = logging.getLogger(name)
+    if not log.isEnabledFor(level):
+        return False
+
+    record = logging.LogRecord(name, level, "", 0, "", (), None)
+    current: logging.Logger | None = log
+    while current is not None:
+        for handler in current.handlers:
+            if level >= handler.level and handler.filter(record):
+                return True
+        if not current.propagate:
+            break
+        current = current.parent
+    return False
+
 def init():
+    is_enabled_for.cache_clear()
     gl = config.Main.get("logging.groups")
     groups = {}
     for g in gl:
@@ -2,10 +2,11 @@ from __future__ import annotations
 
 import json
 import os
+import time
 from typing import Optional
 
 from src import config
-from src.messages.message import Message
+from src.messages.message import Message, compile_message
 
 MESSAGES_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "messages")
 ROOT_DIR = os.path.join(os.path.dirname(__file__), "..", "..")
@@ -47,6 +48,44 @@ class Messages:
 
         return m
 
+    def precompile(self) -> list[tuple[str, Optional[int], float]]:
+        """ Compile every message in the catalog ahead of time.
+
+        This covers every string and list entry after fallback languages and messages.json
+        overrides have been merged in. Metadata keys (those beginning with an underscore)
+        are data rather than message strings and are skipped.
+
+        :return: A list of (key, list index or None, seconds taken to compile), slowest first
+        :raises ValueError: If any message is ill-formed. All errors are collected before raising.
+        """
+        timings = []
+        errors = []
+        for key, value in self.messages.items():
+            if key.startswith("_"):
+                continue
+            if isinstance(value, list):
+                entries = list(enumerate(value))
+            else:
+                entries = [(None, value)]
+            for index, entry in entries:
+                if not isinstance(entry, str):
+                    errors.append("{0}{1}: expected str, got {2}".format(
+                        key, "" if index is None else "[{0}]".format(index), type(entry).__name__))
+                    continue
+                start = time.perf_counter()
+                try:
+                    compile_message(key, index, entry)
+                except (RuntimeError, ValueError) as e:
+                    errors.append(str(e))
+                    continue
+                timings.append((key, index, time.perf_counter() - start))
+
+        if errors:
+            raise ValueError("{0} ill-formed message(s) in {1}:\n{2}".format(len(errors), self.lang, "\n".join(errors)))
+
+        timings.sort(key=lambda x: x[2], reverse=True)
+        return timings
+
     def get_role_mapping(self, reverse: bool = False, remove_spaces: bool = False) -> dict[str, str]:
         """ Retrieve a mapping between internal role names and localized role names.
 
@@ -141,6 +180,8 @@ class Messages:
         return totems
 
     def _load_messages(self):
+        # previously compiled templates may no longer match the messages we're about to load
+        compile_message.cache_clear()
         with open(os.path.join(MESSAGES_DIR, self.lang + ".json"), encoding="utf-8") as f:
             self.messages = json.load(f)
 
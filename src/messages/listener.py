@@ -1,60 +1,46 @@
 from antlr4 import TerminalNode
-from typing import Optional
 
 from src.messages.message_parserListener import message_parserListener
 from src.messages.message_parser import message_parser
+from src.messages.template import Template, Sub, Tag, Fragments
 
 class Listener(message_parserListener):
-    def __init__(self, message, args, kwargs):
+    """ Walk a message parse tree and compile it into a Template.
+
+    No formatting happens here; the resulting Template is resolved against args and kwargs
+    every time the message is formatted, so it can be cached and reused.
+    """
+    def __init__(self, key, formatter):
         super().__init__()
         self._value = None
         self.nest_level = 0
-        self.used_args = set()
-        self.message = message
-        self.args = args
-        self.kwargs = kwargs
+        self.key = key
+        self.formatter = formatter
 
-    def value(self):
+    def value(self) -> Template:
         if self._value is None:
-            raise ValueError("Parse error: {}: Unexpected end of message".format(self.message.key))
+            raise ValueError("Parse error: {}: Unexpected end of message".format(self.key))
         return self._value
 
-    def _join_fragments(self, fragments, *, enforce_string=False):
-        # fragments is typically a generator function but we need to access values multiple times
-        fragment_list = list(fragments)
-
-        bits = []
-        for node in fragment_list:
-            if isinstance(node, TerminalNode):
-                bits.append(node.getText())
+    def _fragments(self, children) -> Fragments:
+        # children is typically a generator function; adjacent literal text is merged together
+        frags = []
+        for node in children:
+            value = node.getText() if isinstance(node, TerminalNode) else node.value
+            if isinstance(value, str) and frags and isinstance(frags[-1], str):
+                frags[-1] += value
             else:
-                bits.append(node.value)
-
-        if not enforce_string and len(bits) == 1:
-            return bits[0]
+                frags.append(value)
 
-        return "".join(str(x) for x in bits)
-
-    def _coalesce(self, *args, default=None):
-        for thing in args:
-            if thing is None:
-                continue
-            if isinstance(thing, TerminalNode):
-                return thing.getText()
-            return thing.value
-
-        return default
+        return tuple(frags)
 
     def exitMain(self, ctx: message_parser.MainContext):
-        self._value = ctx.string().value
-        self.message.formatter.check_unused_args(self.used_args, self.args, self.kwargs)
+        self._value = Template(self.key, ctx.string().value)
 
     def exitString(self, ctx: message_parser.StringContext):
-        ctx.value = self._join_fragments(ctx.getChildren(), enforce_string=True)
+        ctx.value = self._fragments(ctx.getChildren())
 
     def exitTag(self, ctx: message_parser.TagContext):
-        # to resolve a tag, we call the relevant function on our formatter, passing in the
-        # parameter (if any) and tag content
         tag_name, param = ctx.open_tag().value  # param may be None
         content = ctx.string().value
         close_name = ctx.close_tag().value
@@ -62,24 +48,25 @@ class Listener(message_parserListener):
         if tag_name != close_name:
             # mismatch of tag names
             raise ValueError("Parse error: {}: Opening tag {} ({}) does not match closing tag {} ({})".format(
-                             self.message.key, tag_name, ctx.open_tag().OPEN_TAG().getSymbol().column,
+                             self.key, tag_name, ctx.open_tag().OPEN_TAG().getSymbol().column,
                              close_name, ctx.close_tag().CLOSE_TAG().getSymbol().column))
 
-        tag_func = getattr(self.message.formatter, "tag_" + tag_name, None)
+        tag_func = getattr(self.formatter, "tag_" + tag_name, None)
         if not tag_func or not callable(tag_func):
             raise ValueError("Parse error: {}: Unknown tag {} ({})".format(
-                             self.message.key, tag_name, ctx.open_tag().OPEN_TAG().getSymbol().column))
+                             self.key, tag_name, ctx.open_tag().OPEN_TAG().getSymbol().column))
 
-        ctx.value = tag_func(content, param)
+        ctx.value = Tag(tag_name, param, content)
 
     def exitOpen_tag(self, ctx: message_parser.Open_tagContext):
-        ctx.value = (ctx.TAG_NAME().getText(), self._coalesce(ctx.tag_param()))
+        param = ctx.tag_param()
+        ctx.value = (ctx.TAG_NAME().getText(), param.value if param is not None else None)
 
     def exitTag_param(self, ctx: message_parser.Tag_paramContext):
-        ctx.value = self._join_fragments(ctx.tag_param_frag())
+        ctx.value = self._fragments(ctx.tag_param_frag())
 
     def exitTag_param_frag(self, ctx: message_parser.Tag_param_fragContext):
-        ctx.value = self._coalesce(ctx.sub(), ctx.TAG_PARAM())
+        ctx.value = ctx.sub().value if ctx.sub() is not None else ctx.TAG_PARAM().getText()
 
     def exitClose_tag(self, ctx: message_parser.Close_tagContext):
         ctx.value = ctx.TAG_NAME().getText()
@@ -89,32 +76,19 @@ class Listener(message_parserListener):
 
     def exitSub(self, ctx: message_parser.SubContext):
         self.nest_level -= 1
+        # lists are only flattened for top-level substitutions; nested ones pass lists up to their parent
         flatten_lists = self.nest_level == 0
-
-        field_name = ctx.sub_field().value
-        convert = self._coalesce(ctx.sub_convert())
-        spec: Optional[dict] = dict(x.value for x in ctx.sub_spec())
-        # if spec is empty, change it to None. Makes us more consistent with built in format method
-        # (since formatter can be used for both this parse tree as well as normal formatting)
-        if not spec:
-            spec = None
-
-        # get_field internally calls get_value(), and then resolves attributes/indexes like 0.foo or 1[2]
-        # the returned obj is end result of resolving all of that
-        obj, key = self.message.formatter.get_field(field_name, self.args, self.kwargs)
-        self.used_args.add(key)
-        obj = self.message.formatter.convert_field(obj, convert)
-        obj = self.message.formatter.format_field(obj, spec, flatten_lists=flatten_lists)
-
-        # obj is not necessarily a string here; we support passing objects through until the point where we need
-        # to concatenate them with other things (at which point we coerce to string)
-        ctx.value = obj
+        convert = ctx.sub_convert()
+        ctx.value = Sub(ctx.sub_field().value,
+                        convert.value if convert is not None else None,
+                        tuple(x.value for x in ctx.sub_spec()),
+                        flatten_lists)
 
     def exitSub_field(self, ctx: message_parser.Sub_fieldContext):
-        ctx.value = self._join_fragments(ctx.sub_field_frag())
+        ctx.value = self._fragments(ctx.sub_field_frag())
 
     def exitSub_field_frag(self, ctx: message_parser.Sub_field_fragContext):
-        ctx.value = self._coalesce(ctx.sub(), ctx.SUB_FIELD())
+        ctx.value = ctx.sub().value if ctx.sub() is not None else ctx.SUB_FIELD().getText()
 
     def exitSub_convert(self, ctx: message_parser.Sub_convertContext):
         ctx.value = ctx.SUB_IDENTIFIER().getText()
@@ -123,19 +97,20 @@ class Listener(message_parserListener):
         ctx.value = ctx.spec_value().value
 
     def exitSpec_value(self, ctx: message_parser.Spec_valueContext):
-        ctx.value = self._coalesce(ctx.spec_func(), ctx.spec_literal())
+        func = ctx.spec_func()
+        ctx.value = func.value if func is not None else ctx.spec_literal().value
 
     def exitSpec_literal(self, ctx: message_parser.Spec_literalContext):
-        ctx.value = (self._join_fragments(ctx.spec_literal_frag(), enforce_string=True), None)
+        ctx.value = (self._fragments(ctx.spec_literal_frag()), None)
 
     def exitSpec_literal_frag(self, ctx: message_parser.Spec_literal_fragContext):
-        ctx.value = self._coalesce(ctx.sub(), ctx.SPEC_VALUE())
+        ctx.value = ctx.sub().value if ctx.sub() is not None else ctx.SPEC_VALUE().getText()
 
     def exitSpec_func(self, ctx: message_parser.Spec_funcContext):
-        ctx.value = (ctx.SPEC_VALUE().getText(), ctx.spec_func_arg().value)
+        ctx.value = ((ctx.SPEC_VALUE().getText(),), ctx.spec_func_arg().value)
 
     def exitSpec_func_arg(self, ctx: message_parser.Spec_func_argContext):
-        ctx.value = self._join_fragments(ctx.spec_func_arg_frag())
+        ctx.value = self._fragments(ctx.spec_func_arg_frag())
 
     def exitSpec_func_arg_frag(self, ctx: message_parser.Spec_func_arg_fragContext):
-        ctx.value = self._coalesce(ctx.sub(), ctx.ARGLIST_VALUE())
+        ctx.value = ctx.sub().value if ctx.sub() is not None else ctx.ARGLIST_VALUE().getText()
@@ -1,4 +1,7 @@
+import functools
 import random
+from typing import Optional
+
 from antlr4 import InputStream, CommonTokenStream, ParseTreeWalker
 from antlr4.error.ErrorListener import ErrorListener
 
@@ -7,8 +10,40 @@ from src.messages import message_formatter
 from src.messages.lexer import Lexer
 from src.messages.parser import Parser
 from src.messages.listener import Listener
+from src.messages.template import Template
+
+__all__ = ["Message", "compile_message"]
+
+# There are around 1200 message strings in en.json; this comfortably holds all of them
+# along with ad-hoc messages such as LocalRole lookups
+COMPILE_CACHE_SIZE = 2048
+
+@functools.lru_cache(maxsize=COMPILE_CACHE_SIZE)
+def compile_message(key: str, index: Optional[int], value: str) -> Template:
+    """Compile a message value into a reusable Template.
+
+    Results are cached per (key, list index); the value is part of the cache key as well
+    so that different languages or ad-hoc messages sharing a key never collide.
+    The cache is cleared whenever a message catalog is (re)loaded.
 
-__all__ = ["Message"]
+    :param key: Message key, used in error messages
+    :param index: List index of the value, or None if the message is not a list
+    :param value: Message string to compile
+    :return: Compiled template
+    :raises RuntimeError: If the message is ill-formed
+    """
+    error_listener = MessageErrorListener()
+    input_stream = InputStream(value)
+    lexer = Lexer(key, input_stream)
+    lexer.addErrorListener(error_listener)
+    token_stream = CommonTokenStream(lexer)
+    parser = Parser(key, token_stream)
+    parser.addErrorListener(error_listener)
+    tree = parser.main()
+    listener = Listener(key, message_formatter)
+    walker = ParseTreeWalker()
+    walker.walk(listener, tree)
+    return listener.value()
 
 
 class Message:
@@ -23,11 +58,12 @@ class Message:
         self.key = key
         if isinstance(value, list):
             if index is None:
-                self.value = random.choice(value)
-            else:
-                self.value = value[index]
+                index = random.randrange(len(value))
+            self.value = value[index]
         else:
+            index = None
             self.value = value
+        self.index = index
         self.formatter = message_formatter
 
     def __str__(self):
@@ -41,18 +77,8 @@ class Message:
 
     def format(self, *args, **kwargs) -> str:
         try:
-            error_listener = MessageErrorListener()
-            input_stream = InputStream(self.value)
-            lexer = Lexer(self.key, input_stream)
-            lexer.addErrorListener(error_listener)
-            token_stream = CommonTokenStream(lexer)
-            parser = Parser(self.key, token_stream)
-            parser.addErrorListener(error_listener)
-            tree = parser.main()
-            listener = Listener(self, args, kwargs)
-            walker = ParseTreeWalker()
-            walker.walk(listener, tree)
-            return listener.value()
+            template = compile_message(self.key, self.index, self.value)
+            return template.render(self.formatter, args, kwargs)
         except Exception as e:
             if not config.Main.get("debug.enabled") or not config.Main.get("debug.messages.nothrow"):
                 raise
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+from typing import Any, Optional, Sequence, Union
+
+__all__ = ["Template", "Sub", "Tag", "Fragments", "RenderState"]
+
+# A fragment is either literal text or a node which must be resolved at format time
+Fragment = Union[str, "Sub", "Tag"]
+Fragments = tuple[Fragment, ...]
+
+class RenderState:
+    """ Per-call state used while rendering a compiled template. """
+    __slots__ = ("formatter", "args", "kwargs", "used_args")
+
+    def __init__(self, formatter, args: Sequence[Any], kwargs: dict[str, Any]):
+        self.formatter = formatter
+        self.args = args
+        self.kwargs = kwargs
+        self.used_args: set = set()
+
+def render_fragments(fragments: Fragments, state: RenderState, *, enforce_string: bool = False):
+    """ Resolve a sequence of fragments in document order.
+
+    If enforce_string is False and there is exactly one fragment, its value is returned as-is
+    (which may not be a str). Otherwise, every value is coerced to str and concatenated.
+    """
+    bits = [x if isinstance(x, str) else x.render(state) for x in fragments]
+    if not enforce_string and len(bits) == 1:
+        return bits[0]
+
+    return "".join(str(x) for x in bits)
+
+class Sub:
+    """ A substitution such as {0!role:plural(2)}. """
+    __slots__ = ("field", "convert", "specs", "flatten_lists")
+
+    def __init__(self,
+                 field: Fragments,
+                 convert: Optional[str],
+                 specs: tuple[tuple[Fragments, Optional[Fragments]], ...],
+                 flatten_lists: bool):
+        self.field = field
+        self.convert = convert
+        # each spec is either (literal, None) or (function name, argument)
+        self.specs = specs
+        self.flatten_lists = flatten_lists
+
+    def render(self, state: RenderState):
+        field_name = render_fragments(self.field, state)
+        spec: Optional[dict] = {}
+        for name, arg in self.specs:
+            spec_name = render_fragments(name, state, enforce_string=True)
+            spec[spec_name] = render_fragments(arg, state) if arg is not None else None
+        # if spec is empty, change it to None. Makes us more consistent with built in format method
+        # (since formatter can be used for both this parse tree as well as normal formatting)
+        if not spec:
+            spec = None
+
+        # get_field internally calls get_value(), and then resolves attributes/indexes like 0.foo or 1[2]
+        # the returned obj is end result of resolving all of that
+        formatter = state.formatter
+        obj, key = formatter.get_field(field_name, state.args, state.kwargs)
+        state.used_args.add(key)
+        obj = formatter.convert_field(obj, self.convert)
+        # obj is not necessarily a string here; we support passing objects through until the point where we need
+        # to concatenate them with other things (at which point we coerce to string)
+        return formatter.format_field(obj, spec, flatten_lists=self.flatten_lists)
+
+class Tag:
+    """ A tag such as [b]text[/b] or [if={0}]text[/if]. """
+    __slots__ = ("name", "param", "content")
+
+    def __init__(self, name: str, param: Optional[Fragments], content: Fragments):
+        self.name = name
+        self.param = param
+        self.content = content
+
+    def render(self, state: RenderState):
+        param = render_fragments(self.param, state) if self.param is not None else None
+        content = render_fragments(self.content, state, enforce_string=True)
+        return getattr(state.formatter, "tag_" + self.name)(content, param)
+
+class Template:
+    """ A message value compiled into literal text and substitution/tag nodes.
+
+    Templates hold no per-call state and can be rendered any number of times.
+    """
+    __slots__ = ("key", "fragments", "_literal")
+
+    def __init__(self, key: str, fragments: Fragments):
+        self.key = key
+        self.fragments = fragments
+        # messages without any substitutions or tags don't need to be resolved at all
+        self._literal: Optional[str] = None
+        if all(isinstance(x, str) for x in fragments):
+            self._literal = "".join(fragments) # type: ignore
+
+    def render(self, formatter, args: Sequence[Any], kwargs: dict[str, Any]) -> str:
+        state = RenderState(formatter, args, kwargs)
+        if self._literal is not None:
+            value = self._literal
+        else:
+            value = render_fragments(self.fragments, state, enforce_string=True)
+        formatter.check_unused_args(state.used_args, args, kwargs)
+        return value
@@ -3,7 +3,6 @@ from __future__ import annotations
 from collections import defaultdict, Counter
 from datetime import datetime, timedelta
 
-import threading
 import itertools
 import time
 import math
@@ -20,6 +19,8 @@ from src.events import Event, event_listener
 from src.cats import All
 from src import config, channels, locks, reaper, users
 from src.users import User
+from src.scheduler import schedule
+from src.rolestats import RoleStats
 from src.dispatcher import MessageDispatcher
 from src.channels import Channel
 from src.locations import Location, set_home
@@ -120,8 +121,7 @@ def retract(wrapper: MessageDispatcher, message: str):
                 wrapper.send(messages["start_retract"].format(wrapper.source))
 
                 if not START_VOTES:
-                    TIMERS["start_votes"][0].cancel()
-                    del TIMERS["start_votes"]
+                    TIMERS.pop("start_votes").cancel()
 
 @event_listener("del_player")
 def on_del_player(evt: Event, var: GameState, player: User, all_roles: set[str], death_triggers: bool):
@@ -134,8 +134,7 @@ def on_del_player(evt: Event, var: GameState, player: User, all_roles: set[str],
 
             # Cancel the start vote timer if there are no votes left
             if not START_VOTES and "start_votes" in TIMERS:
-                TIMERS["start_votes"][0].cancel()
-                del TIMERS["start_votes"]
+                TIMERS.pop("start_votes").cancel()
 
 def start(wrapper: MessageDispatcher, *, forced: bool = False):
     from src.trans import stop_game, ADMIN_STOPPED, TIMERS
@@ -190,10 +189,7 @@ def start(wrapper: MessageDispatcher, *, forced: bool = False):
 
                 # If this was the first vote
                 if len(START_VOTES) == 1:
-                    t = threading.Timer(60, expire_start_votes, (pregame_state, wrapper.target))
-                    TIMERS["start_votes"] = (t, time.time(), 60)
-                    t.daemon = True
-                    t.start()
+                    TIMERS["start_votes"] = schedule(60, expire_start_votes, pregame_state, wrapper.target)
                 return
 
     if pregame_state.current_mode is None:
@@ -299,16 +295,16 @@ def start(wrapper: MessageDispatcher, *, forced: bool = False):
         for r in toadd:
             addroles[r] += 1
             roleset_roles[r] += 1
-        add_rolesets = []
-        temp_rolesets = []
-        for c in itertools.combinations(rs.elements(), amt):
-            add_rolesets.append(Counter(c))
+        # combinations of the roleset's elements repeat whenever a role appears more than once,
+        # so only keep each distinct outcome (and each distinct cross product of outcomes) once
+        add_rolesets = {frozenset(Counter(c).items()) for c in itertools.combinations(rs.elements(), amt)}
+        temp_rolesets = {}
         for pr in possible_rolesets:
             for ar in add_rolesets:
                 temp = Counter(pr)
-                temp.update(ar)
-                temp_rolesets.append(temp)
-        possible_rolesets = temp_rolesets
+                temp.update(dict(ar))
+                temp_rolesets[frozenset(temp.items())] = temp
+        possible_rolesets = list(temp_rolesets.values())
 
     if ADMIN_STOPPED:
         for decor in (COMMANDS["join"] + COMMANDS["start"]):
@@ -364,16 +360,8 @@ def start(wrapper: MessageDispatcher, *, forced: bool = False):
             pr[ingame_state.default_role] += len(vils)
 
     # Collapse possible_rolesets into global role stats
-    # which is a frozenset[frozenset[tuple[str, int]]]
-    possible_rolesets_set = set()
-    event = Event("reconfigure_stats", {"new": []})
-    for pr in possible_rolesets:
-        event.data["new"] = [pr]
-        event.dispatch(ingame_state, pr, "start")
-        for v in event.data["new"]:
-            if min(v.values()) >= 0:
-                possible_rolesets_set.add(frozenset(v.items()))
-    ingame_state.set_role_stats(possible_rolesets_set)
+    ingame_state.set_role_stats(RoleStats(possible_rolesets))
+    ingame_state.reconfigure_stats("start")
 
     # Now for the secondary roles
     for role, dfn in ingame_state.current_mode.SECONDARY_ROLES.items():
@@ -442,8 +430,7 @@ def start(wrapper: MessageDispatcher, *, forced: bool = False):
     with locks.join_timer: # cancel timers
         for name in ("join", "join_pinger", "start_votes"):
             if name in TIMERS:
-                TIMERS[name][0].cancel()
-                del TIMERS[name]
+                TIMERS.pop(name).cancel()
 
     for role, players in ingame_state.roles.items():
         for player in players:
@@ -497,10 +484,8 @@ def start(wrapper: MessageDispatcher, *, forced: bool = False):
 
     if config.Main.get("reaper.enabled"):
         # DEATH TO IDLERS!
-        from src.reaper import reaper
-        reapertimer = threading.Thread(None, reaper, args=(ingame_state, ingame_state.game_id))
-        reapertimer.daemon = True
-        reapertimer.start()
+        from src.reaper import start_reaper
+        start_reaper(ingame_state)
 
 def _command_disabled(wrapper: MessageDispatcher, message: str):
     wrapper.send(messages["command_disabled_admin"])
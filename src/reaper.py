@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import time
 from datetime import datetime, timedelta
 from typing import Optional
 
@@ -15,6 +14,7 @@ from src.status import add_dying, kill_players
 from src.events import Event, event_listener
 from src.debug import handle_error
 from src.users import User
+from src.scheduler import ScheduledCall, schedule
 from src import config, locks, users, channels
 
 LAST_SAID_TIME = UserDict()
@@ -24,117 +24,167 @@ IDLE_WARNED_PM = UserSet()
 DCED_LOSERS = UserSet()
 NIGHT_IDLED = UserSet()
 
+# next time each player needs to be looked at for idling; only the earliest deadline is actually scheduled
+_IDLE_DEADLINES: UserDict[User, datetime] = UserDict()
+_TIMER: Optional[ScheduledCall] = None
+# when idle time stopped counting because night began (only if gameplay.nightchat is disabled)
+_PAUSED: Optional[datetime] = None
+
+def start_reaper(var: GameState):
+    """Begin tracking idle and disconnected players for a game which just started.
+
+    :param var: Game state
+    """
+    global _PAUSED
+    now = datetime.now()
+    for user in get_players(var):
+        LAST_SAID_TIME.setdefault(user, now)
+        _update_idle_deadline(user)
+    if not config.Main.get("gameplay.nightchat") and "night" in (var.current_phase, var.next_phase):
+        _PAUSED = now
+    _schedule_reaper(var)
+
+def mark_disconnected(var: GameState, user: User, what: str):
+    """Give a player who left or disconnected the configured grace period to return.
+
+    :param var: Game state
+    :param user: Player who disconnected
+    :param what: Kind of disconnect (quit, part, or account)
+    """
+    with locks.reaper:
+        DISCONNECTED[user] = (datetime.now(), what)
+        if _TIMER is not None:
+            _schedule_reaper(var)
+
+def _update_idle_deadline(user: User):
+    """Work out when a player will next need to be warned or killed for idling, based on the current config."""
+    _IDLE_DEADLINES.pop(user, None)
+    if user.is_fake or not config.Main.get("reaper.idle.enabled"):
+        return
+    lst = LAST_SAID_TIME[user]
+    warn_channel = config.Main.get("reaper.idle.warn.channel")
+    warn_private = config.Main.get("reaper.idle.warn.private")
+    grace = config.Main.get("reaper.idle.grace")
+    if warn_channel and user not in IDLE_WARNED:
+        _IDLE_DEADLINES[user] = lst + timedelta(seconds=warn_channel)
+    elif warn_private and user not in IDLE_WARNED_PM:
+        _IDLE_DEADLINES[user] = lst + timedelta(seconds=warn_private)
+    elif grace:
+        _IDLE_DEADLINES[user] = lst + timedelta(seconds=grace)
+
+def _schedule_reaper(var: GameState, delay: Optional[float] = None):
+    """(Re)schedule the reaper to run when the earliest idle or disconnect deadline passes."""
+    global _TIMER
+    if delay is None:
+        deadlines = []
+        if _PAUSED is None and _IDLE_DEADLINES:
+            deadlines.append(min(_IDLE_DEADLINES.values()))
+        for timeofdc, what in DISCONNECTED.values():
+            # config used: reaper.quit.enabled, reaper.part.enabled, reaper.account.enabled
+            if config.Main.get(f"reaper.{what}.enabled"):
+                deadlines.append(timeofdc + timedelta(seconds=config.Main.get(f"reaper.{what}.grace")))
+        if deadlines:
+            delay = (min(deadlines) - datetime.now()).total_seconds()
+
+    if delay is None:
+        if _TIMER is not None:
+            _TIMER.cancel()
+    elif _TIMER is None or not _TIMER.reschedule(delay):
+        _TIMER = schedule(delay, reaper, var, var.game_id)
+
 @handle_error
-def reaper(var: GameState, gameid: int):
+def reaper(var: GameState, gameid: float):
     # check to see if idlers need to be killed.
-    game_start_time = datetime.now()
-    last_day_id = var.day_count
-    num_night_iters = 0
-    short = False
-
-    while var.in_game and gameid == var.game_id:
-        skip = False
-        time.sleep(1 if short else 10)
-        short = False
-        with locks.reaper:
-            # Terminate reaper when game ends
-            if not var.in_game:
-                return
-            if var.in_phase_transition:
-                # in a phase transition, so don't run the reaper here or else things may break
-                # flag to re-run sooner than usual though
-                short = True
+    with locks.reaper:
+        # Terminate reaper when game ends
+        if not var.in_game or gameid != var.game_id:
+            return
+        if var.in_phase_transition:
+            # in a phase transition, so don't run the reaper here or else things may break
+            # re-run shortly after it has finished
+            _schedule_reaper(var, 1)
+            return
+
+        reveal = "_no_reveal"
+        if var.role_reveal in ("on", "team"):
+            reveal = ""
+
+        now = datetime.now()
+        for dcedplayer, (timeofdc, what) in list(DISCONNECTED.items()):
+            if not config.Main.get(f"reaper.{what}.enabled"):
                 continue
-            elif not config.Main.get("gameplay.nightchat"):
-                if var.current_phase == "night":
-                    # don't count nighttime towards idling
-                    # this doesn't do an exact count, but is good enough
-                    num_night_iters += 1
-                    skip = True
-                elif var.current_phase == "day" and var.day_count != last_day_id:
-                    last_day_id = var.day_count
-                    num_night_iters += 1
-                    for user in LAST_SAID_TIME:
-                        LAST_SAID_TIME[user] += timedelta(seconds=10 * num_night_iters)
-                    num_night_iters = 0
-
-            reveal = "_no_reveal"
-            if var.role_reveal in ("on", "team"):
-                reveal = ""
-
-            for dcedplayer, (timeofdc, what) in list(DISCONNECTED.items()):
-                revealrole = get_reveal_role(var, dcedplayer)
-                if not config.Main.get(f"reaper.{what}.enabled"):
-                    continue
-                if datetime.now() - timeofdc <= timedelta(seconds=config.Main.get(f"reaper.{what}.grace")):
+            if now - timeofdc <= timedelta(seconds=config.Main.get(f"reaper.{what}.grace")):
+                continue
+            revealrole = get_reveal_role(var, dcedplayer)
+            # config used: reaper.quit.grace, reaper.quit.points, reaper.quit.expiration,
+            # reaper.part.grace, reaper.part.points, reaper.part.expiration,
+            # reaper.account.grace, reaper.account.points, reaper.account.expiration
+            # message keys used: quit_death, quit_death_no_reveal, quit_warning,
+            # part_death, part_death_no_reveal, part_warning
+            # account_death, account_death_no_reveal, account_warning
+            channels.Main.send(messages[f"{what}_death{reveal}"].format(dcedplayer, revealrole))
+            if config.Main.get("reaper.autowarn") and var.current_phase != "join":
+                NIGHT_IDLED.discard(dcedplayer) # don't double-dip if they idled out night as well
+                add_warning(dcedplayer,
+                            config.Main.get(f"reaper.{what}.points"),
+                            users.Bot,
+                            messages[f"{what}_warning"],
+                            expires=config.Main.get(f"reaper.{what}.expiration"))
+            if var.in_game:
+                DCED_LOSERS.add(dcedplayer)
+            add_dying(var, dcedplayer, "bot", what, death_triggers=False)
+
+        # only players whose deadline passed need to be looked at; idle time doesn't count while paused
+        due = [user for user, deadline in _IDLE_DEADLINES.items() if deadline <= now] if _PAUSED is None else []
+        if due and config.Main.get("reaper.idle.enabled"):
+            to_warn:    set[User] = set()
+            to_warn_pm: set[User] = set()
+            to_kill:    set[User] = set()
+            warn_channel = config.Main.get("reaper.idle.warn.channel")
+            warn_private = config.Main.get("reaper.idle.warn.private")
+            grace = config.Main.get("reaper.idle.grace")
+            pl = get_players(var)
+            for user in due:
+                if user not in pl:
+                    del _IDLE_DEADLINES[user]
                     continue
-                # config used: reaper.quit.grace, reaper.quit.points, reaper.quit.expiration,
-                # reaper.part.grace, reaper.part.points, reaper.part.expiration,
-                # reaper.account.grace, reaper.account.points, reaper.account.expiration
-                # message keys used: quit_death, quit_death_no_reveal, quit_warning,
-                # part_death, part_death_no_reveal, part_warning
-                # account_death, account_death_no_reveal, account_warning
-                channels.Main.send(messages[f"{what}_death{reveal}"].format(dcedplayer, revealrole))
-                if config.Main.get("reaper.autowarn") and var.current_phase != "join":
-                    NIGHT_IDLED.discard(dcedplayer) # don't double-dip if they idled out night as well
-                    add_warning(dcedplayer,
-                                config.Main.get(f"reaper.{what}.points"),
-                                users.Bot,
-                                messages[f"{what}_warning"],
-                                expires=config.Main.get(f"reaper.{what}.expiration"))
+                tdiff = now - LAST_SAID_TIME[user]
+                if warn_channel and tdiff >= timedelta(seconds=warn_channel) and user not in IDLE_WARNED:
+                    to_warn.add(user)
+                    IDLE_WARNED.add(user)
+                    LAST_SAID_TIME[user] = (now - timedelta(seconds=warn_channel))  # Give them a chance
+                elif warn_private and tdiff >= timedelta(seconds=warn_private) and user not in IDLE_WARNED_PM:
+                    to_warn_pm.add(user)
+                    IDLE_WARNED_PM.add(user)
+                    LAST_SAID_TIME[user] = (now - timedelta(seconds=warn_private))
+                elif (grace and tdiff >= timedelta(seconds=grace) and
+                        (not warn_channel or user in IDLE_WARNED) and
+                        (not warn_private or user in IDLE_WARNED_PM)):
+                    to_kill.add(user)
+                _update_idle_deadline(user)
+            for user in to_kill:
+                _IDLE_DEADLINES.pop(user, None)
+                # keys used: idle_death, idle_death_no_reveal
+                channels.Main.send(messages[f"idle_death{reveal}"].format(user, get_reveal_role(var, user)))
                 if var.in_game:
-                    DCED_LOSERS.add(dcedplayer)
-                add_dying(var, dcedplayer, "bot", what, death_triggers=False)
-
-            if not skip and config.Main.get("reaper.idle.enabled"):  # only if enabled
-                to_warn:    set[User] = set()
-                to_warn_pm: set[User] = set()
-                to_kill:    set[User] = set()
-                for user in get_players(var):
-                    if user.is_fake:
-                        continue
-                    lst = LAST_SAID_TIME.get(user, game_start_time)
-                    tdiff = datetime.now() - lst
-                    if (config.Main.get("reaper.idle.warn.channel") and
-                            tdiff > timedelta(seconds=config.Main.get("reaper.idle.warn.channel")) and
-                            user not in IDLE_WARNED):
-                        to_warn.add(user)
-                        IDLE_WARNED.add(user)
-                        LAST_SAID_TIME[user] = (datetime.now() - timedelta(seconds=config.Main.get("reaper.idle.warn.channel")))  # Give them a chance
-                    elif (config.Main.get("reaper.idle.warn.private") and
-                            tdiff > timedelta(seconds=config.Main.get("reaper.idle.warn.private")) and
-                            user not in IDLE_WARNED_PM):
-                        to_warn_pm.add(user)
-                        IDLE_WARNED_PM.add(user)
-                        LAST_SAID_TIME[user] = (datetime.now() - timedelta(seconds=config.Main.get("reaper.idle.warn.private")))
-                    elif (config.Main.get("reaper.idle.grace") and
-                            tdiff > timedelta(seconds=config.Main.get("reaper.idle.grace")) and
-                            (not config.Main.get("reaper.idle.warn.channel") or user in IDLE_WARNED) and
-                            (not config.Main.get("reaper.idle.warn.private") or user in IDLE_WARNED_PM)):
-                        to_kill.add(user)
-                    elif tdiff < timedelta(seconds=config.Main.get("reaper.idle.warn.channel")) and (user in IDLE_WARNED or user in IDLE_WARNED_PM):
-                        IDLE_WARNED.discard(user)  # player saved themselves from death
-                        IDLE_WARNED_PM.discard(user)
-                for user in to_kill:
-                    # keys used: idle_death, idle_death_no_reveal
-                    channels.Main.send(messages[f"idle_death{reveal}"].format(user, get_reveal_role(var, user)))
-                    if var.in_game:
-                        DCED_LOSERS.add(user)
-                    if config.Main.get("reaper.autowarn") and config.Main.get("reaper.idle.enabled"):
-                        NIGHT_IDLED.discard(user) # don't double-dip if they idled out night as well
-                        add_warning(user, config.Main.get("reaper.idle.points"), users.Bot, messages["idle_warning"], expires=config.Main.get("reaper.idle.expiration"))
-                    add_dying(var, user, "bot", "idle", death_triggers=False)
-                pl = get_players(var)
-                x = [a for a in to_warn if a in pl]
-                if x:
-                    channels.Main.send(messages["channel_idle_warning"].format(x))
-                msg_targets = [p for p in to_warn_pm if p in pl]
-                for p in msg_targets:
-                    p.queue_message(messages["player_idle_warning"].format(channels.Main))
-                if msg_targets:
-                    User.send_messages()
-
-            kill_players(var)
+                    DCED_LOSERS.add(user)
+                if config.Main.get("reaper.autowarn"):
+                    NIGHT_IDLED.discard(user) # don't double-dip if they idled out night as well
+                    add_warning(user, config.Main.get("reaper.idle.points"), users.Bot, messages["idle_warning"], expires=config.Main.get("reaper.idle.expiration"))
+                add_dying(var, user, "bot", "idle", death_triggers=False)
+            pl = get_players(var)
+            x = [a for a in to_warn if a in pl]
+            if x:
+                channels.Main.send(messages["channel_idle_warning"].format(x))
+            msg_targets = [p for p in to_warn_pm if p in pl]
+            for p in msg_targets:
+                p.queue_message(messages["player_idle_warning"].format(channels.Main))
+            if msg_targets:
+                User.send_messages()
+
+        kill_players(var)
+        if var.in_game:
+            _schedule_reaper(var)
 
 @command("")  # update last said
 def update_last_said(wrapper: MessageDispatcher, message: str):
@@ -146,6 +196,20 @@ def update_last_said(wrapper: MessageDispatcher, message: str):
 
     if wrapper.game_state.in_game:
         LAST_SAID_TIME[wrapper.source] = datetime.now()
+        if wrapper.source in IDLE_WARNED or wrapper.source in IDLE_WARNED_PM or wrapper.source in _IDLE_DEADLINES:
+            # player saved themselves from death
+            with locks.reaper:
+                IDLE_WARNED.discard(wrapper.source)
+                IDLE_WARNED_PM.discard(wrapper.source)
+                if wrapper.source in _IDLE_DEADLINES:
+                    # this only ever pushes their deadline back, so the reaper doesn't need to be rescheduled
+                    # (it will reschedule itself if it wakes early)
+                    _update_idle_deadline(wrapper.source)
+                elif wrapper.source in get_players(wrapper.game_state):
+                    # they were warned and had no later stage to reach, so start over to warn them again
+                    _update_idle_deadline(wrapper.source)
+                    if _TIMER is not None:
+                        _schedule_reaper(wrapper.game_state)
 
     if wrapper.private and wrapper.source in get_players(wrapper.game_state) and wrapper.source in IDLE_WARNED_PM:
         wrapper.pm(messages["privmsg_idle_warning"].format(channels.Main))
@@ -173,6 +237,11 @@ def return_to_village(var: GameState, target: User, *, show_message: bool, new_u
                 # different users, perform a swap. This will clean up disconnected users.
                 target.swap(new_user)
 
+            if new_user in _IDLE_DEADLINES:
+                _update_idle_deadline(new_user)
+            if _TIMER is not None:
+                _schedule_reaper(var)
+
             if show_message:
                 if config.Main.get("gameplay.nightchat") or var.current_phase != "night":
                     channels.Main.mode(("+v", new_user))
@@ -194,9 +263,34 @@ def return_to_village(var: GameState, target: User, *, show_message: bool, new_u
 def on_del_player(evt: Event, var: GameState, player: User, all_roles: set[str], death_triggers: bool):
     if var.in_game: # remove the player from variables if they're in there
         DISCONNECTED.pop(player, None)
+        _IDLE_DEADLINES.pop(player, None)
+
+@event_listener("transition_night_begin")
+def on_transition_night_begin(evt: Event, var: GameState):
+    global _PAUSED
+    # don't count nighttime towards idling
+    if _TIMER is not None and _PAUSED is None and not config.Main.get("gameplay.nightchat"):
+        _PAUSED = datetime.now()
+
+@event_listener("transition_day_begin")
+def on_transition_day_begin(evt: Event, var: GameState):
+    global _PAUSED
+    if _PAUSED is None:
+        return
+    # push everyone's last said time back by however long the night lasted
+    with locks.reaper:
+        elapsed = datetime.now() - _PAUSED
+        _PAUSED = None
+        for user in LAST_SAID_TIME:
+            LAST_SAID_TIME[user] += elapsed
+        for user in list(_IDLE_DEADLINES):
+            _update_idle_deadline(user)
+        if _TIMER is not None:
+            _schedule_reaper(var)
 
 @event_listener("reset")
 def on_reset(evt: Event, var: GameState):
+    global _TIMER, _PAUSED
     # Add warnings for people that idled out night
     if config.Main.get("reaper.autowarn") and config.Main.get("reaper.night_idle.enabled"):
         for player in NIGHT_IDLED:
@@ -204,6 +298,11 @@ def on_reset(evt: Event, var: GameState):
                 continue
             add_warning(player, config.Main.get("reaper.night_idle.points"), users.Bot, messages["night_idle_warning"], expires=config.Main.get("reaper.night_idle.expiration"))
 
+    if _TIMER is not None:
+        _TIMER.cancel()
+        _TIMER = None
+    _PAUSED = None
+    _IDLE_DEADLINES.clear()
     LAST_SAID_TIME.clear()
     DISCONNECTED.clear()
     IDLE_WARNED.clear()
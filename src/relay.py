@@ -302,14 +302,15 @@ def deadchat_pref(wrapper: MessageDispatcher, message: str):
         wrapper.pm(messages["not_logged_in"])
         return
 
-    if temp.account in db.DEADCHAT_PREFS:
-        wrapper.pm(messages["chat_on_death"])
-        db.DEADCHAT_PREFS.remove(temp.account)
-    else:
-        wrapper.pm(messages["no_chat_on_death"])
-        db.DEADCHAT_PREFS.add(temp.account)
+    with db.modify_vars():
+        if temp.account in db.DEADCHAT_PREFS:
+            wrapper.pm(messages["chat_on_death"])
+            db.DEADCHAT_PREFS.remove(temp.account)
+        else:
+            wrapper.pm(messages["no_chat_on_death"])
+            db.DEADCHAT_PREFS.add(temp.account)
 
-    db.toggle_deadchat(temp.account)
+        db.toggle_deadchat(temp.account)
 
 @event_listener("reset")
 def on_reset(evt, var):
@@ -1,7 +1,5 @@
 from __future__ import annotations
 
-import threading
-import time
 from typing import Optional
 
 from src import channels
@@ -9,6 +7,7 @@ from src.events import event_listener, Event
 from src.gamestate import GameState
 from src.messages import messages
 from src.users import User
+from src.scheduler import schedule
 
 TIME_LORD_DAY_LIMIT = 60
 TIME_LORD_DAY_WARN = 45
@@ -57,23 +56,19 @@ def on_del_player(evt: Event, var: GameState, player: User, all_roles: set[str],
         return
 
     if f"{var.current_phase}_limit" in TIMERS:
-        time_left = int((TIMERS[f"{var.current_phase}_limit"][1] + TIMERS[f"{var.current_phase}_limit"][2]) - time.time())
+        timer = TIMERS[f"{var.current_phase}_limit"]
+        time_left = int(timer.remaining())
 
         if time_left > time_limit > 0:
-            t = threading.Timer(time_limit, cb, limit_args)
-            TIMERS[f"{var.current_phase}_limit"] = (t, time.time(), time_limit)
-            t.daemon = True
-            t.start()
+            timer.cancel()
+            TIMERS[f"{var.current_phase}_limit"] = schedule(time_limit, cb, *limit_args)
 
             # Don't duplicate warnings, i.e. only set the warning timer if a warning was not already given
             if timer_name in TIMERS and time_warn > 0:
-                timer = TIMERS[timer_name][0]
-                if not timer.finished.is_set():
+                timer = TIMERS[timer_name]
+                if timer.active:
                     timer.cancel()
-                    t = threading.Timer(time_warn, cb, warn_args)
-                    TIMERS[timer_name] = (t, time.time(), time_warn)
-                    t.daemon = True
-                    t.start()
+                    TIMERS[timer_name] = schedule(time_warn, cb, *warn_args)
 
 @event_listener("night_idled")
 def on_night_idled(evt: Event, var: GameState, player: User):
@@ -6,6 +6,7 @@ from typing import Optional
 from src import channels, trans, config
 from src.cats import All, Wolf
 from src.events import Event, event_listener
+from src.functions import get_role_metadata
 from src.gamestate import GameState
 from src.messages import messages
 from src.roles.helper.wolves import register_wolf, get_wolfchat_roles
@@ -59,11 +60,9 @@ def on_update_stats3(evt: Event, var: GameState, player: User, mainrole: str, re
         return
 
     if var.current_phase == "day" and var.in_phase_transition:
-        mevt = Event("get_role_metadata", {})
-        mevt.dispatch(var, "night_kills")
         nonwolf = 0
         total = 0
-        for role, num in mevt.data.items():
+        for role, num in get_role_metadata(var, "night_kills").items():
             if role != "wolf":
                 nonwolf += num
             total += num
@@ -93,15 +92,14 @@ def on_chk_win(evt: Event, var: GameState, rolemap: dict[str, set[User]], mainro
         if var.in_game:
             channels.Main.send(messages["traitor_turn_channel"])
             # fix !stats to show that traitor turned as well
-            newstats = set()
-            for rs in var.get_role_stats():
-                d = dict(rs)
+            newstats = []
+            for d in var.role_stats:
                 # traitor count of 0 is not possible since we for-sure turned traitors into wolves earlier
                 # as such, exclude such cases from newstats entirely.
                 if d["traitor"] >= 1:
                     d["wolf"] = d.get("wolf", 0) + d["traitor"]
                     d["traitor"] = 0
-                    newstats.add(frozenset(d.items()))
+                    newstats.append(d.copy())
                 # if amnesiac is loaded and they have turned, there may be extra traitors not normally accounted for
                 if "src.roles.amnesiac" in sys.modules:
                     from src.roles.amnesiac import get_blacklist, get_stats_flag
@@ -110,7 +108,7 @@ def on_chk_win(evt: Event, var: GameState, rolemap: dict[str, set[User]], mainro
                         for i in range(1, iter_end):
                             d["wolf"] = d.get("wolf", 0) + 1
                             d["amnesiac"] -= 1
-                            newstats.add(frozenset(d.items()))
+                            newstats.append(d.copy())
 
             var.set_role_stats(newstats)
 
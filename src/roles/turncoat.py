@@ -36,7 +36,7 @@ def change_sides(wrapper: MessageDispatcher, message: str, sendmsg=True): # is s
     team = re.split(" +", message)[0]
     team = match_role(team, scope=teams)
     if not team:
-        wrapper.pm(messages["turncoat_error"])
+        wrapper.pm(messages["turncoat_error"].format(teams))
         return
 
     team = team.get().key
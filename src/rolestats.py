@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from collections import Counter
+from typing import Callable, Iterable, Iterator, Mapping
+
+__all__ = ["RoleStats"]
+
+class RoleStats:
+    """The distinct role compositions a game could currently have, as shown by !stats.
+
+    Every composition is stored as a tuple of counts over a shared, sorted tuple of roles,
+    so duplicate compositions collapse and per-role ranges can be computed column-wise
+    without building a Counter for every composition. Instances are immutable; the
+    transforming methods return a new RoleStats.
+
+    :param rolesets: Role compositions, as mappings of role to count or iterables of (role, count) pairs.
+        Compositions with a negative count are impossible and are dropped.
+    """
+    __slots__ = ("roles", "_rows", "_ranges")
+
+    def __init__(self, rolesets: Iterable[Mapping[str, int] | Iterable[tuple[str, int]]] = ()):
+        counts = [dict(rs) for rs in rolesets]
+        self.roles: tuple[str, ...] = tuple(sorted(set().union(*counts)))
+        self._rows: frozenset[tuple[int, ...]] = frozenset(
+            row for row in (tuple(c.get(role, 0) for role in self.roles) for c in counts)
+            if min(row, default=0) >= 0)
+        self._ranges: dict[str, tuple[int, int]] | None = None
+
+    @classmethod
+    def _from_rows(cls, roles: tuple[str, ...], rows: Iterable[tuple[int, ...]]) -> RoleStats:
+        stats = cls.__new__(cls)
+        stats.roles = roles
+        stats._rows = frozenset(rows)
+        stats._ranges = None
+        return stats
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __iter__(self) -> Iterator[Counter[str]]:
+        """Iterate over every composition as a new Counter, which the caller is free to modify."""
+        for row in self._rows:
+            yield Counter(dict(zip(self.roles, row)))
+
+    def __eq__(self, other):
+        if not isinstance(other, RoleStats):
+            return NotImplemented
+        return self.as_frozensets() == other.as_frozensets()
+
+    def __repr__(self):
+        return "RoleStats({0} sets over {1} roles)".format(len(self._rows), len(self.roles))
+
+    def as_frozensets(self) -> frozenset[frozenset[tuple[str, int]]]:
+        """Get every composition as a frozenset of (role, count) pairs, including roles with a count of 0."""
+        return frozenset(frozenset(zip(self.roles, row)) for row in self._rows)
+
+    def ranges(self) -> dict[str, tuple[int, int]]:
+        """Get the minimum and maximum number of players who could have each role.
+
+        :returns: A mapping of role to (minimum, maximum), empty if no compositions are possible
+        """
+        if self._ranges is None:
+            if self._rows:
+                self._ranges = {role: (min(col), max(col)) for role, col in zip(self.roles, zip(*self._rows))}
+            else:
+                self._ranges = {}
+        return self._ranges
+
+    def remove_one(self, roles: Iterable[str]) -> RoleStats:
+        """Account for a player who had one of the given roles leaving the game.
+
+        Each composition yields one composition per role it could subtract a player from;
+        compositions which have none of the roles are no longer possible and are dropped.
+
+        :param roles: Roles the player could have had
+        :returns: The updated stats
+        """
+        rows = set()
+        for role in roles:
+            try:
+                i = self.roles.index(role)
+            except ValueError:
+                continue
+            for row in self._rows:
+                if row[i] >= 1:
+                    rows.add(row[:i] + (row[i] - 1,) + row[i+1:])
+        return RoleStats._from_rows(self.roles, rows)
+
+    def transform(self, func: Callable[[Counter[str]], Iterable[Mapping[str, int]]]) -> RoleStats:
+        """Replace each composition with the compositions returned by func.
+
+        func is called once per distinct composition with a new Counter it may modify.
+
+        :param func: Function returning the compositions which replace the given one
+        :returns: The updated stats
+        """
+        return RoleStats(new for roleset in self for new in func(roleset))
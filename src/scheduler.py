@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+import threading
+import time
+from typing import Any, Callable, Optional
+
+__all__ = ["Scheduler", "ScheduledCall", "schedule", "get_scheduler"]
+
+class ScheduledCall:
+    """A callback scheduled to run on a Scheduler at a point on its (monotonic) clock.
+
+    Instances are returned from Scheduler.schedule and should not be created directly.
+    """
+    __slots__ = ("scheduler", "deadline", "func", "args", "kwargs", "cancelled", "fired", "_seq")
+
+    def __init__(self, scheduler: Scheduler, deadline: float, func: Callable, args: tuple, kwargs: dict[str, Any]):
+        self.scheduler = scheduler
+        self.deadline = deadline
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.cancelled = False
+        self.fired = False
+        self._seq = 0
+
+    @property
+    def active(self) -> bool:
+        """Whether this call is still waiting to run."""
+        return not self.cancelled and not self.fired
+
+    def remaining(self) -> float:
+        """Get the number of seconds until this call runs, or 0 if it is no longer waiting."""
+        if not self.active:
+            return 0.0
+        return max(0.0, self.deadline - self.scheduler.clock())
+
+    def cancel(self):
+        """Prevent this call from running. Cancelling a call which already ran or was cancelled does nothing."""
+        self.scheduler.cancel(self)
+
+    def reschedule(self, delay: float) -> bool:
+        """Move this call so that it runs delay seconds from now.
+
+        :param delay: Number of seconds from now to run the call
+        :returns: False if the call already ran or was cancelled, in which case it is left alone
+        """
+        return self.scheduler.reschedule(self, delay)
+
+    def __repr__(self):
+        state = "cancelled" if self.cancelled else "fired" if self.fired else "in {0:.3f}s".format(self.remaining())
+        return "ScheduledCall({0!r}, {1})".format(getattr(self.func, "__qualname__", self.func), state)
+
+class Scheduler:
+    """Run callbacks at given times using a single worker thread.
+
+    Pending calls are kept in a heap ordered by deadline, so the worker sleeps exactly until the
+    next call is due instead of polling. Cancelled and rescheduled calls are discarded lazily when
+    they reach the top of the heap.
+
+    :param clock: Monotonic clock returning seconds
+    :param name: Name of the worker thread
+    :param autostart: If False, no worker thread is started and calls only run from run_pending
+    """
+    def __init__(self, *, clock: Callable[[], float] = time.monotonic, name: str = "scheduler", autostart: bool = True):
+        self.clock = clock
+        self.name = name
+        self.autostart = autostart
+        self._heap: list[tuple[float, int, ScheduledCall]] = []
+        self._counter = itertools.count(1)
+        self._cond = threading.Condition(threading.Lock())
+        self._thread: Optional[threading.Thread] = None
+
+    def __len__(self):
+        with self._cond:
+            return sum(1 for deadline, seq, call in self._heap if call.active and call._seq == seq)
+
+    def schedule(self, delay: float, func: Callable, *args, **kwargs) -> ScheduledCall:
+        """Run func(*args, **kwargs) on the worker thread delay seconds from now.
+
+        :param delay: Number of seconds from now to run the call; negative values run it as soon as possible
+        :param func: Function to call
+        :returns: A handle which can be used to cancel or reschedule the call
+        """
+        call = ScheduledCall(self, self.clock() + delay, func, args, kwargs)
+        with self._cond:
+            self._push(call)
+        self._start()
+        return call
+
+    def cancel(self, call: ScheduledCall):
+        """Prevent a call from running.
+
+        :param call: Call to cancel
+        """
+        with self._cond:
+            call.cancelled = True
+
+    def reschedule(self, call: ScheduledCall, delay: float) -> bool:
+        """Move a call so that it runs delay seconds from now.
+
+        The check and the move happen under the scheduler's lock, so a call which is due can't start running
+        in between; callers should schedule a new call if this returns False and they still need one.
+
+        :param call: Call to move
+        :param delay: Number of seconds from now to run the call
+        :returns: False if the call already ran or was cancelled, in which case it is left alone
+        """
+        with self._cond:
+            if not call.active:
+                return False
+            call.deadline = self.clock() + delay
+            self._push(call)
+            return True
+
+    def pending(self) -> list[ScheduledCall]:
+        """Get all calls waiting to run, ordered by deadline."""
+        with self._cond:
+            return [call for deadline, seq, call in sorted(self._heap) if call.active and call._seq == seq]
+
+    def run_pending(self) -> int:
+        """Run every call which is due on the calling thread.
+
+        :returns: Number of calls which were run
+        """
+        count = 0
+        while (call := self._pop_due()) is not None:
+            self._run(call)
+            count += 1
+        return count
+
+    def _push(self, call: ScheduledCall):
+        # a rescheduled call gets a new sequence number, which invalidates its old heap entry
+        call._seq = next(self._counter)
+        heapq.heappush(self._heap, (call.deadline, call._seq, call))
+        self._cond.notify()
+
+    def _pop_due(self, wait: bool = False) -> Optional[ScheduledCall]:
+        with self._cond:
+            while True:
+                while self._heap and (not self._heap[0][2].active or self._heap[0][2]._seq != self._heap[0][1]):
+                    heapq.heappop(self._heap)
+                delay = None
+                if self._heap:
+                    delay = self._heap[0][0] - self.clock()
+                    if delay <= 0:
+                        call = heapq.heappop(self._heap)[2]
+                        call.fired = True
+                        return call
+                if not wait:
+                    return None
+                self._cond.wait(delay)
+
+    def _run(self, call: ScheduledCall):
+        # errors are reported here so that one bad callback can't take down the worker thread
+        from src.debug.decorators import print_traceback
+        with print_traceback():
+            call.func(*call.args, **call.kwargs)
+
+    def _start(self):
+        if self._thread is not None or not self.autostart:
+            return
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(None, self._worker, self.name, daemon=True)
+                self._thread.start()
+
+    def _worker(self):
+        while True:
+            call = self._pop_due(wait=True)
+            if call is not None:
+                self._run(call)
+
+_scheduler = Scheduler()
+
+def get_scheduler() -> Scheduler:
+    """Get the scheduler shared by the whole bot."""
+    return _scheduler
+
+def schedule(delay: float, func: Callable, *args, **kwargs) -> ScheduledCall:
+    """Run func(*args, **kwargs) on the shared scheduler delay seconds from now.
+
+    :param delay: Number of seconds from now to run the call
+    :param func: Function to call
+    :returns: A handle which can be used to cancel or reschedule the call
+    """
+    return _scheduler.schedule(delay, func, *args, **kwargs)
@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 import time
-from collections import Counter
 from typing import Optional, Tuple
 
 from src.containers import UserDict, UserSet
@@ -122,16 +121,7 @@ def kill_players(var: Optional[GameState | PregameState], *, end_game: bool = Tr
             return False
 
         # give roles/modes an opportunity to adjust !stats now that all deaths have resolved
-        evt = Event("reconfigure_stats", {"new": []})
-        newstats = set()
-        for rs in var.get_role_stats():
-            d = Counter(dict(rs))
-            evt.data["new"] = [d]
-            evt.dispatch(var, d, "del_player")
-            for v in evt.data["new"]:
-                if min(v.values()) >= 0:
-                    newstats.add(frozenset(v.items()))
-        var.set_role_stats(newstats)
+        var.reconfigure_stats("del_player")
 
         # notify listeners that all deaths have resolved
         # FIXME: end_game is a temporary hack until we move state transitions into the event loop
@@ -3,7 +3,7 @@ from __future__ import annotations
 from collections import Counter
 
 from src.containers import UserDict
-from src.functions import get_players, get_main_role, change_role
+from src.functions import get_players, get_main_role, change_role, get_role_metadata
 from src.messages import messages
 from src.events import Event, event_listener
 from src.cats import Wolf, Category
@@ -63,21 +63,20 @@ def try_lycanthropy(var: GameState, target: User) -> bool:
     if role in Wolf:
         return False
 
-    evt = Event("get_role_metadata", {})
-    evt.dispatch(var, "lycanthropy_role")
+    metadata = get_role_metadata(var, "lycanthropy_role")
     new_role = "wolf"
     prefix = LYCANTHROPES[target]
-    if role in evt.data:
-        if "role" in evt.data[role]:
-            new_role = evt.data[role]["role"]
-            if not isinstance(evt.data[role]["role"], str):
+    if role in metadata:
+        if "role" in metadata[role]:
+            new_role = metadata[role]["role"]
+            if not isinstance(metadata[role]["role"], str):
                 evt2 = Event("get_lycanthrope_role", {"role": None})
-                evt2.dispatch(var, target, role, evt.data[role]["role"])
-                assert evt2.data["role"] in evt.data[role]["role"]
+                evt2.dispatch(var, target, role, metadata[role]["role"])
+                assert evt2.data["role"] in metadata[role]["role"]
                 new_role = evt2.data["role"]
-        if "prefix" in evt.data[role]:
-            prefix = evt.data[role]["prefix"]
-        for sec_role in evt.data[role].get("secondary_roles", ()):
+        if "prefix" in metadata[role]:
+            prefix = metadata[role]["prefix"]
+        for sec_role in metadata[role].get("secondary_roles", ()):
             var.roles[sec_role].add(target)
             to_send = "{0}_notify".format(sec_role.replace(" ", "_"))
             target.send(messages[to_send])
@@ -91,8 +90,7 @@ def on_reconfigure_stats(evt: Event, var: GameState, roleset: Counter, reason: s
     if reason != "howl" or not SCOPE:
         return
 
-    evt2 = Event("get_role_metadata", {})
-    evt2.dispatch(var, "lycanthropy_role")
+    metadata = get_role_metadata(var, "lycanthropy_role")
 
     roles = {}
 
@@ -100,8 +98,8 @@ def on_reconfigure_stats(evt: Event, var: GameState, roleset: Counter, reason: s
     for role, count in roleset.items():
         if role in wolfchat or count == 0 or role not in SCOPE:
             continue
-        if role in evt2.data and "role" in evt2.data[role]:
-            roles[role] = evt2.data[role]["role"]
+        if role in metadata and "role" in metadata[role]:
+            roles[role] = metadata[role]["role"]
         else:
             roles[role] = "wolf"
 
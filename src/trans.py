@@ -2,8 +2,9 @@ from __future__ import annotations
 
 from collections import Counter, defaultdict
 from datetime import datetime, timedelta
+from pathlib import Path
 from typing import Optional, Callable, Union
-import threading
+import logging
 import time
 
 from src.transport.irc import get_ircd
@@ -15,11 +16,12 @@ from src.warnings import expire_tempbans
 from src.messages import messages
 from src.status import is_silent, is_dying, try_protection, add_dying, kill_players, get_absent, try_lycanthropy
 from src.users import User
-from src.events import Event, event_listener
+from src.scheduler import ScheduledCall
+from src.events import Event, event_listener, listener_profiling_enabled, dump_listener_stats, reset_listener_stats
 from src.votes import chk_decision
 from src.cats import Win_Stealer, Wolf_Objective, Vampire_Objective, Village_Objective, role_order, get_team, All, \
     Category, Nobody, Hidden
-from src import channels, users, locks, config, db, reaper, relay
+from src import channels, users, locks, config, db, reaper, relay, journal
 from src.dispatcher import MessageDispatcher
 from src.gamestate import GameState, PregameState
 from src.random import random
@@ -29,7 +31,7 @@ UserOrLocation = Union[User, Location]
 UserOrSpecialTag = Union[User, str]
 
 NIGHT_IDLE_EXEMPT = UserSet()
-TIMERS: dict[str, tuple[threading.Timer, float | int, int]] = {}
+TIMERS: dict[str, ScheduledCall] = {}
 
 DAY_ID: float | int = 0
 DAY_TIMEDELTA: timedelta = timedelta(0)
@@ -142,7 +144,7 @@ def _night_warn(var: GameState):
         idle_event = Event("night_idled", {})
         if idle_event.dispatch(var, player):
             player.queue_message(messages["night_idle_notice"])
-    users.User.send_messages()
+    users.User.send_messages(join=True)
 
 @handle_error
 def night_timeout(timer_type: str, var: GameState, phase_id: int):
@@ -336,17 +338,8 @@ def transition_day(var: GameState, game_id: int = 0):
 
     # chilling howl message was played, give roles the opportunity to update !stats
     # to account for this
-    revt = Event("reconfigure_stats", {"new": []})
     for i in range(evt.data["howl"]):
-        newstats = set()
-        for rs in var.get_role_stats():
-            d = Counter(dict(rs))
-            revt.data["new"] = [d]
-            revt.dispatch(var, d, "howl")
-            for new_set in revt.data["new"]: # type: Counter[str]
-                if min(new_set.values()) >= 0:
-                    newstats.add(frozenset(new_set.items()))
-        var.set_role_stats(newstats)
+        var.reconfigure_stats("howl")
 
     killer_role = {}
     for deadperson in dead:
@@ -627,13 +620,14 @@ def stop_game(var: Optional[GameState | PregameState], winner: Category = Nobody
                 if len(pl) > 0:
                     game_options["roles"][role] = len(pl)
 
-            db.add_game(var.current_mode.name,
-                        len(get_players(var)) + len(DEAD),
-                        time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(var.game_id)),
-                        time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime()),
-                        winner,
-                        player_list,
-                        game_options)
+            db.queue_write(db.add_game,
+                           var.current_mode.name,
+                           len(get_players(var)) + len(DEAD),
+                           time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(var.game_id)),
+                           time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime()),
+                           winner,
+                           player_list,
+                           game_options)
 
             # spit out the list of winners
             if winners:
@@ -642,11 +636,16 @@ def stop_game(var: Optional[GameState | PregameState], winner: Category = Nobody
             else:
                 channels.Main.send(messages["no_winners"])
 
+        if listener_profiling_enabled():
+            _dump_listener_profile(var)
+        journal.finish(var, winner)
+
     # Message players in deadchat letting them know that the game has ended
     for user in relay.DEADCHAT_PLAYERS:
         user.queue_message(messages["endgame_deadchat"].format(channels.Main))
 
-    User.send_messages()
+    # only the bot's own notices are queued here, so they can share lines with whatever it sent just before
+    User.send_messages(join=True)
 
     reset(var)
     expire_tempbans()
@@ -659,6 +658,19 @@ def stop_game(var: Optional[GameState | PregameState], winner: Category = Nobody
         channels.Main.send(messages["fstop_ping"].format(ADMIN_STOPPED))
         ADMIN_STOPPED.clear()
 
+def _dump_listener_profile(var: GameState):
+    """Write the event listener profile for the game that just ended, and start a fresh one for the next game."""
+    directory = Path(__file__).parent.parent / config.Main.get("debug.profiling.directory")
+    started = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(var.game_id))
+    file = directory / "events-{0}.json".format(time.strftime("%Y%m%d-%H%M%S", time.gmtime(var.game_id)))
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+        with open(file, "wt", encoding="utf-8") as f:
+            dump_listener_stats(f, mode=var.current_mode.name, size=len(var.original_main_roles), started=started)
+    except OSError:
+        logging.getLogger("general").exception("Unable to write event listener profile to {0}", file)
+    reset_listener_stats()
+
 def chk_win(var: GameState, *, end_game=True, winner=None, count_absent=True):
     """ Returns True if someone won """
     global ENDGAME_COMMAND
@@ -757,8 +769,8 @@ def reset(var: Optional[GameState | PregameState]):
     # Reset game timers
     if var is not None:
         with locks.join_timer: # make sure it isn't being used by the ping join handler
-            for timers in TIMERS.values():
-                timers[0].cancel()
+            for timer in TIMERS.values():
+                timer.cancel()
             TIMERS.clear()
 
         # Reset modes
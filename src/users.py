@@ -1,10 +1,12 @@
 from __future__ import annotations
 
+import bisect
 import fnmatch
 import time
 import re
-from typing import Callable, Optional, Iterable, TYPE_CHECKING
+from typing import Callable, Generic, Optional, Iterable, Iterator, TypeVar, TYPE_CHECKING
 
+from oyoyo.client import PRIORITY_WHO
 from src.context import IRCContext, Features, NotLoggedIn, lower
 from src import config, db
 from src.events import Event, EventListener
@@ -26,6 +28,67 @@ _users: CheckedSet[User] = CheckedSet("users._users")
 _ghosts: CheckedSet[User] = CheckedSet("users._ghosts")
 _pending_account_updates: CheckedDict[User, CheckedDict[str, Callable]] = CheckedDict("users._pending_account_updates")
 
+# Secondary indexes over _users, keyed by folded nick, folded ident@host, and folded account.
+# Keys are folded with rfc1459 casemapping, which is the loosest casemapping we support, so
+# the buckets are supersets of what any casemapping would consider equal. Users missing the
+# indexed property (which partial_match treats as a wildcard) are stored under the None key.
+# Callers must still check each candidate with partial_match (or similar) to get an exact answer.
+_nick_index: dict[Optional[str], set[User]] = {}
+_host_index: dict[Optional[str], set[User]] = {}
+_account_index: dict[Optional[str], set[User]] = {}
+
+class _PrefixIndex:
+    """Sorted index of string keys to users, supporting exact and prefix lookups."""
+    def __init__(self):
+        self._keys: list[str] = []
+        self._users: dict[str, set[User]] = {}
+
+    def add(self, key: str, user: User):
+        if key not in self._users:
+            bisect.insort(self._keys, key)
+            self._users[key] = set()
+        self._users[key].add(user)
+
+    def discard(self, key: str, user: User):
+        bucket = self._users.get(key)
+        if bucket is None:
+            return
+        bucket.discard(user)
+        if not bucket:
+            del self._users[key]
+            del self._keys[bisect.bisect_left(self._keys, key)]
+
+    def clear(self):
+        self._keys.clear()
+        self._users.clear()
+
+    def exact(self, key: str) -> set[User]:
+        return self._users.get(key, set())
+
+    def prefix(self, prefix: str) -> set[User]:
+        found = set()
+        for i in range(bisect.bisect_left(self._keys, prefix), len(self._keys)):
+            key = self._keys[i]
+            if not key.startswith(prefix):
+                break
+            found.update(self._users[key])
+        return found
+
+# Indexes used by complete_match. Keys are folded according to the casemapping in use when they were
+# added, so they are rebuilt if the casemapping changes. The stripped variants have leading special
+# characters removed, so that e.g. "foo" can complete to "[foo]".
+_completion_casemapping: Optional[str] = None
+_nick_completions = _PrefixIndex()
+_stripped_nick_completions = _PrefixIndex()
+_account_completions = _PrefixIndex()
+_stripped_account_completions = _PrefixIndex()
+# Folded (nick, stripped nick, account, stripped account) of every user in the registry, so that matching
+# against a small scope such as the player list can compare each user's stored keys without re-folding them.
+# The account entries are None for users who aren't logged in.
+_completion_folds: dict[User, tuple[str, str, Optional[str], Optional[str]]] = {}
+
+_strip_chars = "[{\\^_`|}]"
+
 _arg_msg = "(user={0:for_tb_verbose}, allow_bot={1})"
 
 # This is used to tell if this is a fake nick or not. If this function
@@ -33,6 +96,84 @@ _arg_msg = "(user={0:for_tb_verbose}, allow_bot={1})"
 # testing, where we might want everyone to be fake nicks.
 predicate = re.compile(r"^[0-9]+$").search
 
+def _index_keys(nick, ident, host, account):
+    """Return (index, key) pairs for the given properties, with the most selective index first."""
+    return (
+        (_nick_index, lower(nick, casemapping="rfc1459")),
+        (_host_index, None if ident is None or host is None else
+            lower(ident, casemapping="rfc1459") + "@" + lower(host, casemapping="rfc1459")),
+        # NotLoggedIn is a real value as far as matching is concerned, but it's shared by too many users to
+        # be worth indexing. It is stored under "" so that it doesn't get treated as a wildcard.
+        (_account_index, None if account is None else lower(account, casemapping="rfc1459") or "")
+    )
+
+def _completion_folds_for(user: User) -> tuple[str, str, Optional[str], Optional[str]]:
+    """Return the folded (nick, stripped nick, account, stripped account) of the user."""
+    nick = lower(user.nick)
+    if user.account:
+        account = lower(user.account)
+        return nick, nick.lstrip(_strip_chars), account, account.lstrip(_strip_chars)
+    return nick, nick.lstrip(_strip_chars), None, None
+
+def _completion_keys(folds: tuple[str, str, Optional[str], Optional[str]]):
+    """Return (index, key) pairs for the completion indexes a user with the given folded keys belongs in."""
+    nick, stripped_nick, account, stripped_account = folds
+    keys = [(_nick_completions, nick), (_stripped_nick_completions, stripped_nick)]
+    if account is not None:
+        keys.append((_account_completions, account))
+        keys.append((_stripped_account_completions, stripped_account))
+    return keys
+
+def _sync_completions():
+    """Rebuild the completion indexes if the casemapping changed since they were built."""
+    global _completion_casemapping
+    if _completion_casemapping == Features.CASEMAPPING:
+        return
+    _completion_casemapping = Features.CASEMAPPING
+    for index in (_nick_completions, _stripped_nick_completions, _account_completions, _stripped_account_completions):
+        index.clear()
+    _completion_folds.clear()
+    for user in _users:
+        folds = _completion_folds[user] = _completion_folds_for(user)
+        for index, key in _completion_keys(folds):
+            index.add(key, user)
+
+def _add_user(user: User):
+    """Add a user to the registry, updating the indexes."""
+    _sync_completions()
+    _users.add(user)
+    for index, key in _index_keys(user.nick, user.ident, user.host, user.account):
+        index.setdefault(key, set()).add(user)
+    folds = _completion_folds[user] = _completion_folds_for(user)
+    for index, key in _completion_keys(folds):
+        index.add(key, user)
+
+def _discard_user(user: User):
+    """Remove a user from the registry, updating the indexes."""
+    _sync_completions()
+    folds = _completion_folds.pop(user, None)
+    if folds is not None:
+        for index, key in _completion_keys(folds):
+            index.discard(key, user)
+    _users.discard(user)
+    for index, key in _index_keys(user.nick, user.ident, user.host, user.account):
+        bucket = index.get(key)
+        if bucket is not None:
+            bucket.discard(user)
+            if not bucket:
+                del index[key]
+
+def _candidates(nick=None, ident=None, host=None, account=None) -> set[User]:
+    """Return the users in the registry which could possibly match the given properties.
+
+    Users which match all of the non-None properties (case-insensitively) are guaranteed to be
+    in the returned set, but it may also contain users which do not match. The returned set is a copy.
+    """
+    for index, key in _index_keys(nick, ident, host, account):
+        if key:
+            return index.get(key, set()) | index.get(None, set())
+    return set(_users)
+
 def get(nick=None, ident=None, host=None, account=None, *, allow_multiple=False, allow_none=False, allow_bot=False, allow_ghosts=False, update=False):
     """Return the matching user(s) from the user list.
 
@@ -69,7 +210,7 @@ def get(nick=None, ident=None, host=None, account=None, *, allow_multiple=False,
         return [temp] if allow_multiple else temp
 
     potential = []
-    users = set(_users)
+    users = _candidates(nick, ident, host, account)
     if not allow_ghosts:
         users.difference_update(_ghosts)
     if allow_bot:
@@ -128,7 +269,7 @@ def add(cli, *, nick, ident=None, host=None, account=NotLoggedIn):
         except ValueError:
             pass
         else:
-            _users.add(new)
+            _add_user(new)
 
     return new
 
@@ -152,47 +293,62 @@ def complete_match(pattern: str, scope: Optional[Iterable[User]] = None):
     :returns: A Match object describing whether or not the match succeeded.
     :rtype: Match[User]
     """
-    if scope is None:
-        scope = _users
-    matches: list[User] = []
+    _sync_completions()
     nick_search, _, acct_search = lower(pattern).partition(":")
     if not nick_search and not acct_search:
         return Match([])
 
-    direct_match = False
-    for user in scope:
-        nick = lower(user.nick)
-        stripped_nick = nick.lstrip("[{\\^_`|}]")
-        if nick_search:
-            if nick == nick_search:
-                if not direct_match:
-                    matches.clear()
-                    direct_match = True
-                matches.append(user)
-            elif not direct_match and (nick.startswith(nick_search) or stripped_nick.startswith(nick_search)):
-                matches.append(user)
+    if nick_search:
+        if scope is None:
+            matches = _complete_registry(nick_search, _nick_completions, _stripped_nick_completions)
         else:
-            matches.append(user)
+            matches = _complete(scope, nick_search, 0, lambda user: user.nick)
+    else:
+        matches = list(_users if scope is None else scope)
 
     if acct_search:
-        scope = list(matches)
-        matches.clear()
-        direct_match = False
-        for user in scope:
-            if not user.account:
-                continue # fakes don't have accounts, so this search won't be able to find them
-            acct = lower(user.account)
-            stripped_acct = acct.lstrip("[{\\^_`|}]")
-            if acct == acct_search:
-                if not direct_match:
-                    matches.clear()
-                    direct_match = True
-                matches.append(user)
-            elif not direct_match and (acct.startswith(acct_search) or stripped_acct.startswith(acct_search)):
-                matches.append(user)
+        # fakes don't have accounts, so this search won't be able to find them
+        if scope is None and not nick_search:
+            matches = _complete_registry(acct_search, _account_completions, _stripped_account_completions)
+        else:
+            matches = _complete([user for user in matches if user.account], acct_search, 2, lambda user: user.account)
 
     return Match(matches)
 
+def _complete_registry(search: str, index: _PrefixIndex, stripped_index: _PrefixIndex) -> list[User]:
+    """Find the users in the registry whose (folded) property exactly matches search, or failing that,
+    whose property or stripped property begins with search."""
+    exact = index.exact(search)
+    if exact:
+        return list(exact)
+    return list(index.prefix(search) | stripped_index.prefix(search))
+
+def _complete(scope: Iterable[User], search: str, field: int, getter: Callable[[User], str]) -> list[User]:
+    """Filter scope down to users whose (folded) property exactly matches search, or failing that,
+    to users whose property or stripped property begins with search.
+
+    Users in the registry are checked against their stored folded keys, at position field and field + 1
+    of their _completion_folds entry; anyone else in scope (such as the bot) is folded here.
+    """
+    exact_matches = []
+    prefix_matches = []
+    for user in scope:
+        try:
+            folds = _completion_folds.get(user)
+        except ValueError:
+            folds = None # unhashable users (such as the bot during early init) can't be in the registry
+        if folds is not None:
+            value, stripped = folds[field], folds[field + 1]
+        else:
+            value = lower(getter(user))
+            stripped = value.lstrip(_strip_chars)
+        if value == search:
+            exact_matches.append(user)
+        elif not exact_matches and (value.startswith(search) or stripped.startswith(search)):
+            prefix_matches.append(user)
+
+    return exact_matches or prefix_matches
+
 _raw_nick_pattern = re.compile(r"^(?P<nick>.+?)(?:!(?P<ident>.+?)@(?P<host>.+))?$")
 
 def parse_rawnick(rawnick, *, default=None):
@@ -214,13 +370,13 @@ def _cleanup_user(evt, var: GameState, user: User):
         user.disconnected = True
     else:
         user.disconnected = False
-        _users.discard(user)
+        _discard_user(user)
 
 def _reset(evt, var):
     """Cleans up users that left during game during game end."""
     for user in _ghosts:
         if not user.channels:
-            _users.discard(user)
+            _discard_user(user)
     _ghosts.clear()
 
 def _update_account(evt, user):
@@ -241,6 +397,57 @@ EventListener(_cleanup_user).install("cleanup_user")
 EventListener(_reset).install("reset")
 EventListener(_update_account).install("who_end")
 
+_C = TypeVar("_C")
+
+class _ContainerRefs(Generic[_C]):
+    """Multiset of the user containers a user is in, keyed by container identity.
+
+    User containers are unhashable and compare by identity, so they are keyed by id(); the reference
+    kept to each container guarantees its id isn't reused while it is tracked here. The count for a container
+    is the number of times the user occurs in it (as an element, dict key, or dict value), so containers can
+    keep it up to date in O(1) without scanning themselves.
+    """
+    __slots__ = ("_refs",)
+
+    def __init__(self):
+        self._refs: dict[int, list] = {} # id(container) -> [container, count]
+
+    def add(self, container: _C):
+        entry = self._refs.get(id(container))
+        if entry is None:
+            self._refs[id(container)] = [container, 1]
+        else:
+            entry[1] += 1
+
+    def remove(self, container: _C):
+        """Remove one occurrence of container.
+
+        :raises ValueError: If container is not present
+        """
+        key = id(container)
+        entry = self._refs.get(key)
+        if entry is None:
+            raise ValueError("container is not tracked")
+        entry[1] -= 1
+        if not entry[1]:
+            del self._refs[key]
+
+    def count(self, container: _C) -> int:
+        entry = self._refs.get(id(container))
+        return entry[1] if entry is not None else 0
+
+    def __contains__(self, container) -> bool:
+        return id(container) in self._refs
+
+    def __iter__(self) -> Iterator[_C]:
+        return (entry[0] for entry in self._refs.values())
+
+    def __len__(self) -> int:
+        return len(self._refs)
+
+    def __repr__(self):
+        return "{0}({1})".format(type(self).__name__, ", ".join("{0}x{1}".format(type(c).__name__, n) for c, n in self._refs.values()))
+
 class User(IRCContext):
 
     is_user = True
@@ -253,10 +460,10 @@ class User(IRCContext):
     timestamp: float
     account_timestamp: float
 
-    sets: list[UserSet]
-    lists: list[UserList]
-    dict_keys: list[UserDict]
-    dict_values: list[UserDict]
+    sets: _ContainerRefs[UserSet]
+    lists: _ContainerRefs[UserList]
+    dict_keys: _ContainerRefs[UserDict]
+    dict_values: _ContainerRefs[UserDict]
 
     def __init__(self, cli, nick, ident, host, account):
         """Make linters happy."""
@@ -273,10 +480,10 @@ class User(IRCContext):
         self._account = account
         self.channels = CheckedDict("users.User.channels")
         self.timestamp = time.time()
-        self.sets = []
-        self.lists = []
-        self.dict_keys = []
-        self.dict_values = []
+        self.sets = _ContainerRefs()
+        self.lists = _ContainerRefs()
+        self.dict_keys = _ContainerRefs()
+        self.dict_values = _ContainerRefs()
         self.account_timestamp = time.time()
 
         if Bot is not None and nick is not None and Bot.nick.rstrip("_") == nick.rstrip("_") and None in {Bot.ident, Bot.host}:
@@ -303,13 +510,12 @@ class User(IRCContext):
             self = Bot
 
         elif nick is not None and ident is not None and host is not None and account is not None:
-            users = set(_users)
-            users.add(Bot)
-            if self in users:
-                for user in users:
-                    if self == user:
-                        self = user
-                        break
+            # an equal user necessarily shares our nick, so only look at users with that nick
+            users = _nick_index.get(lower(nick, casemapping="rfc1459"), ())
+            for user in (*users, Bot):
+                if self == user:
+                    self = user
+                    break
 
         else:
             # This takes a different code path because of slightly different
@@ -345,7 +551,7 @@ class User(IRCContext):
             # and instead opt for the sake of clarity that this separation provides.
 
             potential = None
-            users = set(_users)
+            users = _candidates(nick, ident, host, account)
             if Bot is not None:
                 users.add(Bot)
             for user in users:
@@ -435,22 +641,23 @@ class User(IRCContext):
 
         _ghosts.discard(self)
         if not self.channels or same_user:
-            _users.discard(self) # Goodbye, my old friend
+            _discard_user(self) # Goodbye, my old friend
 
-        for lst in self.lists[:]:
-            while self in lst:
-                lst[lst.index(self)] = new
+        for lst in list(self.lists):
+            for i, item in enumerate(lst):
+                if item is self:
+                    lst[i] = new
 
-        for s in self.sets[:]:
+        for s in list(self.sets):
             s.remove(self)
             s.add(new)
 
-        for dk in self.dict_keys[:]:
+        for dk in list(self.dict_keys):
             dk[new] = dk.pop(self)
 
-        for dv in self.dict_values[:]:
-            for key in dv:
-                if dv[key] is self:
+        for dv in list(self.dict_values):
+            for key, value in dv.items():
+                if value is self:
                     dv[key] = new
 
         if same_user:
@@ -465,7 +672,7 @@ class User(IRCContext):
                         channel.modes[mode].add(self)
 
             if not isinstance(new, BotUser):
-                _users.add(new)
+                _add_user(new)
 
             if self is Bot:
                 assert isinstance(new, BotUser)
@@ -542,23 +749,24 @@ class User(IRCContext):
     def set_pingif_count(self, value, old=None):
         temp = self.lower()
 
-        if not value:
-            if temp.account in db.PING_IF_PREFS:
-                del db.PING_IF_PREFS[temp.account]
-                db.set_pingif(0, temp.account)
-                if old is not None:
-                    if old in db.PING_IF_NUMS:
-                        db.PING_IF_NUMS[old].discard(temp.account)
-        else:
-            if temp.account:
-                db.PING_IF_PREFS[temp.account] = value
-                db.set_pingif(value, temp.account)
-                if value not in db.PING_IF_NUMS:
-                    db.PING_IF_NUMS[value] = set()
-                db.PING_IF_NUMS[value].add(temp.account)
-                if old is not None:
-                    if old in db.PING_IF_NUMS:
-                        db.PING_IF_NUMS[old].discard(temp.account)
+        with db.modify_vars():
+            if not value:
+                if temp.account in db.PING_IF_PREFS:
+                    del db.PING_IF_PREFS[temp.account]
+                    db.set_pingif(0, temp.account)
+                    if old is not None:
+                        if old in db.PING_IF_NUMS:
+                            db.PING_IF_NUMS[old].discard(temp.account)
+            else:
+                if temp.account:
+                    db.PING_IF_PREFS[temp.account] = value
+                    db.set_pingif(value, temp.account)
+                    if value not in db.PING_IF_NUMS:
+                        db.PING_IF_NUMS[value] = set()
+                    db.PING_IF_NUMS[value].add(temp.account)
+                    if old is not None:
+                        if old in db.PING_IF_NUMS:
+                            db.PING_IF_NUMS[old].discard(temp.account)
 
     def wants_deadchat(self):
         return self.lower().account not in db.DEADCHAT_PREFS
@@ -621,7 +829,7 @@ class User(IRCContext):
             self.who()
         else:
             # Fallback to WHOIS
-            self.client.send("WHOIS {0}".format(self))
+            self.client.send("WHOIS {0}".format(self), priority=PRIORITY_WHO)
 
     @property
     def nick(self): # name should be the same as nick (for length calculation)
@@ -686,7 +894,7 @@ class User(IRCContext):
             _ghosts.discard(self)
             # ensure dangling users aren't left around in our tracking var
             if not self.channels:
-                _users.discard(self)
+                _discard_user(self)
 
     @property
     def game_state(self):
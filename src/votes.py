@@ -298,7 +298,8 @@ def chk_decision(var: GameState, *, timeout=False, admin_forced=False):
             channels.Main.send(messages["sunset"])
 
         if timeout or VOTED >= num_votes:
-            if chk_win(var, count_absent=False):
+            # a death above may have already ended the game, in which case chk_win has nothing left to check
+            if not var.in_game or chk_win(var, count_absent=False):
                 return
 
             from src.trans import transition_night
@@ -18,15 +18,17 @@ def decrement_stasis(user=None):
     if user is not None:
         # decrement account stasis even if accounts are disabled
         if user.account in db.STASISED:
-            db.decrement_stasis(acc=user.account)
+            db.queue_write(db.decrement_stasis, acc=user.account)
     else:
-        db.decrement_stasis()
+        db.queue_write(db.decrement_stasis)
     # Also expire any expired stasis and tempbans and update our tracking vars
-    db.expire_stasis()
-    db.init_vars()
+    db.queue_write(db.expire_stasis)
+    db.submit(db.init_vars)
 
 def expire_tempbans():
-    acclist = db.expire_tempbans()
+    return db.queue_write(db.expire_tempbans, callback=_unban_accounts)
+
+def _unban_accounts(acclist):
     cmodes = []
     for acc in acclist:
         cmodes.append(("-b", "{0}{1}".format(get_ircd().account_prefix, acc)))
@@ -34,16 +34,16 @@ import urllib.request
 import urllib.error
 
 from collections import Counter, defaultdict
-from datetime import datetime
 from typing import Optional
 
 import src
-from src import db, config, locks, dispatcher, channels, users, hooks, handler, trans, reaper, context, relay, votes
+from src import db, config, locks, dispatcher, channels, users, hooks, handler, trans, reaper, context, relay, votes, journal
 from src.channels import Channel
 from src.users import User
 from src.random import random
 
-from src.events import Event, EventListener, event_listener
+from src.events import (Event, EventListener, event_listener, enable_listener_profiling, disable_listener_profiling,
+                        listener_profiling_enabled, get_listener_stats, reset_listener_stats)
 from src.transport.irc import get_ircd
 from src.decorators import command, hook, COMMANDS
 from src.dispatcher import MessageDispatcher
@@ -188,10 +188,9 @@ def sync_modes():
 @command("refreshdb", flag="m", pm=True)
 def refreshdb(wrapper: MessageDispatcher, message: str):
     """Updates our tracking vars to the current db state."""
-    db.expire_stasis()
-    db.init_vars()
-    expire_tempbans()
-    wrapper.reply("Done.")
+    db.queue_write(db.expire_stasis)
+    db.submit(db.init_vars)
+    expire_tempbans().add_done_callback(lambda future: wrapper.reply("Done."))
 
 @command("fdie", flag="F", pm=True)
 def forced_exit(wrapper: MessageDispatcher, message: str):
@@ -228,6 +227,8 @@ def forced_exit(wrapper: MessageDispatcher, message: str):
 
 def _restart_program(mode=None):
     logging.getLogger("general").info("RESTARTING")
+    # exec doesn't run atexit handlers, so make sure queued db writes land first
+    db.flush(10)
 
     python = sys.executable
 
@@ -322,11 +323,12 @@ def mark_prefer_notice(wrapper: MessageDispatcher, message: str):
         wrapper.pm(messages["not_logged_in"])
         return
 
-    notice = wrapper.source.prefers_notice()
-    action, toggle = (db.PREFER_NOTICE.discard, "off") if notice else (db.PREFER_NOTICE.add, "on")
+    with db.modify_vars():
+        notice = wrapper.source.prefers_notice()
+        action, toggle = (db.PREFER_NOTICE.discard, "off") if notice else (db.PREFER_NOTICE.add, "on")
 
-    action(account)
-    db.toggle_notice(account)
+        action(account)
+        db.toggle_notice(account)
     # message keys used: "notice_on", "notice_off"
     wrapper.pm(messages["notice_" + toggle])
 
@@ -425,17 +427,10 @@ def on_del_player(evt: Event, var: GameState, player: User, all_roles: set[str],
         possible = {evt.params.main_role}
     else:
         possible = set(event.data["possible"])
-    newstats = set()
     # For every possible role this person is, try to deduct 1 from that role's count in our stat sets
     # if a stat set doesn't contain the role, then that would lead to an impossible condition and therefore
-    # that set is not added to newstats to indicate that set is no longer possible
-    for p in possible:
-        for rs in var.get_role_stats():
-            d = Counter(dict(rs))
-            if p in d and d[p] >= 1:
-                d[p] -= 1
-                newstats.add(frozenset(d.items()))
-    var.set_role_stats(newstats)
+    # that set is dropped to indicate that set is no longer possible
+    var.set_role_stats(var.role_stats.remove_one(possible))
 
 # FIXME: get rid of the priority once we move state transitions into the main event loop instead of having it here
 @event_listener("kill_players", priority=10)
@@ -543,6 +538,9 @@ def leave(var: Optional[GameState | PregameState], what: str, user: User, why=No
     if user not in ps or user in reaper.DISCONNECTED:
         return
 
+    if var.in_game:
+        journal.record_leave(var, user, what)
+
     # If we got that far, the player was in the game. This variable tracks whether or not we want to kill them off.
     killplayer = True
 
@@ -601,7 +599,7 @@ def leave(var: Optional[GameState | PregameState], what: str, user: User, why=No
         add_dying(var, user, "bot", what, death_triggers=False)
         kill_players(var)
     else:
-        reaper.DISCONNECTED[user] = (datetime.now(), what)
+        reaper.mark_disconnected(var, user, what)
 
     if not var.in_game and num_remaining <= 0:
         # chk_win handles ending game at 0 players if a game is running, don't need to do so here
@@ -1426,20 +1424,46 @@ def py(wrapper: MessageDispatcher, message: str):
 
 @command("freceive", owner_only=True, flag="d", pm=True)
 def freceive(wrapper: MessageDispatcher, message: str):
-    from oyoyo.parse import parse_raw_irc_command
+    from oyoyo.parse import parse_irc_line
     try:
-        line = message.encode("utf-8")
-        prefix, cmd, args = parse_raw_irc_command(line)
-        prefix = prefix.decode("utf-8")
-        args = [arg.decode("utf-8") for arg in args if isinstance(arg, bytes)]
+        tags, prefix, cmd, args = parse_irc_line(message.encode("utf-8"))
         if cmd in ("privmsg", "notice"):
             is_notice = cmd == "notice"
-            handler.on_privmsg(wrapper.client, prefix, *args, notice=is_notice)
+            handler.on_privmsg(wrapper.client, prefix, *args, notice=is_notice, tags=tags)
         else:
-            handler.unhandled(wrapper.client, prefix, cmd, *args)
+            handler.unhandled(wrapper.client, prefix, cmd, *args, tags=tags)
     except Exception as e:
         wrapper.send("{e.__class__.__name__}: {e}".format(e=e))
 
+@command("fprofile", flag="D", pm=True)
+def fprofile(wrapper: MessageDispatcher, message: str):
+    """Controls event listener profiling, or shows the slowest event listeners."""
+    arg = message.strip().lower()
+    if arg == "on":
+        enable_listener_profiling()
+        wrapper.reply(messages["fprofile_enabled"])
+    elif arg == "off":
+        disable_listener_profiling()
+        wrapper.reply(messages["fprofile_disabled"])
+    elif arg == "reset":
+        reset_listener_stats()
+        wrapper.reply(messages["fprofile_reset"])
+    elif not arg or arg.isdigit():
+        if not listener_profiling_enabled():
+            wrapper.reply(messages["fprofile_not_enabled"])
+            return
+        stats = sorted(get_listener_stats().items(), key=lambda x: x[1].total, reverse=True)[:int(arg or 5)]
+        if not stats:
+            wrapper.reply(messages["fprofile_no_data"])
+            return
+        for (event, listener_id), s in stats:
+            wrapper.pm(messages["fprofile_listener"].format(event, listener_id, s.count,
+                                                            "{0:.1f}".format(s.total * 1000),
+                                                            "{0:.1f}".format(s.max * 1000),
+                                                            s.errors))
+    else:
+        wrapper.reply(messages["fprofile_usage"])
+
 @command("ferror", flag="d")
 def force_error(wrapper: MessageDispatcher, message: str):
     if not message:
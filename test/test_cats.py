@@ -0,0 +1,56 @@
+from unittest import TestCase
+
+import src # ensure roles are registered and categories are frozen
+from src.cats import All, Nobody, Wolf, Killer, Village, Wolfteam, Wolf_Objective, Category
+from src.events import EventListener
+from src.functions import get_role_metadata, match_role
+
+class TestCategory(TestCase):
+    def test_operators(self):
+        self.assertEqual((Wolf & Killer).roles, Wolf.roles & Killer.roles)
+        self.assertEqual((Wolf | Village).roles, Wolf.roles | Village.roles)
+        self.assertEqual((Wolf + Village).roles, Wolf.roles | Village.roles)
+        self.assertEqual((Wolf ^ Killer).roles, Wolf.roles ^ Killer.roles)
+        self.assertEqual((Wolfteam - Wolf).roles, Wolfteam.roles - Wolf.roles)
+        self.assertEqual((~Wolf).roles, All.roles - Wolf.roles)
+        self.assertEqual(str(~Wolf), "~Wolf")
+        self.assertEqual(len(Nobody), 0)
+
+    def test_sets(self):
+        roles = {"wolf", "villager", "seer"}
+        self.assertEqual((roles - Wolf_Objective).roles, roles - Wolf_Objective.roles)
+        self.assertEqual((Wolf & roles).roles, {"wolf"})
+        self.assertEqual((All & roles.copy()).roles, roles)
+        with self.assertRaises(ValueError):
+            Wolf & {"not a role"}
+
+    def test_membership(self):
+        self.assertIn("wolf", Wolf)
+        self.assertNotIn("villager", Wolf)
+        self.assertNotIn("not a role", All)
+        self.assertEqual(set(Wolf & Killer), Wolf.roles & Killer.roles)
+        self.assertEqual(list(All), sorted(All.roles))
+        self.assertEqual(len(Wolf), len(Wolf.roles))
+
+    def test_memoized(self):
+        self.assertIs(Wolf & Killer, Wolf & Killer)
+        self.assertIs(~Wolf, ~Wolf)
+        self.assertIs({"wolf", "seer"} - Wolf, {"seer", "wolf"} - Wolf)
+        self.assertIsNot(Wolf & Killer, Killer & Wolf)
+        self.assertEqual(Wolf & Killer, Killer & Wolf)
+        self.assertIsInstance(Wolf - Killer, Category)
+
+class TestRoleMetadata(TestCase):
+    def test_cache(self):
+        special = get_role_metadata(None, "special_keys")
+        self.assertIn("lover", special["matchmaker"])
+        self.assertIs(get_role_metadata(None, "special_keys"), special)
+        listener = EventListener(lambda evt, var, kind: evt.data.update(test={"test key"}) if kind == "special_keys" else None,
+                                 listener_id="test.special_keys")
+        listener.install("get_role_metadata")
+        try:
+            self.assertEqual(get_role_metadata(None, "special_keys")["test"], {"test key"})
+        finally:
+            listener.remove("get_role_metadata")
+        self.assertNotIn("test", get_role_metadata(None, "special_keys"))
+        self.assertEqual(match_role("lover").get().key, "lover")
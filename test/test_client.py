@@ -0,0 +1,112 @@
+import contextlib
+import io
+import socket
+from unittest import TestCase
+
+from oyoyo.client import IRCClient, TokenBucket, SendQueue, PRIORITY_CHANNEL, PRIORITY_PRIVATE, PRIORITY_WHO
+
+class TestIRCClient(TestCase):
+    def setUp(self):
+        self.received = []
+        handler = {"": lambda cli, prefix, command, *args, tags: self.received.append((prefix, command, args))}
+        self.cli = IRCClient(handler, stream_handler=lambda output, *args, level=None: None)
+
+    def test_process_buffer(self):
+        buffer = bytearray(b":a!b@c PRIVMSG #chan :hello\r\n\r\nPING :x\r\nPRIV")
+        self.cli._process_buffer(buffer)
+        self.assertEqual(self.received, [("a!b@c", "privmsg", ("#chan", "hello")), (None, "ping", ("x",))])
+        self.assertEqual(buffer, bytearray(b"PRIV"))
+        buffer += b"MSG #chan :more\n"
+        self.cli._process_buffer(buffer)
+        self.assertEqual(self.received[-1], (None, "privmsg", ("#chan", "more")))
+        self.assertEqual(buffer, bytearray())
+
+    def test_selector_loop(self):
+        self.cli.use_selector = True
+        self.cli.tokenbucket = TokenBucket(2, 0.01)
+        self.cli.socket, server = socket.socketpair()
+        self.cli.socket.setblocking(False)
+        try:
+            loop = self.cli._selector_loop()
+            for i in range(3):
+                self.cli.send("PRIVMSG #chan :{0}".format(i))
+            # only two tokens are available, so the third message waits for the bucket to refill
+            next(loop)
+            self.assertEqual(len(self.cli.send_queue), 1)
+            server.sendall(b"PING :x\r\n")
+            while self.cli.send_queue or not self.received:
+                next(loop)
+            self.assertEqual(self.received, [(None, "ping", ("x",))])
+            server.settimeout(1)
+            data = b""
+            while data.count(b"\r\n") < 3:
+                data += server.recv(1024)
+            self.assertEqual(data, b"PRIVMSG #chan :0\r\nPRIVMSG #chan :1\r\nPRIVMSG #chan :2\r\n")
+            server.close()
+            for _ in loop:
+                pass
+            self.assertTrue(self.cli._end)
+        finally:
+            self.cli.socket.close()
+
+class TestSendQueue(TestCase):
+    def test_priority(self):
+        queue = SendQueue()
+        queue.push(b"WHO #chan", PRIORITY_WHO)
+        queue.push(b"PRIVMSG foo :you are a seer", PRIORITY_PRIVATE)
+        queue.push(b"PRIVMSG #chan :day begins", PRIORITY_CHANNEL)
+        queue.push(b"PONG :x")
+        self.assertEqual(len(queue), 4)
+        self.assertEqual([queue.pop() for _ in range(4)],
+                         [b"PONG :x", b"PRIVMSG #chan :day begins", b"PRIVMSG foo :you are a seer", b"WHO #chan"])
+        self.assertIsNone(queue.pop())
+        stats = queue.stats()
+        self.assertEqual(stats["private"]["sent"], 1)
+        self.assertEqual(stats["private"]["depth"], 0)
+
+    def test_coalesce(self):
+        queue = SendQueue()
+        with self.subTest("multiple targets"):
+            for nick in (b"a", b"b", b"c"):
+                queue.push(b"PRIVMSG " + nick + b" :hello", PRIORITY_PRIVATE, max_targets=2)
+            self.assertEqual(queue.pop(), b"PRIVMSG a,b :hello")
+            self.assertEqual(queue.pop(), b"PRIVMSG c :hello")
+        with self.subTest("same target"):
+            queue.push(b"PRIVMSG #chan :foo", PRIORITY_CHANNEL, join=True)
+            queue.push(b"PRIVMSG #chan :bar", PRIORITY_CHANNEL, join=True)
+            queue.push(b"NOTICE #chan :baz", PRIORITY_CHANNEL, join=True)
+            queue.push(b"NOTICE #chan :qux", PRIORITY_CHANNEL)
+            self.assertEqual([queue.pop() for _ in range(len(queue))],
+                             [b"PRIVMSG #chan :foo bar", b"NOTICE #chan :baz", b"NOTICE #chan :qux"])
+        with self.subTest("ctcp"):
+            queue.push(b"PRIVMSG #chan :\x01ACTION waves\x01", PRIORITY_CHANNEL, join=True)
+            queue.push(b"PRIVMSG #chan :hello", PRIORITY_CHANNEL, join=True)
+            queue.push(b"PRIVMSG #chan :\x01ACTION waves\x01", PRIORITY_CHANNEL, join=True)
+            self.assertEqual([queue.pop() for _ in range(len(queue))],
+                             [b"PRIVMSG #chan :\x01ACTION waves\x01", b"PRIVMSG #chan :hello", b"PRIVMSG #chan :\x01ACTION waves\x01"])
+        with self.subTest("length limit"):
+            queue.push(b"PRIVMSG #chan :foo", PRIORITY_CHANNEL, join=True)
+            queue.push(b"PRIVMSG #chan :bar", PRIORITY_CHANNEL, join=True, max_length=20)
+            self.assertEqual(len(queue), 2)
+            queue.clear()
+        self.assertEqual(queue.coalesced, 2)
+
+class TestDebugLogging(TestCase):
+    def test_debug_disabled(self):
+        logged = []
+        cli = IRCClient({}, stream_handler=lambda output, *args, level=None: logged.append((output, args)))
+        cli._handle_line(b"@account=foo :n!u@h PRIVMSG #chan :hi")
+        self.assertEqual(logged, [("<--- receive {0} {1} ({2})", ("n!u@h", "privmsg", "#chan, hi")),
+                                  ("     @{0}", (cli_tags := logged[1][1][0],))])
+        self.assertEqual(str(cli_tags), "account=foo")
+        logged.clear()
+        cli.debug_enabled = lambda: False
+        cli._handle_line(b"@account=foo :n!u@h PRIVMSG #chan :hi")
+        self.assertEqual(logged, [])
+
+    def test_default_handler(self):
+        cli = IRCClient({})
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            cli.stream_handler("Error: {0}".format("unexpected '}' in {line}"), level="warning")
+            cli.stream_handler("---> send {0}", "PING", level="debug")
+        self.assertEqual(out.getvalue().splitlines(), ["Error: unexpected '}' in {line}", "---> send PING"])
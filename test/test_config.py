@@ -0,0 +1,76 @@
+import tempfile
+from pathlib import Path
+from types import MappingProxyType
+from unittest import TestCase
+from src.config import Config
+
+METADATA = """
+_type: dict
+_default:
+  foo:
+    _type: int
+    _default: 1
+  bar:
+    _type: list
+    _default: [{name: a}, {name: b}]
+    _items:
+      _type: dict
+      _default:
+        name:
+          _type: str
+          _default: ""
+"""
+
+class TestConfig(TestCase):
+    def setUp(self):
+        with tempfile.TemporaryDirectory() as d:
+            p = Path(d) / "metadata.yml"
+            p.write_text(METADATA)
+            self.config = Config()
+            self.config.load_metadata(p)
+
+    def test_get(self):
+        with self.subTest("scalar"):
+            self.assertEqual(self.config.get("foo"), 1)
+        with self.subTest("index"):
+            self.assertEqual(self.config.get("bar[1].name"), "b")
+        with self.subTest("missing"):
+            self.assertRaises(KeyError, self.config.get, "baz")
+            self.assertRaises(KeyError, self.config.get, "bar[2]")
+            self.assertIsNone(self.config.get("baz", None))
+
+    def test_get_copy(self):
+        value = self.config.get("bar")
+        value[0]["name"] = "c"
+        value.append({"name": "d"})
+        self.assertEqual(self.config.get("bar"), [{"name": "a"}, {"name": "b"}])
+
+    def test_get_frozen(self):
+        value = self.config.get("bar", frozen=True)
+        self.assertIsInstance(value, tuple)
+        self.assertIsInstance(value[0], MappingProxyType)
+        self.assertEqual(value[0]["name"], "a")
+        self.assertIs(value, self.config.get("bar", frozen=True))
+
+    def test_set_invalidates(self):
+        self.assertEqual(self.config.get("foo"), 1)
+        frozen = self.config.get("bar", frozen=True)
+        self.config.set("foo", 2)
+        self.config.set("bar[0].name", "c")
+        self.assertEqual(self.config.get("foo"), 2)
+        self.assertEqual(self.config.get("bar[0].name"), "c")
+        self.assertEqual(self.config.get("bar", frozen=True)[0]["name"], "c")
+        self.assertEqual(frozen[0]["name"], "a")
+
+    def test_set_concurrent_get(self):
+        invalidate = self.config._invalidate
+
+        def invalidate_and_get():
+            invalidate()
+            # another thread reading the key right after the cache was dropped
+            self.config.get("foo")
+
+        self.config._invalidate = invalidate_and_get
+        self.config.set("foo", 2)
+        del self.config._invalidate
+        self.assertEqual(self.config.get("foo"), 2)
@@ -0,0 +1,54 @@
+from types import SimpleNamespace
+from unittest import TestCase
+from src.context import lower, equals, _send, Features, NotLoggedIn
+
+class TestLower(TestCase):
+    def tearDown(self):
+        Features.unset("CASEMAPPING")
+
+    def test_casemappings(self):
+        with self.subTest("rfc1459"):
+            self.assertEqual(lower("Foo[Bar]\\^", casemapping="rfc1459"), "foo{bar}|~")
+        with self.subTest("strict-rfc1459"):
+            self.assertEqual(lower("Foo[Bar]\\^", casemapping="strict-rfc1459"), "foo{bar}|^")
+        with self.subTest("ascii"):
+            self.assertEqual(lower("Foo[Bar]\\^", casemapping="ascii"), "foo[bar]\\^")
+        with self.subTest("unknown"):
+            self.assertEqual(lower("Foo[Bar]\\^", casemapping="unknown"), "foo{bar}|~")
+        with self.subTest("passthrough"):
+            self.assertIsNone(lower(None))
+            self.assertIs(lower(NotLoggedIn), NotLoggedIn)
+
+    def test_features(self):
+        self.assertEqual(Features.CASEMAPPING, "rfc1459")
+        self.assertTrue(equals("a^", "A~"))
+        Features["CASEMAPPING"] = "ascii"
+        self.assertEqual(Features.CASEMAPPING, "ascii")
+        self.assertFalse(equals("a^", "A~"))
+        self.assertTrue(equals("a^", "A^"))
+        Features["CASEMAPPING"] = "strict-rfc1459"
+        self.assertEqual(lower("[^]"), "{^}")
+        Features["CASEMAPPING"] = "unknown"
+        self.assertEqual(Features.CASEMAPPING, "rfc1459")
+        Features["CASEMAPPING"] = "ascii"
+        Features.unset("CASEMAPPING")
+        self.assertEqual(Features.CASEMAPPING, "rfc1459")
+
+class TestSend(TestCase):
+    def setUp(self):
+        self.sent = []
+        self.client = SimpleNamespace(nickname="bot", ident="bot", hostmask="host",
+                                      send=lambda line, **kwargs: self.sent.append((line, kwargs["join"])))
+
+    def test_join(self):
+        with self.subTest("default"):
+            _send(["hello"], "", " ", self.client, "PRIVMSG", "#chan")
+            self.assertEqual(self.sent, [("PRIVMSG #chan :hello", False)])
+        self.sent.clear()
+        with self.subTest("opt in"):
+            _send(["hello"], "", " ", self.client, "PRIVMSG", "#chan", join=True)
+            self.assertEqual(self.sent, [("PRIVMSG #chan :hello", True)])
+        self.sent.clear()
+        with self.subTest("split"):
+            _send(["a" * 400, "b" * 400], "", " ", self.client, "PRIVMSG", "#chan", join=True)
+            self.assertEqual([join for line, join in self.sent], [False, False])
@@ -0,0 +1,97 @@
+import os
+import sqlite3
+from unittest import TestCase
+
+from src import db
+from src.db.worker import DatabaseWorker
+
+class _DatabaseTestCase(TestCase):
+    def setUp(self):
+        # run against a private in-memory database instead of data.sqlite3
+        self.old_conn = getattr(db._ts, "conn", None)
+        db._ts.conn = sqlite3.connect(":memory:")
+        with open(os.path.join(os.path.dirname(db.__file__), "db.sql"), "rt") as f:
+            db._ts.conn.executescript(f.read())
+        # queued writes run on this thread, against the same database
+        self.old_worker = db._worker
+        db._worker = DatabaseWorker(db._conn, autostart=False)
+
+    def tearDown(self):
+        db._worker.run_pending()
+        db._worker = self.old_worker
+        db._ts.conn.close()
+        if self.old_conn is None:
+            del db._ts.conn
+        else:
+            db._ts.conn = self.old_conn
+
+class TestStatsRollups(_DatabaseTestCase):
+    def _player(self, account, role, team, indiv, count_game=True, special=()):
+        return {"version": 4, "account": account, "main_role": role, "all_roles": [role], "special": list(special),
+                "team_win": team, "individual_win": indiv, "count_game": count_game, "dced": False}
+
+    def _tables(self):
+        c = db._ts.conn.cursor()
+        return {table: sorted(c.execute("SELECT * FROM {0}".format(table)).fetchall())
+                for table in ("stats_game", "stats_role", "stats_player", "stats_player_role")}
+
+    def test_incremental_matches_rebuild(self):
+        db.add_game("default", 2, "2020-01-01", "2020-01-01", "Wolfteam",
+                    [self._player("alice", "wolf", True, False), self._player("bob", "seer", False, False, special=["lover"])], {})
+        db.add_game("default", 2, "2020-01-02", "2020-01-02", "Village",
+                    [self._player("Alice", "seer", True, False, count_game=False), self._player("bob", "wolf", False, True)], {})
+        db.add_game("foolish", 3, "2020-01-03", "2020-01-03", "Village",
+                    [self._player("alice", "seer", True, False), self._player("bob", "villager", True, False),
+                     self._player("carol", "wolf", False, False)], {})
+        # normalizing the case of account names is left to the worker
+        db._worker.run_pending()
+        incremental = self._tables()
+        self.assertEqual(db.rebuild_stats(), 3)
+        self.assertEqual(self._tables(), incremental)
+        self.assertIn(("default", 2, "Wolfteam", 1), incremental["stats_game"])
+        self.assertEqual(db._total_games(db._get_ids("alice")[0]), 3)
+
+class TestTrackingVars(_DatabaseTestCase):
+    VARS = ("PREFER_NOTICE", "STASISED", "PING_IF_PREFS", "PING_IF_NUMS", "DEADCHAT_PREFS", "FLAGS", "DENY")
+
+    def setUp(self):
+        super().setUp()
+        self.old_vars = {name: getattr(db, name) for name in self.VARS}
+
+    def tearDown(self):
+        for name, value in self.old_vars.items():
+            setattr(db, name, value)
+        super().tearDown()
+
+    def test_swapped(self):
+        db.set_pingif(5, "alice")
+        db.set_access("bob", flags="F")
+        flags = db.FLAGS
+        db.init_vars()
+        self.assertIsNot(db.FLAGS, flags)
+        self.assertNotIn("bob", flags)
+        self.assertEqual(db.FLAGS["bob"], "F")
+        self.assertEqual(db.PING_IF_PREFS["alice"], 5)
+        self.assertEqual(db.PING_IF_NUMS[5], {"alice"})
+
+    def test_modified_while_loading(self):
+        db.set_pingif(5, "alice")
+        fetch = db._fetch_vars
+        calls = []
+
+        def fetch_and_modify():
+            rows = fetch()
+            if not calls:
+                # another thread changes alice's setting after the vars were read
+                with db.modify_vars():
+                    db.set_pingif(8, "alice")
+            calls.append(rows)
+            return rows
+
+        db._fetch_vars = fetch_and_modify
+        try:
+            db.init_vars()
+        finally:
+            db._fetch_vars = fetch
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(db.PING_IF_PREFS["alice"], 8)
@@ -0,0 +1,93 @@
+import sqlite3
+import threading
+from unittest import TestCase
+
+from src.db.worker import BatchConnection, DatabaseWorker
+
+class TestDatabaseWorker(TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:", factory=BatchConnection, check_same_thread=False)
+        self.conn.execute("CREATE TABLE t (x INTEGER UNIQUE)")
+        self.commits = 0
+        self.worker = DatabaseWorker(lambda: self.conn, autostart=False)
+
+    def tearDown(self):
+        self.conn.close()
+
+    def _insert(self, x):
+        self.conn.execute("INSERT INTO t (x) VALUES (?)", (x,))
+        if not self.conn.deferred:
+            self.commits += 1
+        self.conn.commit()
+        return x
+
+    def _select(self):
+        return sorted(x for x, in self.conn.execute("SELECT x FROM t"))
+
+    def test_batched_writes(self):
+        for x in range(5):
+            self.worker.queue_write(self._insert, x)
+        seen = []
+        future = self.worker.submit(self._select, callback=seen.append)
+        self.assertFalse(future.done())
+        self.assertEqual(self.worker.run_pending(), 6)
+        self.assertEqual(future.result(), [0, 1, 2, 3, 4])
+        self.assertEqual(seen, [[0, 1, 2, 3, 4]])
+        # all five writes were committed by the batch, not individually
+        self.assertEqual(self.commits, 0)
+        self.assertFalse(self.conn.in_transaction)
+
+    def test_order(self):
+        # a read between two writes only sees the first one
+        self.worker.queue_write(self._insert, 1)
+        first = self.worker.submit(self._select)
+        self.worker.queue_write(self._insert, 2)
+        second = self.worker.submit(self._select)
+        self.worker.run_pending()
+        self.assertEqual(first.result(), [1])
+        self.assertEqual(second.result(), [1, 2])
+
+    def test_failed_write(self):
+        self.conn.execute("INSERT INTO t (x) VALUES (3)")
+        self.conn.commit()
+        futures = [self.worker.queue_write(self._insert, x) for x in (1, 3, 5)]
+        # silence the traceback reporting for the expected failure
+        self.worker._finish = lambda request, result, exc: (request.future.set_exception(exc) if exc is not None
+                                                           else request.future.set_result(result))
+        self.worker.run_pending()
+        self.assertEqual(futures[0].result(), 1)
+        self.assertIsInstance(futures[1].exception(), sqlite3.IntegrityError)
+        self.assertEqual(futures[2].result(), 5)
+        self.assertEqual(self._select(), [1, 3, 5])
+        self.assertFalse(self.conn.in_transaction)
+
+    def test_failed_commit(self):
+        # the foreign key is only checked on commit, so the bad write fails the batch's commit rather than its statement
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.execute("CREATE TABLE r (x INTEGER REFERENCES t (x) DEFERRABLE INITIALLY DEFERRED)")
+        self.conn.execute("INSERT INTO t (x) VALUES (1)")
+        self.conn.commit()
+
+        def insert_ref(x):
+            self.conn.execute("INSERT INTO r (x) VALUES (?)", (x,))
+            self.conn.commit()
+            return x
+
+        futures = [self.worker.queue_write(insert_ref, x) for x in (1, 2, 1)]
+        self.worker._finish = lambda request, result, exc: (request.future.set_exception(exc) if exc is not None
+                                                           else request.future.set_result(result))
+        self.worker.run_pending()
+        self.assertEqual(futures[0].result(), 1)
+        self.assertIsInstance(futures[1].exception(), sqlite3.IntegrityError)
+        self.assertEqual(futures[2].result(), 1)
+        self.assertEqual(sorted(x for x, in self.conn.execute("SELECT x FROM r")), [1, 1])
+        self.assertFalse(self.conn.in_transaction)
+
+    def test_thread(self):
+        worker = DatabaseWorker(lambda: self.conn, name="test database")
+        threads = []
+        future = worker.submit(lambda: threads.append(threading.current_thread()))
+        self.assertTrue(worker.flush(5))
+        self.assertTrue(future.done())
+        self.assertEqual(threads[0].name, "test database")
+        self.assertIsNot(threads[0], threading.current_thread())
@@ -0,0 +1,87 @@
+from unittest import TestCase
+
+import io
+import json
+
+from src.events import (Event, EventListener, get_event_stats, reset_event_stats, enable_listener_profiling,
+                        disable_listener_profiling, get_listener_stats, dump_listener_stats, get_listeners)
+
+class TestEvents(TestCase):
+    def setUp(self):
+        self.calls = []
+        self.listeners = [
+            EventListener(lambda evt: self.calls.append("late"), listener_id="test.late", priority=9),
+            EventListener(lambda evt: self.calls.append("first"), listener_id="test.first", priority=1),
+            EventListener(lambda evt: self.calls.append("second"), listener_id="test.second", priority=1),
+        ]
+        for listener in self.listeners:
+            listener.install("test_events")
+
+    def tearDown(self):
+        for listener in self.listeners:
+            listener.remove("test_events")
+
+    def test_dispatch_order(self):
+        Event("test_events", {}).dispatch()
+        self.assertEqual(self.calls, ["first", "second", "late"])
+        self.listeners[1].remove("test_events")
+        self.calls.clear()
+        Event("test_events", {}).dispatch()
+        self.assertEqual(self.calls, ["second", "late"])
+        self.assertRaises(ValueError, self.listeners[2].install, "test_events")
+
+    def test_get_listeners(self):
+        listeners = get_listeners("test_events")
+        self.assertEqual([listener.id for listener in listeners], ["test.first", "test.second", "test.late"])
+        self.assertIs(get_listeners("test_events"), listeners)
+        self.listeners[0].remove("test_events")
+        self.assertIsNot(get_listeners("test_events"), listeners)
+        self.assertEqual(get_listeners("no_such_event"), ())
+
+    def test_install_during_dispatch(self):
+        extra = EventListener(lambda evt: self.calls.append("extra"), listener_id="test.extra", priority=10)
+        def installer(evt):
+            extra.install("test_events")
+            self.listeners[-1].remove("test_events")
+        self.listeners.append(extra)
+        self.listeners.append(EventListener(installer, listener_id="test.installer", priority=0))
+        self.listeners[-1].install("test_events")
+        Event("test_events", {}).dispatch()
+        self.assertEqual(self.calls, ["first", "second", "late"])
+        self.calls.clear()
+        Event("test_events", {}).dispatch()
+        self.assertEqual(self.calls, ["first", "second", "late", "extra"])
+
+    def test_stats(self):
+        reset_event_stats()
+        Event("test_events", {}).dispatch()
+        Event("test_events", {}).dispatch()
+        Event("test_events_none", {}).dispatch()
+        stats = get_event_stats()
+        self.assertEqual(stats["test_events"].count, 2)
+        self.assertGreater(stats["test_events"].time, 0)
+        self.assertEqual(stats["test_events_none"].count, 1)
+
+    def test_listener_profiling(self):
+        def fail(evt):
+            raise RuntimeError("oops")
+        self.listeners.append(EventListener(fail, listener_id="test.fail", priority=10))
+        self.listeners[-1].install("test_events")
+        self.assertRaises(RuntimeError, Event("test_events", {}).dispatch) # not recorded
+        enable_listener_profiling()
+        try:
+            self.assertRaises(RuntimeError, Event("test_events", {}).dispatch)
+            self.assertRaises(RuntimeError, Event("test_events", {}).dispatch)
+            stats = get_listener_stats()
+            self.assertEqual(stats[("test_events", "test.first")].count, 2)
+            self.assertEqual(stats[("test_events", "test.first")].errors, 0)
+            self.assertEqual(stats[("test_events", "test.fail")].errors, 2)
+            self.assertGreaterEqual(stats[("test_events", "test.fail")].total, stats[("test_events", "test.fail")].max)
+            f = io.StringIO()
+            dump_listener_stats(f, mode="test")
+            data = json.loads(f.getvalue())
+            self.assertEqual(data["mode"], "test")
+            self.assertEqual(len(data["listeners"]), 4)
+        finally:
+            disable_listener_profiling()
+        self.assertEqual(get_listener_stats(), {})
@@ -0,0 +1,125 @@
+from unittest import TestCase, mock
+from src import users
+from src.users import FakeUser, BotUser
+from src.containers import UserSet
+from src.gamestate import GameState, PregameState, _RoleSet
+from src.scheduler import Scheduler
+from src import trans
+from src.functions import get_players, get_all_players, get_all_roles
+
+class TestRoleIndexes(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # set up a mock BotUser
+        users.Bot = BotUser(None, "bot", "bot", "bot.user", "bot")
+
+    def setUp(self):
+        pregame = PregameState()
+        self.alice = FakeUser.from_nick("alice")
+        self.bob = FakeUser.from_nick("bob")
+        self.carol = FakeUser.from_nick("carol")
+        pregame.players.extend([self.alice, self.bob, self.carol])
+        self.var = GameState(pregame)
+        for role in ("wolf", "seer", "villager", "cursed villager"):
+            self.var.roles[role] = _RoleSet(role=role, index=self.var._player_roles)
+        for player, role in ((self.alice, "wolf"), (self.bob, "seer"), (self.carol, "villager")):
+            self.var.roles[role].add(player)
+            self.var.main_roles[player] = role
+        self.var.roles["cursed villager"].add(self.carol)
+
+    def test_lookups(self):
+        var = self.var
+        self.assertEqual(get_players(var), [self.alice, self.bob, self.carol])
+        self.assertEqual(get_players(var, ("villager", "wolf")), [self.alice, self.carol])
+        self.assertEqual(get_players(var, ("cursed villager",)), [])
+        self.assertEqual(get_all_players(var, ("cursed villager",)), {self.carol})
+        self.assertEqual(get_all_players(var), {self.alice, self.bob, self.carol})
+        self.assertEqual(get_all_roles(var, self.carol), {"villager", "cursed villager"})
+
+    def test_updates(self):
+        var = self.var
+        var.main_roles[self.bob] = "wolf"
+        var.roles["seer"].discard(self.bob)
+        var.roles["wolf"].add(self.bob)
+        self.assertEqual(get_players(var, ("wolf",)), [self.alice, self.bob])
+        self.assertEqual(get_players(var, ("seer",)), [])
+        self.assertEqual(get_all_roles(var, self.bob), {"wolf"})
+        var.roles["cursed villager"].clear()
+        self.assertEqual(get_all_roles(var, self.carol), {"villager"})
+        del var.main_roles[self.carol]
+        var.roles["villager"].remove(self.carol)
+        self.assertEqual(get_players(var), [self.alice, self.bob])
+        self.assertEqual(get_all_players(var), {self.alice, self.bob})
+        self.assertEqual(var._main_role_players, {"wolf": {self.alice, self.bob}})
+        self.assertEqual(var._player_roles, {self.alice: {"wolf"}, self.bob: {"wolf"}})
+
+    def test_swap(self):
+        var = self.var
+        new = FakeUser.from_nick("dave")
+        self.alice.swap(new)
+        self.assertEqual(get_players(var, ("wolf",)), [new])
+        self.assertEqual(get_all_roles(var, new), {"wolf"})
+        self.assertEqual(get_all_roles(var, self.alice), set())
+
+    def test_state_version(self):
+        var = self.var
+        version = var.state_version
+        var.roles["seer"].discard(self.alice)
+        self.assertEqual(var.state_version, version)
+        var.roles["seer"].add(self.alice)
+        var.main_roles[self.alice] = "seer"
+        self.assertGreater(var.state_version, version)
+        version = var.state_version
+        var.set_role_stats([{"wolf": 1, "seer": 1}])
+        self.assertGreater(var.state_version, version)
+
+    def test_copies_unindexed(self):
+        import copy
+        var = self.var
+        clone = copy.deepcopy(var.roles)
+        clone["wolf"].add(self.bob)
+        clone["seer"].clear()
+        self.assertIsInstance(clone["wolf"], UserSet)
+        self.assertEqual(get_all_roles(var, self.bob), {"seer"})
+        main_roles = copy.copy(var.main_roles)
+        main_roles[self.bob] = "wolf"
+        self.assertEqual(get_players(var, ("wolf",)), [self.alice])
+
+class TestPhaseTimers(TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.scheduler = Scheduler(clock=lambda: self.now, autostart=False)
+        patcher = mock.patch("src.gamestate.schedule", self.scheduler.schedule)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(trans.TIMERS.clear)
+        self.fired = []
+        self.var = GameState(PregameState())
+        self.var.begin_phase_transition("day")
+        self.var.end_phase_transition(60, 45, lambda *args: self.fired.append(args), ("x",))
+
+    def test_phase_timers(self):
+        self.assertEqual(trans.TIMERS["day_limit"].remaining(), 60)
+        self.assertEqual(trans.TIMERS["day_warn"].remaining(), 45)
+        self.now = 45
+        self.scheduler.run_pending()
+        self.assertEqual(self.fired, [("warn", "x")])
+        self.var.begin_phase_transition("night")
+        self.assertNotIn("day_limit", trans.TIMERS)
+        self.now = 100
+        self.assertEqual(self.scheduler.run_pending(), 0)
+
+    def test_extend_phase_limit(self):
+        timer = trans.TIMERS["day_limit"]
+        self.now = 50
+        self.var.extend_phase_limit(5)
+        self.assertEqual(timer.remaining(), 10)
+        self.var.extend_phase_limit(30)
+        self.assertIs(trans.TIMERS["day_limit"], timer)
+        self.assertEqual(timer.remaining(), 30)
+        self.now = 79
+        self.scheduler.run_pending()
+        self.assertEqual(self.fired, [("warn", "x")])
+        self.now = 80
+        self.scheduler.run_pending()
+        self.assertEqual(self.fired, [("warn", "x"), ("limit", "x")])
@@ -0,0 +1,67 @@
+import io
+import json
+from types import SimpleNamespace
+from unittest import TestCase
+
+from src import users
+from src.users import FakeUser, BotUser
+from src.gamemodes import CustomSettings
+from src.gamestate import GameState, PregameState
+from src.journal import GameJournal, phase_id
+
+class _File(io.StringIO):
+    def close(self):
+        # keep the contents around after the journal closes its file
+        self.closed_by_journal = True
+
+class TestGameJournal(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        users.Bot = BotUser(None, "bot", "bot", "bot.user", "bot")
+
+    def setUp(self):
+        pregame = PregameState()
+        self.alice = FakeUser.from_nick("alice")
+        self.bob = FakeUser.from_nick("bob")
+        pregame.players.extend([self.bob, self.alice])
+        pregame.current_mode = SimpleNamespace(name="roles", arg="wolf:1,seer:1", CUSTOM_SETTINGS=CustomSettings())
+        self.var = GameState(pregame)
+        self.var.setup_started = True
+        self.var.current_phase = "night"
+        self.var.night_count = 1
+        self.file = _File()
+
+    def records(self):
+        return [json.loads(line) for line in self.file.getvalue().splitlines()]
+
+    def test_header(self):
+        GameJournal(self.file, self.var)
+        header, = self.records()
+        self.assertEqual(header["type"], "game")
+        self.assertEqual(header["mode"], "roles=wolf:1,seer:1")
+        self.assertEqual(bytes.fromhex(header["seed"]), self.var.rng_seed)
+        self.assertEqual(header["players"], ["bob", "alice"])
+
+    def test_events(self):
+        journal = GameJournal(self.file, self.var)
+        journal.command(self.var, self.alice, "kill", "bob", public=False, role="wolf")
+        self.var.current_phase = "day"
+        self.var.day_count = 1
+        journal.leave(self.var, self.bob, "quit")
+        journal.close()
+        _, command, leave = self.records()
+        self.assertEqual(command["phase"], "night1")
+        self.assertEqual(command["player"], 1)
+        self.assertEqual((command["key"], command["message"], command["public"], command["role"]), ("kill", "bob", False, "wolf"))
+        self.assertNotIn("forced", command)
+        self.assertEqual((leave["phase"], leave["player"], leave["what"]), ("day1", 0, "quit"))
+        self.assertTrue(self.file.closed_by_journal)
+        self.assertEqual(len(journal.players), 0)
+
+    def test_phase_id(self):
+        self.assertEqual(phase_id(self.var), "night1")
+        self.var.current_phase = "day"
+        self.var.day_count = 2
+        self.assertEqual(phase_id(self.var), "day2")
+        self.var.current_phase = "join"
+        self.assertEqual(phase_id(self.var), "join")
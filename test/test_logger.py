@@ -0,0 +1,23 @@
+import logging
+from unittest import TestCase
+
+from src import logger
+
+class TestLogger(TestCase):
+    def test_is_enabled_for(self):
+        # use a detached logger so that handlers installed by the test runner aren't considered
+        parent = logging.getLogger("test_logger")
+        parent.propagate = False
+        parent.setLevel(logging.DEBUG)
+        handler = logger.StreamHandler()
+        handler.addFilter(logging.Filter("test_logger.transport"))
+        handler.setLevel(logging.INFO)
+        parent.addHandler(handler)
+        logger.is_enabled_for.cache_clear()
+        try:
+            self.assertTrue(logger.is_enabled_for("test_logger.transport.irc", logging.INFO))
+            self.assertFalse(logger.is_enabled_for("test_logger.transport.irc", logging.DEBUG))
+            self.assertFalse(logger.is_enabled_for("test_logger.general", logging.INFO))
+        finally:
+            parent.removeHandler(handler)
+            logger.is_enabled_for.cache_clear()
@@ -0,0 +1,50 @@
+from unittest import TestCase
+from src.messages import messages
+from src.messages.message import Message, compile_message
+from src.messages._messages import Messages
+
+class TestMessages(TestCase):
+    def test_format(self):
+        with self.subTest("literal"):
+            self.assertEqual(Message("test", "no substitutions {{here}}").format(), "no substitutions {here}")
+        with self.subTest("substitution"):
+            self.assertEqual(Message("test", "{0} and {1:bold}").format("foo", "bar"), "foo and \u0002bar\u0002")
+        with self.subTest("nested substitution"):
+            msg = Message("test", "{=player,players:plural({0})}")
+            self.assertEqual(msg.format(1), "player")
+            self.assertEqual(msg.format(2), "players")
+        with self.subTest("tags"):
+            msg = Message("test", "[if={0}]yes[/if][nif={0}]no[/nif] [b]{1}[/b]")
+            self.assertEqual(msg.format(True, "x"), "yes \u0002x\u0002")
+            self.assertEqual(msg.format(False, "x"), "no \u0002x\u0002")
+        with self.subTest("join"):
+            self.assertEqual(Message("test", "{0:join}").format(["a", "b", "c"]), "a, b, and c")
+
+    def test_errors(self):
+        with self.subTest("ill-formed"):
+            self.assertRaises(RuntimeError, Message("test", "{0").format, "foo")
+        with self.subTest("tag mismatch"):
+            self.assertRaises(ValueError, Message("test", "[b]foo[/if]").format)
+        with self.subTest("unknown tag"):
+            self.assertRaises(ValueError, Message("test", "[foo]bar[/foo]").format)
+
+    def test_compile_cache(self):
+        compile_message.cache_clear()
+        msg = Message("test", ["{0}", "[b]{0}[/b]"], 1)
+        self.assertEqual(msg.format("foo"), "\u0002foo\u0002")
+        self.assertEqual(msg.format("bar"), "\u0002bar\u0002")
+        self.assertEqual(compile_message.cache_info().hits, 1)
+        self.assertIs(compile_message("test", 1, msg.value), compile_message("test", 1, msg.value))
+        messages._load_messages()
+        self.assertEqual(compile_message.cache_info().currsize, 0)
+
+    def test_precompile(self):
+        catalog = Messages(override="en")
+        catalog.messages = {"_metadata": {}, "foo": "{0}", "bar": ["[b]x[/b]", "y"]}
+        timings = catalog.precompile()
+        self.assertEqual({(key, index) for key, index, _ in timings}, {("foo", None), ("bar", 0), ("bar", 1)})
+        catalog.messages["baz"] = ["ok", "[b]oops[/i]"]
+        catalog.messages["qux"] = "{0"
+        with self.assertRaises(ValueError) as cm:
+            catalog.precompile()
+        self.assertIn("2 ill-formed message(s)", str(cm.exception))
@@ -0,0 +1,28 @@
+from unittest import TestCase
+
+from oyoyo.parse import parse_irc_line, parse_raw_irc_command, Tags
+
+class TestParse(TestCase):
+    def test_parse_irc_line(self):
+        with self.subTest("privmsg"):
+            self.assertEqual(parse_irc_line(b":n!u@h PRIVMSG #chan :hello  there\r\n"),
+                             (Tags(), "n!u@h", "privmsg", ["#chan", "hello  there"]))
+        with self.subTest("numeric"):
+            tags, prefix, command, args = parse_irc_line(memoryview(b":srv 353 bot = #chan :@op +voice nick"))
+            self.assertEqual((command, args), ("namreply", ["bot", "=", "#chan", "@op +voice nick"]))
+        with self.subTest("no prefix or args"):
+            self.assertEqual(parse_irc_line(b"AWAY"), (Tags(), None, "away", []))
+        with self.subTest("latin-1 fallback"):
+            self.assertEqual(parse_irc_line(b":n!u@h PRIVMSG bot :caf\xe9")[3], ["bot", "café"])
+
+    def test_tags(self):
+        tags, prefix, command, args = parse_irc_line(b"@account=foo;a=b\\:c\\sd\\\\e\\nf\\x;b;c= :n!u@h TAGMSG #chan")
+        self.assertEqual(tags["account"], "foo")
+        self.assertEqual(tags._values, {"account": "foo"}) # other values have not been unescaped yet
+        self.assertEqual(dict(tags), {"account": "foo", "a": "b;c d\\e\nfx", "b": None, "c": None})
+        self.assertIsNone(tags.get("missing"))
+
+    def test_parse_raw_irc_command(self):
+        tags, prefix, command, args = parse_raw_irc_command(b"@time=x :srv 354 bot 1 #chan ~u host :real name\r\n")
+        self.assertEqual(dict(tags), {"time": "x"})
+        self.assertEqual((prefix, command, args), (b"srv", "whospcrpl", [b"bot", b"1", b"#chan", b"~u", b"host", b"real name"]))
@@ -0,0 +1,26 @@
+from unittest import TestCase
+
+import src # ensure roles are registered and categories are frozen
+from src.gamestate import GameState, PregameState
+from src.cats import All, Wolf, Killer, Wolf_Objective, Vampire_Objective
+from src.gamemodes._random_roles import RandomRoleSampler
+from src.random import random, KEY_SIZE
+
+class TestRandomRoleSampler(TestCase):
+    def setUp(self):
+        random.seed(bytes(KEY_SIZE))
+        self.sampler = RandomRoleSampler(All - {"villager"})
+
+    def test_draw(self):
+        for num_players in (8, 24, 50):
+            counts = self.sampler._draw(num_players)
+            self.assertEqual(sum(counts.values()), num_players)
+            self.assertTrue(any(role in Wolf & Killer for role in counts))
+            num_evil = sum(count * ((role in Wolf_Objective) + (role in Vampire_Objective)) for role, count in counts.items())
+            self.assertLess(num_evil, num_players / 2)
+
+    def test_ends_game(self):
+        self.assertFalse(self.sampler.ends_game(None, {"wolf": 2, "seer": 3, "villager": 5}))
+        var = GameState(PregameState())
+        self.assertTrue(self.sampler.ends_game(var, {"wolf": 5, "seer": 5}))
+        self.assertTrue(self.sampler.ends_game(var, {"seer": 10}))
@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest import TestCase
+
+from src import channels, config, reaper, scheduler, users
+from src.gamestate import GameState, PregameState
+from src.scheduler import Scheduler
+from src.users import BotUser
+
+class TestIdleWarnings(TestCase):
+    SETTINGS = {"reaper.idle.warn.channel": 180, "reaper.idle.warn.private": 0, "reaper.idle.grace": 0}
+
+    @classmethod
+    def setUpClass(cls):
+        users.Bot = BotUser(None, "bot", "bot", "bot.user", "bot")
+
+    def setUp(self):
+        self.old_settings = {key: config.Main.get(key) for key in self.SETTINGS}
+        for key, value in self.SETTINGS.items():
+            config.Main.set(key, value)
+        self.old_scheduler = scheduler._scheduler
+        scheduler._scheduler = Scheduler(autostart=False)
+
+        self.alice = users.add(None, nick="alice!alice@host.a", account="alice")
+        pregame = PregameState()
+        pregame.players.append(self.alice)
+        self.var = GameState(pregame)
+        self.var.setup_completed = True
+        self.var.main_roles[self.alice] = "villager"
+        self.wrapper = SimpleNamespace(target=channels.Main, game_state=self.var, source=self.alice, private=False)
+
+    def tearDown(self):
+        for container in (reaper.LAST_SAID_TIME, reaper.IDLE_WARNED, reaper.IDLE_WARNED_PM, reaper._IDLE_DEADLINES):
+            container.clear()
+        reaper._TIMER = None
+        scheduler._scheduler = self.old_scheduler
+        for key, value in self.old_settings.items():
+            config.Main.set(key, value)
+        users._discard_user(self.alice)
+
+    def test_warned_without_later_stage(self):
+        reaper.LAST_SAID_TIME[self.alice] = datetime.now() - timedelta(seconds=200)
+        reaper.IDLE_WARNED.add(self.alice)
+        reaper._update_idle_deadline(self.alice)
+        # with no private warning and no grace period, a warned player has nothing left to wait for
+        self.assertNotIn(self.alice, reaper._IDLE_DEADLINES)
+        reaper._TIMER = scheduler.schedule(3600, reaper.reaper, self.var, self.var.game_id)
+
+        reaper.update_last_said.func(self.wrapper, "hi")
+        self.assertNotIn(self.alice, reaper.IDLE_WARNED)
+        self.assertIn(self.alice, reaper._IDLE_DEADLINES)
+        self.assertLessEqual(reaper._IDLE_DEADLINES[self.alice], datetime.now() + timedelta(seconds=180))
+        # the reaper is brought forward so they can be warned again
+        self.assertLess(reaper._TIMER.remaining(), 181)
+
+    def test_private_warning_cleared(self):
+        config.Main.set("reaper.idle.warn.private", 240)
+        reaper.IDLE_WARNED.add(self.alice)
+        reaper.IDLE_WARNED_PM.add(self.alice)
+        reaper.update_last_said.func(self.wrapper, "hi")
+        self.assertNotIn(self.alice, reaper.IDLE_WARNED)
+        self.assertNotIn(self.alice, reaper.IDLE_WARNED_PM)
@@ -0,0 +1,39 @@
+from collections import Counter
+from unittest import TestCase
+
+from src.rolestats import RoleStats
+
+class TestRoleStats(TestCase):
+    def test_dedup(self):
+        stats = RoleStats([{"wolf": 1, "seer": 1}, Counter(seer=1, wolf=1), {"wolf": 1, "seer": 1, "harlot": 0}, {"wolf": -1}])
+        self.assertEqual(len(stats), 1)
+        self.assertEqual(stats.roles, ("harlot", "seer", "wolf"))
+        self.assertEqual(stats.as_frozensets(), {frozenset({("harlot", 0), ("seer", 1), ("wolf", 1)})})
+        self.assertEqual(RoleStats(stats.as_frozensets()), stats)
+
+    def test_ranges(self):
+        stats = RoleStats([{"wolf": 2, "seer": 1}, {"wolf": 1, "traitor": 1, "seer": 1}])
+        self.assertEqual(stats.ranges(), {"seer": (1, 1), "traitor": (0, 1), "wolf": (1, 2)})
+        self.assertEqual(RoleStats().ranges(), {})
+
+    def test_remove_one(self):
+        stats = RoleStats([{"wolf": 2, "seer": 0}, {"wolf": 1, "seer": 1}])
+        self.assertEqual(stats.remove_one(["seer"]), RoleStats([{"wolf": 1, "seer": 0}]))
+        self.assertEqual(stats.remove_one(["wolf", "seer", "harlot"]),
+                         RoleStats([{"wolf": 1, "seer": 0}, {"wolf": 0, "seer": 1}]))
+        self.assertEqual(len(stats.remove_one(["harlot"])), 0)
+
+    def test_transform(self):
+        stats = RoleStats([{"wolf": 1, "traitor": 1}, {"wolf": 2, "traitor": 0}])
+        calls = []
+
+        def turn_traitor(roleset):
+            calls.append(dict(roleset))
+            roleset["wolf"] += roleset["traitor"]
+            roleset["traitor"] = 0
+            return [roleset, Counter(wolf=-1)]
+
+        new = stats.transform(turn_traitor)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(new, RoleStats([{"wolf": 2, "traitor": 0}]))
+        self.assertEqual(stats.ranges()["traitor"], (0, 1))
@@ -0,0 +1,57 @@
+import threading
+from unittest import TestCase
+
+from src.scheduler import Scheduler
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class TestScheduler(TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.scheduler = Scheduler(clock=self.clock, autostart=False)
+        self.fired = []
+
+    def test_order(self):
+        for delay in (3, 1, 2, 1):
+            self.scheduler.schedule(delay, self.fired.append, delay)
+        self.assertEqual(self.scheduler.run_pending(), 0)
+        self.clock.now = 1
+        self.assertEqual(self.scheduler.run_pending(), 2)
+        self.clock.now = 5
+        self.scheduler.run_pending()
+        self.assertEqual(self.fired, [1, 1, 2, 3])
+        self.assertEqual(len(self.scheduler), 0)
+
+    def test_cancel_reschedule(self):
+        a = self.scheduler.schedule(1, self.fired.append, "a")
+        b = self.scheduler.schedule(2, self.fired.append, "b")
+        a.cancel()
+        self.assertTrue(b.reschedule(5))
+        self.assertFalse(a.active)
+        self.assertEqual(b.remaining(), 5)
+        self.assertEqual(self.scheduler.pending(), [b])
+        self.clock.now = 4
+        self.scheduler.run_pending()
+        self.assertEqual(self.fired, [])
+        self.clock.now = 5
+        self.scheduler.run_pending()
+        self.assertEqual(self.fired, ["b"])
+        self.assertTrue(b.fired)
+        self.assertEqual(b.remaining(), 0)
+        self.assertFalse(b.reschedule(1))
+        self.assertFalse(a.reschedule(1))
+        self.assertEqual(len(self.scheduler), 0)
+
+    def test_worker(self):
+        scheduler = Scheduler(name="test_scheduler")
+        done = threading.Event()
+        late = scheduler.schedule(60, done.set)
+        scheduler.schedule(0.01, done.set)
+        self.assertTrue(done.wait(5))
+        late.cancel()
+        self.assertEqual(len(scheduler), 0)
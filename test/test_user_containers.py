@@ -83,3 +83,27 @@ class TestUserContainers(TestCase):
         self.assertIn(value, user1.sets)
         self.assertNotIn(value, user2.sets)
         self.assertEqual(str(value), "UserSet(1)")
+
+    def test_list_duplicates(self):
+        user = FakeUser.from_nick("1")
+        value = UserList([user, user])
+        self.assertEqual(user.lists.count(value), 2)
+        value.remove(user)
+        self.assertIn(value, user.lists)
+        value.pop()
+        self.assertNotIn(value, user.lists)
+
+    def test_dict_values(self):
+        user1 = FakeUser.from_nick("1")
+        user2 = FakeUser.from_nick("2")
+        value = UserDict({user1: user2, user2: user2})
+        self.assertEqual(user2.dict_values.count(value), 2)
+        value[user2] = user1
+        self.assertIn(value, user2.dict_values)
+        del value[user1]
+        self.assertNotIn(value, user1.dict_keys)
+        self.assertNotIn(value, user2.dict_values)
+        self.assertIn(value, user1.dict_values)
+        value.clear()
+        self.assertNotIn(value, user1.dict_values)
+        self.assertNotIn(value, user2.dict_keys)
@@ -0,0 +1,100 @@
+from unittest import TestCase
+from src import users
+from src.users import BotUser
+
+class TestUserIndexes(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # set up a mock BotUser
+        users.Bot = BotUser(None, "bot", "bot", "bot.user", "bot")
+
+    def setUp(self):
+        self.alice = users.add(None, nick="Alice!alice@host.a", account="alice")
+        self.bob = users.add(None, nick="Bob[m]!bob@host.b", account="*")
+
+    def tearDown(self):
+        for user in list(users.users()):
+            users._discard_user(user)
+        self.assertFalse(users._nick_index or users._host_index or users._account_index)
+
+    def test_get(self):
+        with self.subTest("nick"):
+            self.assertIs(users.get("Alice"), self.alice)
+            self.assertIsNone(users.get("alice", allow_none=True))
+        with self.subTest("raw nick"):
+            self.assertIs(users.get("Bob[m]!bob@host.b"), self.bob)
+        with self.subTest("ident and host"):
+            self.assertIs(users.get(ident="bob", host="host.b"), self.bob)
+        with self.subTest("account"):
+            self.assertIs(users.get(account="alice"), self.alice)
+            self.assertIsNone(users.get(account="bob", allow_none=True))
+        with self.subTest("host only"):
+            self.assertEqual(users.get(host="host.a", allow_multiple=True), [self.alice])
+
+    def test_get_update(self):
+        user = users.get("bob{M}!bob@host.b", update=True)
+        self.assertEqual(user.nick, "bob{M}")
+        self.assertIs(users.get("bob{M}"), user)
+        self.assertIsNone(users.get("Bob[m]", allow_none=True))
+
+    def test_new_existing(self):
+        self.assertIs(users.User(None, "Alice", "alice", "host.a", "alice"), self.alice)
+        self.assertIs(users.User(None, "Alice", None, None, None), self.alice)
+
+    def test_swap(self):
+        self.alice.nick = "Carol"
+        carol = users.get("Carol")
+        self.assertEqual((carol.ident, carol.host, carol.account), ("alice", "host.a", "alice"))
+        self.assertIsNone(users.get("Alice", allow_none=True))
+        carol.account = "carol"
+        self.assertIs(users.get(account="carol"), users.get("Carol"))
+        self.assertIsNone(users.get(account="alice", allow_none=True))
+
+class TestCompleteMatch(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        users.Bot = BotUser(None, "bot", "bot", "bot.user", "bot")
+
+    def setUp(self):
+        self.foo = users.add(None, nick="Foo!foo@host.a", account="Acct1")
+        self.foobar = users.add(None, nick="[foobar]!foobar@host.b", account="acct2")
+        self.bar = users.add(None, nick="bar!bar@host.c", account="*")
+
+    def tearDown(self):
+        for user in list(users.users()):
+            users._discard_user(user)
+
+    def assertMatch(self, pattern, expected, scope=None):
+        self.assertEqual(set(users.complete_match(pattern, scope)), set(expected))
+
+    def test_nick(self):
+        with self.subTest("exact"):
+            self.assertMatch("foo", [self.foo])
+            self.assertMatch("FOO", [self.foo])
+        with self.subTest("prefix"):
+            self.assertMatch("fooba", [self.foobar])
+            self.assertMatch("b", [self.bar])
+        with self.subTest("stripped prefix"):
+            self.assertMatch("{foob", [self.foobar])
+        with self.subTest("no match"):
+            self.assertMatch("baz", [])
+
+    def test_account(self):
+        self.assertMatch(":acct", [self.foo, self.foobar])
+        self.assertMatch(":acct1", [self.foo])
+        self.assertMatch("f:acct2", [self.foobar])
+        self.assertMatch("bar:", [self.bar])
+
+    def test_scope(self):
+        self.assertMatch("f", [self.foo, self.foobar])
+        self.assertMatch("f", [self.foobar], scope=[self.foobar, self.bar])
+        self.assertMatch("b", [users.Bot, self.bar], scope=[self.bar, users.Bot])
+        self.assertEqual(len(users.complete_match("foo", [self.foo, self.foo])), 2)
+        self.assertMatch("{foob", [self.foobar], scope=[self.foo, self.foobar])
+        self.assertMatch(":acct", [self.foo], scope=[self.foo, self.bar])
+        self.assertMatch("f:acct2", [self.foobar], scope=[self.foo, self.foobar])
+
+    def test_rename(self):
+        self.foo.nick = "Qux"
+        self.assertMatch("q", [users.get("Qux")])
+        self.assertMatch("foo", [self.foobar])
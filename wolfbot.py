@@ -21,6 +21,7 @@ import traceback
 import sys
 import os
 import argparse
+import functools
 import logging
 from pathlib import Path
 
@@ -53,9 +54,13 @@ except ImportError:
 #          --config <name> Means to load settings from the configuration file botconfig.name.yml, overriding
 #              whatever is present in botconfig.yml. If specified alongside --debug, configuration in
 #              botconfig.debug.yml takes precedence over configuration defined here.
+#          --check-messages Compiles every message in the configured language, prints how long each one
+#              took to compile (slowest first), and exits without connecting.
 parser = argparse.ArgumentParser()
 parser.add_argument('--debug', action='store_true', help="Run bot in debug mode. Loads botconfig.debug.yml.")
 parser.add_argument('--config', help="Path to file to load in addition to botconfig.yml.")
+parser.add_argument('--check-messages', action='store_true',
+                    help="Validate and time the compilation of every message, then exit.")
 
 args = parser.parse_args()
 if args.debug:
@@ -69,7 +74,22 @@ if args.config:
 
 from oyoyo.client import IRCClient, TokenBucket
 
-from src import handler, config
+from src import handler, config, logger
+from src.messages import messages
+
+def check_messages():
+    try:
+        timings = messages.precompile()
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+
+    total = sum(t for _, _, t in timings)
+    for key, index, elapsed in timings:
+        if index is not None:
+            key = "{0}[{1}]".format(key, index)
+        print("{0:8.3f}ms  {1}".format(elapsed * 1000, key))
+    print("Compiled {0} messages in {1:.3f}s".format(len(timings), total))
 
 def main():
     # fetch IRC transport
@@ -85,6 +105,17 @@ def main():
     general_logger = logging.getLogger("general")
     general_logger.info("Loading Werewolf IRC bot")
 
+    # compile all messages up front so that malformed ones are caught now rather than mid-game,
+    # and so that the first game doesn't pay for compiling every message it uses
+    try:
+        timings = messages.precompile()
+    except ValueError:
+        if not config.Main.get("debug.enabled") or not config.Main.get("debug.messages.nothrow"):
+            raise
+        general_logger.exception("Some messages failed to compile")
+    else:
+        general_logger.info("Compiled {0} messages in {1:.2f}s", len(timings), sum(t for _, _, t in timings))
+
     host = config.Main.get("transports[0].connection.host")
     port = config.Main.get("transports[0].connection.port")
     bindhost = config.Main.get("transports[0].connection.source")
@@ -110,14 +141,14 @@ def main():
         "": handler.unhandled
     }
 
-    def stream_handler(msg, level="info"):
+    def stream_handler(msg, *args, level="info"):
         level_map = {
             "debug": logging.DEBUG,
             "info": logging.INFO,
             "warning": logging.WARNING,
             "error": logging.ERROR
         }
-        transport_logger.log(level_map[level], msg)
+        transport_logger.log(level_map[level], msg, *args)
 
     cli = IRCClient(
         cmd_handler,
@@ -141,12 +172,18 @@ def main():
             config.Main.get("transports[0].flood.max_burst"),
             config.Main.get("transports[0].flood.sustained_rate"),
             init=config.Main.get("transports[0].flood.initial_burst")),
+        use_selector=config.Main.get("transports[0].flood.queue"),
+        coalesce=config.Main.get("transports[0].flood.coalesce"),
         connect_cb=handler.connect_callback,
         stream_handler=stream_handler,
+        debug_enabled=functools.partial(logger.is_enabled_for, transport_logger.name, logging.DEBUG),
     )
     cli.mainLoop()
 
 if __name__ == "__main__":
+    if args.check_messages:
+        check_messages()
+        sys.exit(0)
     try:
         main()
     except Exception: